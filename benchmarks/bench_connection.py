@@ -0,0 +1,98 @@
+"""Compare the connection profiles on a synthetic database.
+
+Run from the repository root:
+    python -m benchmarks.bench_connection [--bills 200] [--saves 50]
+
+Reports, per profile, the time to open a tuned connection, the latency of
+one save_entries transaction (``write_destination_entry`` and the summary
+refresh, then the commit) and the latency of the View Main Bills
+first-page query.
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from db.connection import PROFILES, connect
+from db.bill_list import fetch_bill_page
+from db.entry_summary import refresh_entry_summaries
+from db.entry_writes import write_destination_entry
+from benchmarks.seed import seed_masters, seed_bills, make_rows, entry_slabs
+
+
+def open_connection(path, profile):
+    if profile == "default":
+        # What main.py did before profiles existed: rollback journal, synchronous=FULL
+        conn = sqlite3.connect(path)
+        conn.execute("PRAGMA journal_mode = DELETE")
+        return conn
+    return connect(path, profile)
+
+
+def bench_profile(path, profile, saves, loads):
+    t0 = time.perf_counter()
+    conn = open_connection(path, profile)
+    conn.execute("SELECT 1").fetchone()
+    open_ms = (time.perf_counter() - t0) * 1000
+
+    save_ms = []
+    if profile != "read-only reporting":
+        c = conn.cursor()
+        c.execute("SELECT id FROM destination")
+        destination_ids = [r[0] for r in c.fetchall()]
+        for _ in range(saves):
+            dest_id = random.choice(destination_ids)
+            slabs = entry_slabs(make_rows(c, dest_id, 30))
+            header = {'destination_id': dest_id, 'letter_note': "", 'bill_number': "",
+                      'date': "01-04-2025", 'to_address': ""}
+            # As DestinationEntryPage.save_entries does it
+            t0 = time.perf_counter()
+            destination_entry_id, _, _ = write_destination_entry(c, None, header, slabs)
+            refresh_entry_summaries(c, [destination_entry_id])
+            conn.commit()
+            save_ms.append((time.perf_counter() - t0) * 1000)
+
+    load_ms = []
+    for _ in range(loads):
+        t0 = time.perf_counter()
+        fetch_bill_page(conn.cursor())
+        load_ms.append((time.perf_counter() - t0) * 1000)
+
+    conn.close()
+    return open_ms, save_ms, load_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bills", type=int, default=200)
+    parser.add_argument("--saves", type=int, default=50)
+    parser.add_argument("--loads", type=int, default=10)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="billing_bench_")
+    template = os.path.join(workdir, "template.db")
+    random.seed(1)
+    conn = sqlite3.connect(template)
+    seed_masters(conn)
+    seed_bills(conn, bills=args.bills)
+    conn.close()
+
+    print(f"{'profile':<22}{'open ms':>10}{'save p50':>11}{'save p95':>11}{'list p50':>11}")
+    try:
+        for profile in ["default"] + list(PROFILES):
+            path = os.path.join(workdir, f"{profile.replace(' ', '_')}.db")
+            shutil.copy(template, path)
+            open_ms, save_ms, load_ms = bench_profile(path, profile, args.saves, args.loads)
+            save_p50 = f"{statistics.median(save_ms):.2f}" if save_ms else "-"
+            save_p95 = f"{sorted(save_ms)[int(len(save_ms) * 0.95) - 1]:.2f}" if save_ms else "-"
+            print(f"{profile:<22}{open_ms:>10.2f}{save_p50:>11}{save_p95:>11}{statistics.median(load_ms):>11.2f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
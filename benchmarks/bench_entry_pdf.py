@@ -0,0 +1,78 @@
+"""Render synthetic destination entry reports with one very large slab.
+
+Run from the repository root:
+    python -m benchmarks.bench_entry_pdf [--rows 100 300 1000 1500 5000] [--repeat 3]
+
+Compares, per slab size, the old layout (the whole slab in one Table kept
+together) with the page-by-page ``ChunkedLongTable`` layout, reporting the
+best-of-N story/layout/write times and the page count.
+"""
+import argparse
+import io
+import random
+
+from pypdf import PdfReader
+
+from reports.entry_report import render_entry_pdf
+from reports.pdf_template import StageTimer
+
+
+def make_snapshot(rows):
+    dealers = []
+    total_bags = total_mt = total_mtk = total_amount = 0
+    for i in range(rows):
+        bags = random.randint(20, 400)
+        mt = bags * 0.05
+        km = round(random.uniform(10, 25), 1)
+        mtk = mt * km
+        amount = mtk * 9.5
+        dealers.append((i, f"DEALER {i} FOL PLACE {i % 40}", km, bags, mt, mtk, amount,
+                        str(100000 + i), "01-04-2025", "FACTOMFOS 20:20:0:13", "" if i % 7 else "Short by 2 bags"))
+        total_bags += bags
+        total_mt += mt
+        total_mtk += mtk
+        total_amount += amount
+    return {
+        "letter_note": "Transportation of fertilizer",
+        "bill_number": "BENCH/1",
+        "date": "01-04-2025",
+        "to_address": "The Depot Manager\nFACT Westhill\nCalicut",
+        "destination_name": "BENCH",
+        "ranges": [{
+            "name": "BENCH 10.1-25",
+            "rate": 9.5,
+            "dealers": dealers,
+            "totals": (total_bags, total_mt, total_mtk, total_amount),
+        }],
+    }
+
+
+def bench(snapshot, keep_together_rows, repeat):
+    best = None
+    for _ in range(repeat):
+        buffer = io.BytesIO()
+        timer = render_entry_pdf(snapshot, buffer, StageTimer(), keep_together_rows=keep_together_rows)
+        total = sum(timer.stages.values())
+        if best is None or total < best[0]:
+            best = (total, timer.stages, len(PdfReader(io.BytesIO(buffer.getvalue())).pages))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 300, 1000, 1500, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    random.seed(1)
+    print(f"{'rows':>6} {'layout':<10}{'total ms':>10}{'story':>9}{'layout':>9}{'write':>9}{'pages':>7}")
+    for rows in args.rows:
+        snapshot = make_snapshot(rows)
+        for name, keep_together_rows in (("one table", rows), ("chunked", 0)):
+            total, stages, pages = bench(snapshot, keep_together_rows, args.repeat)
+            print(f"{rows:>6} {name:<10}{total:>10.0f}{stages['story']:>9.0f}{stages['layout']:>9.0f}"
+                  f"{stages['write']:>9.0f}{pages:>7}")
+
+
+if __name__ == "__main__":
+    main()
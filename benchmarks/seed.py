@@ -0,0 +1,83 @@
+"""Synthetic billing data shared by the benchmark scripts."""
+import itertools
+import random
+
+from db.bill_totals import refresh_bill_totals
+from db.entry_summary import refresh_entry_summaries
+from db.entry_writes import write_destination_entry
+from db.migrations import migrate
+
+# MDA numbers are unique across the whole database
+_mda_numbers = itertools.count(100000)
+
+SLABS = [(0, 10, 120.0, 0), (10.1, 25, 9.5, 1), (25.1, 50, 8.25, 1), (50.1, 100, 7.0, 1), (100.1, 200, 6.1, 1)]
+
+
+def seed_masters(conn, destinations=20, dealers_per_destination=50):
+    migrate(conn)
+    c = conn.cursor()
+    c.executemany("INSERT INTO rate_range (from_km, to_km, rate, is_mtk) VALUES (?, ?, ?, ?)", SLABS)
+    for d in range(destinations):
+        c.execute("INSERT INTO destination (name, place) VALUES (?, ?)", (f"DEST {d}", f"PLACE {d}"))
+        dest_id = c.lastrowid
+        c.executemany(
+            "INSERT INTO dealer (code, name, place, pincode, mobile, distance, destination_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(f"D{d:03d}{i:04d}", f"DEALER {d}-{i} FOL", f"PLACE {d}", "673018", "9447000000",
+              round(random.uniform(1, 200), 1), dest_id)
+             for i in range(dealers_per_destination)]
+        )
+    conn.commit()
+
+
+def make_rows(c, destination_id, count):
+    """Random dispatch rows for ``destination_id`` grouped by rate_range id."""
+    c.execute("SELECT id, distance FROM dealer WHERE destination_id = ?", (destination_id,))
+    dealers = c.fetchall()
+    c.execute("SELECT id, from_km, to_km, rate, is_mtk FROM rate_range")
+    slabs = c.fetchall()
+    grouped = {}
+    for i in range(count):
+        dealer_id, km = random.choice(dealers)
+        slab = next(s for s in slabs if s[1] <= km <= s[2])
+        bags = random.randint(20, 400)
+        mt = bags * 0.05
+        mtk = mt * km
+        amount = slab[3] * (mtk if slab[4] else mt)
+        grouped.setdefault(slab, []).append({
+            'dealer_id': dealer_id, 'despatched_to': f"DEALER {dealer_id}", 'km': km, 'bags': bags,
+            'mt': mt, 'mtk': mtk, 'amount': amount, 'mda_number': str(next(_mda_numbers)),
+            'date': "01-04-2025", 'description': 'FACTOM FOS', 'remarks': '',
+        })
+    return grouped
+
+
+def entry_slabs(grouped):
+    """``make_rows`` output as the slabs ``write_destination_entry`` takes for a new entry."""
+    return [(None, rate_range_id, rate, rows) for (rate_range_id, _, _, rate, _), rows in grouped.items()]
+
+
+def save_entry(c, destination_id, grouped):
+    """Insert one destination entry through the app's write layer."""
+    header = {'destination_id': destination_id, 'letter_note': "", 'bill_number': "",
+              'date': "01-04-2025", 'to_address': ""}
+    destination_entry_id, _, _ = write_destination_entry(c, None, header, entry_slabs(grouped))
+    return destination_entry_id
+
+
+def seed_bills(conn, bills=200, entries_per_bill=5, rows_per_entry=30):
+    c = conn.cursor()
+    c.execute("SELECT id FROM destination")
+    destination_ids = [r[0] for r in c.fetchall()]
+    for b in range(bills):
+        c.execute("INSERT INTO main_bill (bill_number, date_of_clearing, year) VALUES (?, ?, ?)",
+                  (f"SE/{b:05d}", f"{b % 28 + 1:02d}-{b % 12 + 1:02d}-2025", "2025-26"))
+        main_bill_id = c.lastrowid
+        for _ in range(entries_per_bill):
+            dest_id = random.choice(destination_ids)
+            de_id = save_entry(c, dest_id, make_rows(c, dest_id, rows_per_entry))
+            c.execute("INSERT INTO main_bill_entries (main_bill_id, destination_entry_id) VALUES (?, ?)",
+                      (main_bill_id, de_id))
+            c.execute("UPDATE destination_entry SET main_bill_id = ? WHERE id = ?", (main_bill_id, de_id))
+    refresh_entry_summaries(c)
+    refresh_bill_totals(c)
+    conn.commit()
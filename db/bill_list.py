@@ -0,0 +1,124 @@
+"""Keyset-paginated main bill list for the View Main Bills page.
+
+Bills are ordered newest first by ``(clearing date, id)``. A page is read
+by seeking past the last (or first) key of the current page, so opening
+the list costs the same no matter how many years of bills are stored.
+
+``date_of_clearing`` is stored as dd-mm-yyyy text, which does not sort by
+date; ``CLEARING_KEY_SQL`` turns it into yyyy-mm-dd and is indexed as an
+expression (the query must repeat it verbatim for the index to apply).
+"""
+from collections import namedtuple
+
+CLEARING_KEY_SQL = (
+    "IFNULL(CASE WHEN substr(date_of_clearing, 3, 1) = '-' "
+    "THEN substr(date_of_clearing, 7, 4) || '-' || substr(date_of_clearing, 4, 2) "
+    "|| '-' || substr(date_of_clearing, 1, 2) "
+    "ELSE date_of_clearing END, '')"
+)
+
+PAGE_SIZE = 50
+
+BillPage = namedtuple("BillPage", "rows has_newer has_older")
+
+
+def create_bill_list_indexes(c):
+    c.execute(f"CREATE INDEX IF NOT EXISTS idx_main_bill_clearing_key ON main_bill({CLEARING_KEY_SQL}, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_main_bill_bill_number_nocase ON main_bill(bill_number COLLATE NOCASE)")
+
+
+def clearing_key(date_text):
+    """Sort key for a dd-mm-yyyy date, matching ``CLEARING_KEY_SQL``."""
+    date_text = (date_text or "").strip()
+    if len(date_text) == 10 and date_text[2] == "-":
+        return f"{date_text[6:]}-{date_text[3:5]}-{date_text[:2]}"
+    return date_text
+
+
+def _prefix_bounds(prefix):
+    prefix = prefix.lower()
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _filter_clauses(prefix=None, date_from=None, date_to=None, year=None):
+    where, params = [], []
+    if prefix:
+        low, high = _prefix_bounds(prefix)
+        # The range seeks the NOCASE index; the substr check keeps it exact
+        where.append("bill_number >= ? COLLATE NOCASE AND bill_number < ? COLLATE NOCASE"
+                     " AND lower(substr(bill_number, 1, ?)) = ?")
+        params += [low, high, len(low), low]
+    if date_from:
+        where.append(f"{CLEARING_KEY_SQL} >= ?")
+        params.append(clearing_key(date_from))
+    if date_to:
+        where.append(f"{CLEARING_KEY_SQL} <= ?")
+        params.append(clearing_key(date_to))
+    if year:
+        where.append("year = ?")
+        params.append(year)
+    return where, params
+
+
+def fetch_bill_page(c, prefix=None, date_from=None, date_to=None,
+                    after=None, before=None, page_size=PAGE_SIZE):
+    """One page of ``(id, bill_number, date_of_clearing, ranges_label, amount, key)`` rows.
+
+    ``after`` pages to older bills and ``before`` to newer ones; both are
+    the ``(key, id)`` of the row at the edge of the current page. Dates are
+    dd-mm-yyyy strings and both ends of the range are inclusive.
+    """
+    where, params = _filter_clauses(prefix, date_from, date_to)
+
+    # Spelled out rather than as a row value so SQLite seeks the expression index
+    if before is not None:
+        key, bill_id = before
+        where.append(f"{CLEARING_KEY_SQL} >= ? AND ({CLEARING_KEY_SQL} > ? OR id > ?)")
+        params += [key, key, bill_id]
+        order = "ASC"
+    else:
+        if after is not None:
+            key, bill_id = after
+            where.append(f"{CLEARING_KEY_SQL} <= ? AND ({CLEARING_KEY_SQL} < ? OR id < ?)")
+            params += [key, key, bill_id]
+        order = "DESC"
+
+    c.execute(f"""
+        SELECT id, bill_number, date_of_clearing, ranges_label, IFNULL(total_amount, 0),
+               {CLEARING_KEY_SQL}
+        FROM main_bill
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {CLEARING_KEY_SQL} {order}, id {order}
+        LIMIT ?
+    """, params + [page_size + 1])
+    rows = c.fetchall()
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if before is not None:
+        rows.reverse()
+        return BillPage(rows, has_newer=more, has_older=True)
+    return BillPage(rows, has_newer=after is not None, has_older=more)
+
+
+def page_keys(rows):
+    """``(first, last)`` keyset cursors of a page, for paging newer/older."""
+    if not rows:
+        return None, None
+    return (rows[0][5], rows[0][0]), (rows[-1][5], rows[-1][0])
+
+
+def fetch_bill_ids(c, prefix=None, date_from=None, date_to=None, year=None):
+    """Ids of every bill matching the filters, newest first (for batch export)."""
+    where, params = _filter_clauses(prefix, date_from, date_to, year)
+    c.execute(f"""
+        SELECT id FROM main_bill
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY {CLEARING_KEY_SQL} DESC, id DESC
+    """, params)
+    return [row[0] for row in c.fetchall()]
+
+
+def fetch_bill_years(c):
+    c.execute("SELECT DISTINCT year FROM main_bill WHERE IFNULL(year, '') != '' ORDER BY year DESC")
+    return [row[0] for row in c.fetchall()]
@@ -0,0 +1,108 @@
+"""Stored per-bill totals and slab labels on ``main_bill``.
+
+The View Main Bills list reads these columns directly. Every write that
+attaches, detaches or edits entries of a bill, or edits a rate slab its
+entries use, calls ``refresh_bill_totals`` for the affected bills inside
+the same transaction.
+
+Rebuild the stored totals of an existing database with:
+    python -m db.bill_totals [billing_app.db]
+"""
+import sys
+from collections import defaultdict
+
+# Slab label as shown in the list pages, e.g. "10-25"
+RANGE_LABEL_SQL = "TRIM(REPLACE(rr.from_km, '.0', '')) || '-' || TRIM(REPLACE(rr.to_km, '.0', ''))"
+
+
+def _in_clause(ids):
+    return ",".join("?" for _ in ids)
+
+
+def bill_ids_for_entries(c, destination_entry_ids):
+    """Main bills that currently include any of the given destination entries."""
+    ids = [int(i) for i in destination_entry_ids]
+    if not ids:
+        return []
+    c.execute(f"""
+        SELECT DISTINCT main_bill_id FROM main_bill_entries
+        WHERE destination_entry_id IN ({_in_clause(ids)})
+    """, ids)
+    return [r[0] for r in c.fetchall()]
+
+
+def bill_ids_for_rate_range(c, rate_range_id):
+    """Main bills with an entry on the rate slab, whose stored label follows the slab's km."""
+    c.execute("""
+        SELECT DISTINCT mbe.main_bill_id FROM main_bill_entries mbe
+        JOIN range_entry re ON re.destination_entry_id = mbe.destination_entry_id
+        WHERE re.rate_range_id = ?
+    """, (rate_range_id,))
+    return [r[0] for r in c.fetchall()]
+
+
+def refresh_bill_totals(c, main_bill_ids=None):
+    """Recompute stored totals for ``main_bill_ids`` (every bill when None)."""
+    if main_bill_ids is None:
+        c.execute("SELECT id FROM main_bill")
+        main_bill_ids = [r[0] for r in c.fetchall()]
+    ids = sorted({int(i) for i in main_bill_ids if i is not None})
+    if not ids:
+        return 0
+
+    totals = {bill_id: (0, 0.0, 0.0, 0.0) for bill_id in ids}
+    labels = defaultdict(list)
+
+    # Chunk to stay below SQLite's bound-parameter limit
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        c.execute(f"""
+            SELECT mbe.main_bill_id,
+                   IFNULL(SUM(dr.no_bags), 0), IFNULL(SUM(dr.mt), 0),
+                   IFNULL(SUM(dr.mtk), 0), IFNULL(SUM(dr.amount), 0)
+            FROM main_bill_entries mbe
+            JOIN range_entry re ON re.destination_entry_id = mbe.destination_entry_id
+            JOIN dealer_entry dr ON dr.range_entry_id = re.id
+            WHERE mbe.main_bill_id IN ({_in_clause(chunk)})
+            GROUP BY mbe.main_bill_id
+        """, chunk)
+        for bill_id, bags, mt, mtk, amount in c.fetchall():
+            totals[bill_id] = (bags, mt, mtk, amount)
+
+        c.execute(f"""
+            SELECT DISTINCT mbe.main_bill_id, rr.from_km, {RANGE_LABEL_SQL}
+            FROM main_bill_entries mbe
+            JOIN range_entry re ON re.destination_entry_id = mbe.destination_entry_id
+            JOIN rate_range rr ON rr.id = re.rate_range_id
+            WHERE mbe.main_bill_id IN ({_in_clause(chunk)})
+            ORDER BY mbe.main_bill_id, rr.from_km
+        """, chunk)
+        for bill_id, _, label in c.fetchall():
+            if label not in labels[bill_id]:
+                labels[bill_id].append(label)
+
+    c.executemany("""
+        UPDATE main_bill
+        SET total_bags = ?, total_mt = ?, total_mtk = ?, total_amount = ?, ranges_label = ?
+        WHERE id = ?
+    """, [
+        (*totals[bill_id], ", ".join(labels[bill_id]) or None, bill_id)
+        for bill_id in ids
+    ])
+    return len(ids)
+
+
+def rebuild_all(conn):
+    """Recompute the stored totals of every bill and commit."""
+    count = refresh_bill_totals(conn.cursor())
+    conn.commit()
+    return count
+
+
+if __name__ == "__main__":
+    from db.connection import connect, DB_PATH
+    from db.migrations import migrate
+
+    conn = connect(sys.argv[1] if len(sys.argv) > 1 else DB_PATH, "bulk-import")
+    migrate(conn)
+    print(f"Rebuilt totals for {rebuild_all(conn)} main bills")
@@ -0,0 +1,56 @@
+"""SQLite connection factory with named tuning profiles."""
+import sqlite3
+
+DB_PATH = "billing_app.db"
+
+# Negative cache_size is in KiB, mmap_size is in bytes, busy_timeout in ms.
+PROFILES = {
+    # Data entry: WAL + synchronous=NORMAL skips the fsync on every commit
+    "interactive": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -20000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+    # Large one-off loads: durability is traded for speed until the final commit
+    "bulk-import": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "cache_size": -100000,
+        "mmap_size": 256 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 30000,
+    },
+    # Reports and background readers never write
+    "read-only reporting": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -50000,
+        "mmap_size": 512 * 1024 * 1024,
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+        "query_only": "ON",
+    },
+}
+
+# journal_mode must be set before query_only locks the connection
+PRAGMA_ORDER = ("busy_timeout", "journal_mode", "synchronous", "cache_size",
+                "mmap_size", "temp_store", "query_only")
+
+
+def apply_profile(conn, profile="interactive"):
+    settings = PROFILES[profile]
+    for pragma in PRAGMA_ORDER:
+        if pragma in settings:
+            conn.execute(f"PRAGMA {pragma} = {settings[pragma]}")
+    return conn
+
+
+def connect(path=DB_PATH, profile="interactive", **kwargs):
+    """Open a connection to the billing database tuned for ``profile``."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown connection profile: {profile}")
+    conn = sqlite3.connect(path, **kwargs)
+    return apply_profile(conn, profile)
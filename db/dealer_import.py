@@ -0,0 +1,140 @@
+"""Dealer import from a district workbook (one sheet per destination).
+
+The workbook is opened once and each sheet is parsed once. Columns are
+cleaned with vectorized pandas operations rather than row by row, and the
+result is written with one destination lookup and a single ``executemany``
+inside one transaction.
+
+``read_dealer_workbook`` is the slow part and runs off the Tk thread; it
+yields ``(sheets_done, sheet_count, None)`` after each sheet and finally
+``(sheet_count, sheet_count, DealerImport)``. ``save_dealer_import`` then
+writes it on the connection's own thread.
+"""
+import hashlib
+
+import pandas as pd
+
+from db.dealer_search import bulk_dealer_changes
+
+COLUMNS = ["Dealer code", "NAME", "Place", "Pin Code", "Mob No.", "Distance"]
+
+# Empty placeholder sheet that Excel adds to new workbooks
+SKIPPED_SHEETS = {"Sheet1"}
+
+
+class DealerImport:
+    def __init__(self, sheets, rows, warnings, content_hash):
+        self.sheets = sheets        # destination sheet names, in workbook order
+        self.rows = rows            # DataFrame: sheet, code, name, place, pincode, mobile, distance
+        self.warnings = warnings
+        self.content_hash = content_hash
+
+
+def content_hash(rows):
+    """Hash of the cleaned rows, so re-saving an unchanged workbook keeps its hash."""
+    row_hashes = pd.util.hash_pandas_object(rows.astype(str), index=False)
+    return hashlib.sha256(row_hashes.values.tobytes()).hexdigest()
+
+
+def _text(column):
+    """Cell values as stripped strings; blanks become ''."""
+    return column.astype(object).where(column.notna(), "").astype(str).str.strip()
+
+
+def _digits(column):
+    """Pincode/phone cells; Excel hands back numbers as floats ('673018.0')."""
+    return _text(column).str.replace(r"\.0$", "", regex=True)
+
+
+def normalize_sheet(sheet_name, df):
+    """Clean one sheet; returns (rows DataFrame, warnings)."""
+    df = df.iloc[:, :len(COLUMNS)].copy()
+    df.columns = COLUMNS[:len(df.columns)]
+    for column in COLUMNS:
+        if column not in df:
+            df[column] = None
+
+    code = _text(df["Dealer code"])
+    raw_name = _text(df["NAME"])
+    distance_text = _text(df["Distance"])
+    distance = pd.to_numeric(distance_text, errors="coerce")
+
+    warnings = []
+    nil = distance_text.str.upper() == "NIL"
+    invalid = distance.isna() & (distance_text != "") & ~nil
+    for dealer_code in code[nil]:
+        warnings.append(f"Sheet: {sheet_name}, Dealer: {dealer_code}, Distance set to NULL (was 'NIL')")
+    for dealer_code, value in zip(code[invalid], distance_text[invalid]):
+        warnings.append(f"Sheet: {sheet_name}, Dealer: {dealer_code}, Distance set to NULL (invalid: {value})")
+
+    missing = (code == "") | (raw_name == "")
+    for index in df.index[missing]:
+        warnings.append(f"Sheet: {sheet_name}, Row: {index + 2}, Missing code or name")
+
+    rows = pd.DataFrame({
+        "sheet": sheet_name,
+        "code": code,
+        "name": raw_name + " FOL",
+        "place": _text(df["Place"]),
+        "pincode": _digits(df["Pin Code"]),
+        # Spaces, dashes and dots typed between digit groups
+        "mobile": _digits(df["Mob No."]).str.replace(r"[\s.\-]+", "", regex=True),
+        "distance": distance.astype(object).where(distance.notna(), None),
+    })
+    return rows[~missing], warnings
+
+
+def read_dealer_workbook(file_path):
+    """Generator job: parse and clean every sheet, reporting progress per sheet."""
+    with pd.ExcelFile(file_path) as workbook:
+        names = [name for name in workbook.sheet_names if name not in SKIPPED_SHEETS]
+        yield 0, len(names), None
+        frames, warnings = [], []
+        for done, name in enumerate(names, 1):
+            rows, sheet_warnings = normalize_sheet(name, workbook.parse(name, dtype=object))
+            frames.append(rows)
+            warnings += sheet_warnings
+            yield done, len(names), None
+    rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=["sheet"])
+    yield len(names), len(names), DealerImport(names, rows, warnings, content_hash(rows))
+
+
+def resolve_destinations(c, names):
+    """Destination id per sheet name, matching name or place case-insensitively.
+
+    Unknown names are added as new destinations.
+    """
+    c.execute("SELECT id, name, place FROM destination ORDER BY id")
+    by_name = {}
+    for dest_id, name, place in c.fetchall():
+        for key in (name, place):
+            if key:
+                by_name.setdefault(key.upper(), dest_id)
+
+    missing = [name for name in dict.fromkeys(names) if name.upper() not in by_name]
+    for name in missing:
+        c.execute("INSERT INTO destination (name, place) VALUES (?, ?)", (name, name))
+        by_name[name.upper()] = c.lastrowid
+    return {name: by_name[name.upper()] for name in names}
+
+
+def save_dealer_import(c, parsed):
+    """Insert the parsed dealers (existing codes are kept); returns the number added.
+
+    The caller commits.
+    """
+    destination_ids = resolve_destinations(c, parsed.sheets)
+    rows = parsed.rows
+    params = list(zip(rows["code"], rows["name"], rows["place"], rows["pincode"], rows["mobile"],
+                      rows["distance"], rows["sheet"].map(destination_ids)))
+    with bulk_dealer_changes(c):
+        c.executemany(
+            """
+            INSERT OR IGNORE INTO dealer
+            (code, name, place, pincode, mobile, distance, destination_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            params
+        )
+        added = c.rowcount
+    return added
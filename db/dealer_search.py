@@ -0,0 +1,142 @@
+"""Full-text dealer search on an FTS5 index.
+
+``dealer_fts`` mirrors each dealer's code, name, place and mobile plus its
+destination name, keyed by ``dealer.id``. Triggers on ``dealer`` and
+``destination`` keep it in sync. Bulk imports should wrap their writes in
+``bulk_dealer_changes`` so the index is rebuilt once instead of per row.
+When SQLite is built without FTS5, searches fall back to LIKE.
+"""
+import re
+import sqlite3
+from contextlib import contextmanager
+
+# bm25 weights in column order: code, name, place, mobile, destination_name
+RANK_WEIGHTS = (10.0, 5.0, 2.0, 2.0, 1.0)
+
+_DEALER_TRIGGERS = {
+    "dealer_fts_ai": """
+        CREATE TRIGGER IF NOT EXISTS dealer_fts_ai AFTER INSERT ON dealer BEGIN
+            INSERT INTO dealer_fts (rowid, code, name, place, mobile, destination_name)
+            VALUES (new.id, new.code, new.name, new.place, new.mobile,
+                    (SELECT name FROM destination WHERE id = new.destination_id));
+        END""",
+    "dealer_fts_au": """
+        CREATE TRIGGER IF NOT EXISTS dealer_fts_au AFTER UPDATE ON dealer BEGIN
+            DELETE FROM dealer_fts WHERE rowid = old.id;
+            INSERT INTO dealer_fts (rowid, code, name, place, mobile, destination_name)
+            VALUES (new.id, new.code, new.name, new.place, new.mobile,
+                    (SELECT name FROM destination WHERE id = new.destination_id));
+        END""",
+    "dealer_fts_ad": """
+        CREATE TRIGGER IF NOT EXISTS dealer_fts_ad AFTER DELETE ON dealer BEGIN
+            DELETE FROM dealer_fts WHERE rowid = old.id;
+        END""",
+}
+
+_DESTINATION_TRIGGERS = {
+    "destination_fts_au": """
+        CREATE TRIGGER IF NOT EXISTS destination_fts_au AFTER UPDATE OF name ON destination BEGIN
+            UPDATE dealer_fts SET destination_name = new.name
+            WHERE rowid IN (SELECT id FROM dealer WHERE destination_id = new.id);
+        END""",
+    "destination_fts_ad": """
+        CREATE TRIGGER IF NOT EXISTS destination_fts_ad AFTER DELETE ON destination BEGIN
+            UPDATE dealer_fts SET destination_name = NULL
+            WHERE rowid IN (SELECT id FROM dealer WHERE destination_id = old.id);
+        END""",
+}
+
+
+def fts_available(c):
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'dealer_fts'")
+    return c.fetchone() is not None
+
+
+def create_dealer_fts(c):
+    try:
+        c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS dealer_fts USING fts5(
+            code, name, place, mobile, destination_name,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )""")
+    except sqlite3.OperationalError:
+        # SQLite without FTS5: search_dealers keeps using LIKE
+        return False
+    for sql in list(_DEALER_TRIGGERS.values()) + list(_DESTINATION_TRIGGERS.values()):
+        c.execute(sql)
+    rebuild_dealer_fts(c)
+    return True
+
+
+def rebuild_dealer_fts(c):
+    """Repopulate the whole index from dealer and destination in one statement."""
+    c.execute("DELETE FROM dealer_fts")
+    c.execute("""
+        INSERT INTO dealer_fts (rowid, code, name, place, mobile, destination_name)
+        SELECT dealer.id, dealer.code, dealer.name, dealer.place, dealer.mobile, destination.name
+        FROM dealer
+        LEFT JOIN destination ON dealer.destination_id = destination.id
+    """)
+
+
+@contextmanager
+def bulk_dealer_changes(c):
+    """Suspend the per-row dealer triggers and rebuild the index once afterwards."""
+    if not fts_available(c):
+        yield
+        return
+    for name in _DEALER_TRIGGERS:
+        c.execute(f"DROP TRIGGER IF EXISTS {name}")
+    try:
+        yield
+    finally:
+        rebuild_dealer_fts(c)
+        for sql in _DEALER_TRIGGERS.values():
+            c.execute(sql)
+
+
+def build_match_query(text):
+    """'kozhi 9447' -> '"kozhi"* AND "9447"*' (every term as a prefix)."""
+    terms = [t for t in re.split(r"[^\w]+", text) if t]
+    return " AND ".join('"' + t.replace('"', '""') + '"*' for t in terms)
+
+
+_SELECT = """
+    SELECT dealer.id, dealer.code, dealer.name, dealer.place, dealer.pincode, dealer.mobile,
+        dealer.distance, destination.name"""
+
+
+def search_dealers(c, text, limit=None):
+    """Dealers matching ``text``, best first.
+
+    Rows are the dealer list columns followed by a match snippet with the
+    matched terms in [brackets].
+    """
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    if fts_available(c):
+        weights = ", ".join(str(w) for w in RANK_WEIGHTS)
+        sql = f"""{_SELECT},
+                snippet(dealer_fts, -1, '[', ']', '…', 8)
+            FROM dealer_fts
+            JOIN dealer ON dealer.id = dealer_fts.rowid
+            LEFT JOIN destination ON dealer.destination_id = destination.id
+            WHERE dealer_fts MATCH ?
+            ORDER BY bm25(dealer_fts, {weights})"""
+        params = [match]
+    else:
+        like_query = f"%{text}%"
+        sql = f"""{_SELECT}, ''
+            FROM dealer
+            LEFT JOIN destination ON dealer.destination_id = destination.id
+            WHERE dealer.code LIKE ? OR dealer.name LIKE ? OR dealer.place LIKE ?
+                OR dealer.mobile LIKE ? OR destination.name LIKE ?"""
+        params = [like_query] * 5
+
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    c.execute(sql, params)
+    return c.fetchall()
@@ -0,0 +1,148 @@
+"""Dealer master sync: update existing dealers from a district workbook.
+
+Unlike the plain import (``INSERT OR IGNORE`` on ``dealer.code``), a sync
+compares every incoming dealer with the stored one and reports:
+
+    new        code not in the dealer table yet
+    changed    name, place, pincode, mobile, distance or destination differs,
+               or the dealer was inactive
+    unchanged  identical
+    missing    active dealer of one of the workbook's destinations whose code
+               is not in the workbook
+
+The parsed rows are loaded into the temp table ``dealer_sync``. The
+comparison and the apply (insert new, update changed, set ``active = 0`` on
+missing) are a handful of set-based statements against it. A dry run is the
+same diff followed by a rollback, so new destinations are never left behind.
+
+``dealer_sync_log`` records the content hash of every applied workbook; a
+workbook whose hash matches the last sync can be skipped.
+"""
+from contextlib import nullcontext
+
+from db.dealer_import import resolve_destinations
+from db.dealer_search import bulk_dealer_changes
+
+FIELDS = ("name", "place", "pincode", "mobile", "distance", "destination_id")
+
+# Above this many written rows the search index is rebuilt once instead of
+# being kept up to date by the per-row triggers
+BULK_ROWS = 500
+
+_CHANGED = " OR ".join(f"d.{f} IS NOT s.{f}" for f in FIELDS) + " OR d.active IS NOT 1"
+
+
+def create_dealer_sync_log(c):
+    c.execute("""CREATE TABLE IF NOT EXISTS dealer_sync_log (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_hash TEXT NOT NULL,
+        file_name TEXT,
+        synced_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        inserted INTEGER,
+        updated INTEGER,
+        deactivated INTEGER
+    )""")
+
+
+def last_sync(c):
+    """(content_hash, synced_at) of the most recent sync, or None."""
+    c.execute("SELECT content_hash, synced_at FROM dealer_sync_log ORDER BY id DESC LIMIT 1")
+    return c.fetchone()
+
+
+class DealerDiff:
+    def __init__(self, new, changed, unchanged, missing):
+        self.new = new                # [(code, name)]
+        self.changed = changed        # [(code, name, ["distance: 12.0 -> 14.5", ...])]
+        self.unchanged = unchanged    # count
+        self.missing = missing        # [(code, name)]
+
+    def summary(self):
+        return (f"{len(self.new)} new, {len(self.changed)} changed, "
+                f"{self.unchanged} unchanged, {len(self.missing)} to deactivate")
+
+
+def _stage(c, parsed):
+    """Fill the temp table ``dealer_sync``; returns the workbook's destination ids."""
+    destination_ids = resolve_destinations(c, parsed.sheets)
+    c.execute("DROP TABLE IF EXISTS temp.dealer_sync")
+    c.execute("""CREATE TEMP TABLE dealer_sync (
+        code TEXT PRIMARY KEY, name TEXT, place TEXT, pincode TEXT, mobile TEXT,
+        distance REAL, destination_id INTEGER
+    )""")
+    rows = parsed.rows
+    # A code repeated in the workbook keeps its first row, as the plain import does
+    c.executemany(
+        "INSERT OR IGNORE INTO dealer_sync VALUES (?, ?, ?, ?, ?, ?, ?)",
+        zip(rows["code"], rows["name"], rows["place"], rows["pincode"], rows["mobile"],
+            rows["distance"], rows["sheet"].map(destination_ids))
+    )
+    return sorted(set(destination_ids.values()))
+
+
+def _missing_where(destination_ids):
+    placeholders = ",".join("?" for _ in destination_ids)
+    return (f"active = 1 AND destination_id IN ({placeholders}) "
+            f"AND code NOT IN (SELECT code FROM dealer_sync)")
+
+
+def _diff(c, destination_ids):
+    c.execute("""SELECT s.code, s.name FROM dealer_sync s
+                 WHERE NOT EXISTS (SELECT 1 FROM dealer d WHERE d.code = s.code)
+                 ORDER BY s.code""")
+    new = c.fetchall()
+
+    columns = ", ".join(f"d.{f}, s.{f}" for f in FIELDS)
+    c.execute(f"""SELECT s.code, s.name, d.active, {columns}
+                  FROM dealer_sync s JOIN dealer d ON d.code = s.code
+                  WHERE {_CHANGED}
+                  ORDER BY s.code""")
+    changed = []
+    for row in c.fetchall():
+        code, name, active = row[:3]
+        details = [] if active == 1 else ["reactivated"]
+        for i, field in enumerate(FIELDS):
+            old, value = row[3 + 2 * i], row[4 + 2 * i]
+            if old != value:
+                details.append(f"{field}: {old} -> {value}")
+        changed.append((code, name, details))
+
+    c.execute("SELECT COUNT(*) FROM dealer_sync s JOIN dealer d ON d.code = s.code")
+    unchanged = c.fetchone()[0] - len(changed)
+
+    c.execute(f"SELECT code, name FROM dealer WHERE {_missing_where(destination_ids)} ORDER BY code",
+              destination_ids)
+    missing = c.fetchall()
+    return DealerDiff(new, changed, unchanged, missing)
+
+
+def _apply(c, destination_ids, rows_written):
+    columns = ", ".join(FIELDS)
+    with bulk_dealer_changes(c) if rows_written > BULK_ROWS else nullcontext():
+        c.execute(f"""INSERT INTO dealer (code, {columns}, active)
+                      SELECT code, {columns}, 1 FROM dealer_sync s
+                      WHERE NOT EXISTS (SELECT 1 FROM dealer d WHERE d.code = s.code)""")
+        c.execute(f"""UPDATE dealer AS d SET ({columns}, active) = ({", ".join(f"s.{f}" for f in FIELDS)}, 1)
+                      FROM dealer_sync s
+                      WHERE d.code = s.code AND ({_CHANGED})""")
+        c.execute(f"UPDATE dealer SET active = 0 WHERE {_missing_where(destination_ids)}", destination_ids)
+
+
+def sync_dealers(c, parsed, apply=False, file_name=None):
+    """Diff the parsed workbook (a ``DealerImport``) against the dealer table.
+
+    Returns a ``DealerDiff``. With ``apply`` the changes are written and the
+    sync is logged. The caller commits, or rolls back after a dry run (the
+    diff may have added destinations for new sheets).
+    """
+    destination_ids = _stage(c, parsed)
+    diff = _diff(c, destination_ids)
+    if apply:
+        _apply(c, destination_ids, len(diff.new) + len(diff.changed) + len(diff.missing))
+        c.execute(
+            """INSERT INTO dealer_sync_log (content_hash, file_name, inserted, updated, deactivated)
+               VALUES (?, ?, ?, ?, ?)""",
+            (parsed.content_hash, file_name, len(diff.new), len(diff.changed), len(diff.missing))
+        )
+    c.execute("DROP TABLE temp.dealer_sync")
+    return diff
@@ -0,0 +1,235 @@
+"""Import the depot's dispatch register (an Excel workbook) as destination entries.
+
+Every row of the register is one dispatch: dealer code, MDA No., date and
+bags. ``read_dispatch_register`` cleans the sheets with vectorized pandas
+operations and runs off the Tk thread like ``read_dealer_workbook``.
+``plan_dispatch_import`` matches the whole register against the dealer
+table in one query and gives every row its slab with one ``searchsorted``
+over the rate card. It also computes mt, mtk and amount as columns and
+sets rows it cannot import aside with a reason. ``save_dispatch_import``
+then writes the plan with reserved ids and one ``executemany`` per table.
+Rows are grouped into one entry per destination and date and one range
+entry per slab. The caller commits.
+"""
+import numpy as np
+import pandas as pd
+
+from db.dispatches import DATE_FORMAT, parse_date, saved_mda_numbers
+from db.entry_summary import refresh_entry_summaries
+from db.entry_writes import _reserve_ids
+from db.mda import normalize_mda
+from db.rate_card import get_rate_card
+
+# Register headings, matched case-insensitively; the first three are required
+HEADINGS = {
+    "code": ("dealer code", "code", "dealer"),
+    "date": ("date", "despatch date", "dispatch date"),
+    "bags": ("bags", "no. of bags", "no of bags", "qty"),
+    "mda": ("mda no.", "mda no", "mda number", "mda"),
+    "description": ("description", "product"),
+}
+REQUIRED = ("code", "date", "bags")
+
+BAG_MT = 0.05
+DEFAULT_DESCRIPTION = "FACTOM FOS"
+
+
+class DispatchRegister:
+    def __init__(self, rows, warnings):
+        self.rows = rows            # DataFrame: sheet, line, code, mda, date, bags, description
+        self.warnings = warnings
+
+
+class DispatchPlan:
+    def __init__(self, rows, problems, warnings):
+        self.rows = rows            # DataFrame of importable rows with dealer, slab and amounts
+        self.problems = problems    # DataFrame: sheet, line, code, bags, problem
+        self.warnings = warnings
+
+    def entry_count(self):
+        return len(self.rows.groupby(["destination_id", "date"])) if len(self.rows) else 0
+
+    def unmatched_codes(self):
+        """Per unknown dealer code: rows and bags, most bags first."""
+        unknown = self.problems[self.problems["problem"] == "Unknown dealer code"]
+        return (unknown.groupby("code")["bags"].agg(["count", "sum"])
+                .rename(columns={"count": "rows", "sum": "bags"})
+                .sort_values("bags", ascending=False))
+
+    def summary(self):
+        read = len(self.rows) + len(self.problems)
+        imported, skipped = int(self.rows["bags"].sum()), int(self.problems["bags"].sum())
+        return (f"{read} rows read ({imported + skipped} bags): {len(self.rows)} to import as "
+                f"{self.entry_count()} entries ({imported} bags), "
+                f"{len(self.problems)} not imported ({skipped} bags, "
+                f"{len(self.unmatched_codes())} unknown dealer codes)")
+
+
+def _text(column):
+    return column.astype(object).where(column.notna(), "").astype(str).str.strip()
+
+
+def _dates(column):
+    """Dates as the entry form writes them; Excel dates come back as datetimes, typed ones as text."""
+    formatted = {
+        value: value.strftime(DATE_FORMAT) if hasattr(value, "strftime") else parse_date(str(value).strip())
+        for value in column.dropna().unique()
+    }
+    dates = column.map(formatted)
+    return dates.where(dates.notna(), None)
+
+
+def _column_map(columns):
+    """Register heading per field, None where the sheet lacks it."""
+    by_heading = {str(c).strip().lower(): c for c in columns}
+    return {
+        field: next((by_heading[h] for h in headings if h in by_heading), None)
+        for field, headings in HEADINGS.items()
+    }
+
+
+def normalize_register_sheet(sheet_name, df):
+    """Clean one sheet; returns (rows DataFrame, warnings). Sheets without the headings are skipped."""
+    columns = _column_map(df.columns)
+    missing = [field for field in REQUIRED if columns[field] is None]
+    if missing:
+        if len(df):
+            return None, [f"Sheet: {sheet_name}, skipped (no {', '.join(missing)} column)"]
+        return None, []
+
+    def column(field):
+        return df[columns[field]] if columns[field] is not None else pd.Series("", index=df.index)
+
+    bags = pd.to_numeric(column("bags"), errors="coerce")
+    rows = pd.DataFrame({
+        "sheet": sheet_name,
+        "line": df.index + 2,
+        "code": _text(column("code")).str.upper(),
+        "mda": _text(column("mda")).map(normalize_mda),
+        "date": _dates(column("date")),
+        "bags": bags.where(bags.notna(), 0),
+        "valid_bags": bags.notna() & (bags > 0) & (bags == bags.round()),
+        "description": _text(column("description")).replace("", DEFAULT_DESCRIPTION),
+    })
+    # Blank and totals lines carry no code, MDA No. or date
+    return rows[(rows["code"] != "") | (rows["mda"] != "") | rows["date"].notna()], []
+
+
+def read_dispatch_register(file_path):
+    """Generator job: parse every sheet, reporting progress per sheet."""
+    with pd.ExcelFile(file_path) as workbook:
+        names = workbook.sheet_names
+        yield 0, len(names), None
+        frames, warnings = [], []
+        for done, name in enumerate(names, 1):
+            rows, sheet_warnings = normalize_register_sheet(name, workbook.parse(name, dtype=object))
+            if rows is not None:
+                frames.append(rows)
+            warnings += sheet_warnings
+            yield done, len(names), None
+    if not frames:
+        raise ValueError("No sheet has Dealer code, Date and Bags columns.")
+    yield len(names), len(names), DispatchRegister(pd.concat(frames, ignore_index=True), warnings)
+
+
+def plan_dispatch_import(c, register):
+    """Match the register to dealers and slabs; returns a ``DispatchPlan``."""
+    rows = register.rows.copy()
+
+    c.execute("SELECT id, UPPER(TRIM(code)), name, place, distance, destination_id FROM dealer WHERE code IS NOT NULL")
+    dealers = pd.DataFrame(c.fetchall(), columns=["dealer_id", "code", "name", "place", "km", "destination_id"])
+    rows = rows.merge(dealers.drop_duplicates("code"), on="code", how="left")
+
+    rate_card = get_rate_card(c)
+    slabs = pd.DataFrame(rate_card.slabs, columns=["rate_range_id", "from_km", "to_km", "rate", "is_mtk"])
+    rows["rate_range_id"] = rate_card.lookup_array(pd.to_numeric(rows["km"], errors="coerce"))
+    rows = rows.merge(slabs[["rate_range_id", "rate", "is_mtk"]], on="rate_range_id", how="left")
+
+    mdas = rows["mda"].fillna("")
+    has_mda = mdas != ""
+    saved = saved_mda_numbers(c, mdas[has_mda].tolist())
+
+    # First problem wins, in the order a clerk would fix them
+    checks = [
+        ("Unknown dealer code", rows["dealer_id"].isna()),
+        ("Dealer has no destination", rows["destination_id"].isna()),
+        ("No rate slab for the dealer's distance", rows["rate_range_id"] == -1),
+        ("Invalid bags", ~rows["valid_bags"]),
+        ("Invalid date", rows["date"].isna()),
+        ("MDA No. repeated in the register", has_mda & mdas.duplicated(keep=False)),
+        ("MDA No. already saved", has_mda & mdas.isin(saved)),
+    ]
+    conditions = [condition.to_numpy(dtype=bool) for _, condition in checks]
+    rows["problem"] = np.select(conditions, [problem for problem, _ in checks], default="")
+
+    ok = rows["problem"] == ""
+    problems = rows.loc[~ok, ["sheet", "line", "code", "bags", "problem"]].reset_index(drop=True)
+    rows = rows[ok].copy()
+
+    rows["dealer_id"] = rows["dealer_id"].astype(np.int64)
+    rows["destination_id"] = rows["destination_id"].astype(np.int64)
+    rows["bags"] = rows["bags"].astype(np.int64)
+    rows["km"] = rows["km"].astype(float)
+    rows["mt"] = rows["bags"] * BAG_MT
+    rows["mtk"] = rows["mt"] * rows["km"]
+    rows["amount"] = rows["rate"] * np.where(rows["is_mtk"].astype(bool), rows["mtk"], rows["mt"])
+    rows["despatched_to"] = rows["name"].fillna("") + ", " + rows["place"].fillna("")
+    rows["mda"] = mdas[ok].where(mdas[ok] != "", None)
+    return DispatchPlan(rows.reset_index(drop=True), problems, register.warnings)
+
+
+def _last_to_addresses(c, destination_ids):
+    """The to-address of each destination's latest entry, so imported entries print like the rest."""
+    c.execute("""
+        SELECT destination_id, to_address FROM destination_entry
+        WHERE id IN (SELECT MAX(id) FROM destination_entry GROUP BY destination_id)
+    """)
+    addresses = dict(c.fetchall())
+    return {d: addresses.get(d) or "" for d in destination_ids}
+
+
+def save_dispatch_import(c, plan):
+    """Write the plan's rows as new entries; returns the new destination_entry ids."""
+    if plan.rows.empty:
+        return []
+    # Entries get their ids in date order, as if typed day by day
+    rows = plan.rows.assign(day=pd.to_datetime(plan.rows["date"], format=DATE_FORMAT))
+    rows = rows.sort_values(["day", "destination_id", "rate_range_id", "dealer_id", "sheet", "line"], kind="stable")
+
+    entries = rows[["destination_id", "date"]].drop_duplicates().reset_index(drop=True)
+    entries["entry_id"] = _reserve_ids(c, "destination_entry", len(entries))
+    rows = rows.merge(entries, on=["destination_id", "date"])
+
+    totals = (rows.groupby(["entry_id", "rate_range_id"], sort=False)
+              .agg(rate=("rate", "first"), bags=("bags", "sum"), mt=("mt", "sum"),
+                   mtk=("mtk", "sum"), amount=("amount", "sum"))
+              .reset_index())
+    totals["range_entry_id"] = _reserve_ids(c, "range_entry", len(totals))
+    rows = rows.merge(totals[["entry_id", "rate_range_id", "range_entry_id"]], on=["entry_id", "rate_range_id"])
+    rows["dealer_entry_id"] = _reserve_ids(c, "dealer_entry", len(rows))
+
+    to_addresses = _last_to_addresses(c, entries["destination_id"].unique().tolist())
+    c.executemany("""
+        INSERT INTO destination_entry (id, destination_id, letter_note, bill_number, date, to_address)
+        VALUES (?, ?, '', '', ?, ?)
+    """, [(int(e), int(d), date, to_addresses[d])
+          for e, d, date in zip(entries["entry_id"], entries["destination_id"], entries["date"])])
+    c.executemany("""
+        INSERT INTO range_entry (
+            id, destination_entry_id, rate_range_id, rate, total_bags,
+            total_mt, total_mtk, total_amount
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, totals[["range_entry_id", "entry_id", "rate_range_id", "rate", "bags", "mt", "mtk", "amount"]]
+        .astype(object).itertuples(index=False, name=None))
+    c.executemany("""
+        INSERT INTO dealer_entry (
+            id, range_entry_id, dealer_id, despatched_to, km, no_bags, rate,
+            mt, mtk, amount, mda_number, date, description, remarks
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, '')
+    """, rows[["dealer_entry_id", "range_entry_id", "dealer_id", "despatched_to", "km", "bags", "rate",
+               "mt", "mtk", "amount", "mda", "date", "description"]]
+        .astype(object).itertuples(index=False, name=None))
+
+    entry_ids = [int(e) for e in entries["entry_id"]]
+    refresh_entry_summaries(c, entry_ids)
+    return entry_ids
@@ -0,0 +1,157 @@
+"""Dispatch rows entered in bulk: parse pasted text, resolve a whole batch at once.
+
+A dispatch is (dealer code or name, MDA No., date, bags), the columns of
+the MDA dispatch lists clerks receive as spreadsheets. ``parse_dispatch_text``
+accepts rows copied from a spreadsheet (tab-separated) or CSV.
+``resolve_dispatches`` matches every row of a batch with one dealer query
+for the destination, finds slabs on the in-memory rate card and checks MDA
+numbers against the saved rows in chunked ``IN`` queries, instead of a
+search, a slab query and an MDA query per dispatch.
+"""
+import csv
+import io
+import re
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from db.mda import normalize_mda
+from db.rate_card import get_rate_card
+
+Dispatch = namedtuple("Dispatch", "line dealer mda date bags")
+# dealer is (id, code, name, place, distance) and slab a rate card Slab, or None
+ResolvedDispatch = namedtuple("ResolvedDispatch", "line text dealer slab mda date bags error")
+
+DATE_FORMATS = ("%d-%m-%Y", "%d/%m/%Y", "%d.%m.%Y", "%Y-%m-%d")
+# As the entry form's date pickers write it
+DATE_FORMAT = "%d-%m-%Y"
+
+# The form's own dealer keys, "12 - NAME ...", can be pasted back
+_DEALER_KEY = re.compile(r"^(\d+) - ")
+
+
+def parse_dispatch_text(text):
+    """Rows of pasted TSV or CSV text; blank lines and a heading line are skipped."""
+    delimiter = "\t" if "\t" in text else ","
+    rows = []
+    for line, fields in enumerate(csv.reader(io.StringIO(text), delimiter=delimiter), 1):
+        fields = [field.strip() for field in fields]
+        if not any(fields):
+            continue
+        fields += [""] * (4 - len(fields))
+        # "Bags", "No. of bags": a heading, not a row with bad bags
+        if not rows and fields[3] and not any(ch.isdigit() for ch in fields[3]):
+            continue
+        rows.append(Dispatch(line, *fields[:4]))
+    return rows
+
+
+def parse_date(text):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).strftime(DATE_FORMAT)
+        except ValueError:
+            pass
+    return None
+
+
+def parse_bags(text):
+    try:
+        bags = float(text)
+    except ValueError:
+        return None
+    return int(bags) if bags.is_integer() and bags > 0 else None
+
+
+class DealerIndex:
+    """A destination's dealers by id, code and name (with or without the FOL suffix)."""
+
+    def __init__(self, dealers):
+        self.by_id = {}
+        self.by_code = {}
+        self.by_name = defaultdict(list)
+        for dealer in dealers:
+            dealer_id, code, name = dealer[:3]
+            self.by_id[dealer_id] = dealer
+            if code:
+                self.by_code[code.strip().upper()] = dealer
+            if name:
+                name = name.strip().upper()
+                self.by_name[name].append(dealer)
+                if name.endswith(" FOL"):
+                    self.by_name[name[:-4].strip()].append(dealer)
+
+    @classmethod
+    def load(cls, c, destination_id):
+        c.execute("SELECT id, code, name, place, distance FROM dealer WHERE destination_id = ?",
+                  (destination_id,))
+        return cls(c.fetchall())
+
+    def find(self, text):
+        """``(dealer, error)`` for a pasted code, name or form key."""
+        key = text.strip().upper()
+        if not key:
+            return None, "No dealer"
+        match = _DEALER_KEY.match(key)
+        if match and int(match.group(1)) in self.by_id:
+            return self.by_id[int(match.group(1))], None
+        if key in self.by_code:
+            return self.by_code[key], None
+        found = self.by_name.get(key, [])
+        if len(found) == 1:
+            return found[0], None
+        if found:
+            return None, f"{len(found)} dealers named {text.strip()}; use the code"
+        return None, f"Unknown dealer {text.strip()}"
+
+
+def saved_mda_numbers(c, numbers, exclude_ids=()):
+    """The ``numbers`` already on saved dealer rows other than ``exclude_ids``."""
+    numbers = sorted(set(numbers))
+    exclude_ids = [int(i) for i in exclude_ids]
+    exclude = f" AND id NOT IN ({','.join('?' for _ in exclude_ids)})" if exclude_ids else ""
+    used = set()
+    # Chunk to stay below SQLite's bound-parameter limit
+    for start in range(0, len(numbers), 500):
+        chunk = numbers[start:start + 500]
+        c.execute(f"""
+            SELECT mda_number FROM dealer_entry
+            WHERE mda_number IN ({','.join('?' for _ in chunk)}){exclude}
+        """, chunk + exclude_ids)
+        used.update(r[0] for r in c.fetchall())
+    return used
+
+
+def resolve_dispatches(c, destination_id, dispatches, exclude_entry_ids=(), form_mda_numbers=()):
+    """Resolve a batch of ``Dispatch`` rows; every row gets an ``error`` or None.
+
+    ``exclude_entry_ids`` are the saved dealer rows of the entry being edited
+    and ``form_mda_numbers`` the numbers already typed into the form.
+    """
+    dealers = DealerIndex.load(c, destination_id)
+    rate_card = get_rate_card(c)
+    mdas = [normalize_mda(d.mda) for d in dispatches]
+    in_use = saved_mda_numbers(c, [m for m in mdas if m], exclude_entry_ids)
+    in_form = set(form_mda_numbers)
+    counts = defaultdict(int)
+    for mda in mdas:
+        counts[mda] += 1
+
+    resolved = []
+    for dispatch, mda in zip(dispatches, mdas):
+        dealer, error = dealers.find(dispatch.dealer)
+        slab = rate_card.lookup(dealer[4]) if dealer else None
+        date = parse_date(dispatch.date)
+        bags = parse_bags(dispatch.bags)
+        if error is None and slab is None:
+            error = f"No rate slab for {dealer[4]} km"
+        elif error is None and bags is None:
+            error = f"Invalid bags {dispatch.bags!r}"
+        elif error is None and date is None:
+            error = f"Invalid date {dispatch.date!r}"
+        elif error is None and mda and counts[mda] > 1:
+            error = f"MDA No. {mda} is repeated in the paste"
+        elif error is None and mda and (mda in in_form or mda in in_use):
+            error = f"MDA No. {mda} is already used"
+        resolved.append(ResolvedDispatch(dispatch.line, dispatch.dealer, dealer, slab, mda or "",
+                                         date, bags, error))
+    return resolved
@@ -0,0 +1,71 @@
+"""Load a saved destination entry in the shape the entry form edits.
+
+The counterpart of ``db.entry_writes``: one joined query returns the
+header, the slabs and every dealer row with its dealer's master name and
+distance, so the form can build its combobox keys without searching its
+maps row by row. Slabs and rows come in the order they were saved (by id),
+the order the form has always shown them in. The destination's dealers
+are read once with ``load_destination_dealers`` and split per slab in
+memory by ``slab_dealers``.
+"""
+from collections import namedtuple
+
+EntryHeader = namedtuple("EntryHeader", "destination_id letter_note bill_number date to_address")
+EntrySlab = namedtuple("EntrySlab", "range_entry_id rate_range_id rate from_km to_km dealer_rows")
+EntryDealerRow = namedtuple(
+    "EntryDealerRow",
+    "dealer_entry_id dealer_id despatched_to km no_bags rate mt mtk amount mda_number date "
+    "description remarks dealer_name dealer_distance"
+)
+
+
+def dealer_key(dealer_id, name, distance):
+    """The form's combobox text for a dealer, as in ``dealer_map``."""
+    return f"{dealer_id} - {name} ({distance}km)"
+
+
+def load_destination_dealers(c, destination_id):
+    """Every dealer of the destination as (id, name, place, distance, code)."""
+    c.execute("SELECT id, name, place, distance, code FROM dealer WHERE destination_id = ?", (destination_id,))
+    return c.fetchall()
+
+
+def slab_dealers(dealers, from_km, to_km):
+    """The dealers ``distance BETWEEN from_km AND to_km`` would pick (numeric distances only)."""
+    return [
+        dealer for dealer in dealers
+        if isinstance(dealer[3], (int, float)) and from_km <= dealer[3] <= to_km
+    ]
+
+
+def load_entry_form(c, destination_entry_id):
+    """``(EntryHeader, [EntrySlab])`` for the entry, or None if it does not exist."""
+    c.execute("""
+        SELECT de.destination_id, de.letter_note, de.bill_number, de.date, de.to_address,
+               re.id, re.rate_range_id, re.rate, rr.from_km, rr.to_km,
+               dr.id, dr.dealer_id, dr.despatched_to, dr.km, dr.no_bags, dr.rate, dr.mt, dr.mtk,
+               dr.amount, dr.mda_number, dr.date, dr.description, dr.remarks,
+               d.name, d.distance
+        FROM destination_entry de
+        LEFT JOIN range_entry re ON re.destination_entry_id = de.id
+        LEFT JOIN rate_range rr ON rr.id = re.rate_range_id
+        LEFT JOIN dealer_entry dr ON dr.range_entry_id = re.id
+        LEFT JOIN dealer d ON d.id = dr.dealer_id
+        WHERE de.id = ?
+        ORDER BY re.id, dr.id
+    """, (destination_entry_id,))
+    rows = c.fetchall()
+    if not rows:
+        return None
+
+    header = EntryHeader(*rows[0][:5])
+    slabs = []
+    for row in rows:
+        range_entry_id = row[5]
+        if range_entry_id is None:
+            continue
+        if not slabs or slabs[-1].range_entry_id != range_entry_id:
+            slabs.append(EntrySlab(*row[5:10], []))
+        if row[10] is not None:
+            slabs[-1].dealer_rows.append(EntryDealerRow(*row[10:]))
+    return header, slabs
@@ -0,0 +1,105 @@
+"""Per-entry summary rows behind the destination entry grids.
+
+``destination_entry_summary`` holds one row per destination entry with its
+destination, slab label, totals, dealer count and billed state, so the
+Create Main Bills and View Destination Entries grids read a single table.
+Every write to an entry refreshes just that entry's row.
+"""
+from db.bill_totals import RANGE_LABEL_SQL
+
+
+def _in_clause(ids):
+    return ",".join("?" for _ in ids)
+
+
+def create_summary_table(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS destination_entry_summary (
+        destination_entry_id INTEGER PRIMARY KEY,
+        destination_id INTEGER,
+        destination_name TEXT,
+        is_garage BOOLEAN DEFAULT 0,
+        date TEXT,
+        bill_number TEXT,
+        ranges_label TEXT,
+        dealer_count INTEGER DEFAULT 0,
+        total_bags INTEGER DEFAULT 0,
+        total_mt REAL DEFAULT 0,
+        total_mtk REAL DEFAULT 0,
+        total_amount REAL DEFAULT 0,
+        main_bill_id INTEGER,
+        is_billed BOOLEAN DEFAULT 0,
+        FOREIGN KEY (destination_entry_id) REFERENCES destination_entry(id)
+    )''')
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_entry_summary_unbilled
+                 ON destination_entry_summary(is_billed, is_garage, date)""")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_entry_summary_destination_date
+                 ON destination_entry_summary(destination_id, date)""")
+
+
+def refresh_entry_summaries(c, destination_entry_ids=None):
+    """Rebuild summary rows for the given entries (every entry when None)."""
+    if destination_entry_ids is None:
+        c.execute("SELECT id FROM destination_entry")
+        destination_entry_ids = [r[0] for r in c.fetchall()]
+    ids = sorted({int(i) for i in destination_entry_ids if i not in (None, "")})
+
+    for start in range(0, len(ids), 500):
+        chunk = ids[start:start + 500]
+        # Rows for entries that no longer exist are dropped by the DELETE
+        c.execute(f"DELETE FROM destination_entry_summary WHERE destination_entry_id IN ({_in_clause(chunk)})", chunk)
+        c.execute(f"""
+            INSERT INTO destination_entry_summary (
+                destination_entry_id, destination_id, destination_name, is_garage,
+                date, bill_number, ranges_label, dealer_count,
+                total_bags, total_mt, total_mtk, total_amount,
+                main_bill_id, is_billed
+            )
+            SELECT
+                de.id, de.destination_id, d.name, IFNULL(d.is_garage, 0),
+                de.date, de.bill_number,
+                (
+                    SELECT GROUP_CONCAT(r, ', ')
+                    FROM (
+                        SELECT DISTINCT {RANGE_LABEL_SQL} AS r
+                        FROM rate_range rr
+                        JOIN range_entry re2 ON re2.rate_range_id = rr.id
+                        WHERE re2.destination_entry_id = de.id
+                        ORDER BY rr.from_km
+                    )
+                ),
+                IFNULL(agg.dealer_count, 0), IFNULL(agg.total_bags, 0), IFNULL(agg.total_mt, 0),
+                IFNULL(agg.total_mtk, 0), IFNULL(agg.total_amount, 0),
+                NULLIF(de.main_bill_id, ''),
+                CASE WHEN de.main_bill_id IS NULL OR de.main_bill_id = '' THEN 0 ELSE 1 END
+            FROM destination_entry de
+            LEFT JOIN destination d ON d.id = de.destination_id
+            LEFT JOIN (
+                SELECT re.destination_entry_id,
+                       COUNT(dr.id) AS dealer_count, SUM(dr.no_bags) AS total_bags,
+                       SUM(dr.mt) AS total_mt, SUM(dr.mtk) AS total_mtk, SUM(dr.amount) AS total_amount
+                FROM range_entry re
+                JOIN dealer_entry dr ON dr.range_entry_id = re.id
+                WHERE re.destination_entry_id IN ({_in_clause(chunk)})
+                GROUP BY re.destination_entry_id
+            ) agg ON agg.destination_entry_id = de.id
+            WHERE de.id IN ({_in_clause(chunk)})
+        """, chunk + chunk)
+    return len(ids)
+
+
+def entry_ids_for_rate_range(c, rate_range_id):
+    """Entries with a slab on the rate range, whose stored label follows the slab's km."""
+    c.execute("SELECT DISTINCT destination_entry_id FROM range_entry WHERE rate_range_id = ?", (rate_range_id,))
+    return [r[0] for r in c.fetchall()]
+
+
+def delete_entry_summaries(c, destination_entry_ids):
+    ids = [int(i) for i in destination_entry_ids]
+    if ids:
+        c.execute(f"DELETE FROM destination_entry_summary WHERE destination_entry_id IN ({_in_clause(ids)})", ids)
+
+
+def refresh_destination_summaries(c, destination_id):
+    """Re-sync name and garage flag after a destination is edited or deleted."""
+    c.execute("SELECT id FROM destination_entry WHERE destination_id = ?", (destination_id,))
+    return refresh_entry_summaries(c, [r[0] for r in c.fetchall()])
@@ -0,0 +1,198 @@
+"""Batched writes for destination entries and main bills.
+
+The pages describe the entry as it stands in the form; these functions
+work out the change set against the ids the page already holds and apply
+it with a few ``executemany`` and ``IN (...)`` statements, whatever the
+number of slabs and dealer rows. Callers run them inside one transaction
+and commit once.
+
+New rows get their ids reserved up front (the tables are AUTOINCREMENT),
+so the ids of every slab and row can be returned without a ``lastrowid``
+per row. Saved slabs and rows are known by the ids the page keeps on
+them, not by their position in the form, so removing a slab or a row
+leaves the others pointing at their own records.
+"""
+from db.mda import normalize_mda
+
+
+def _in_clause(ids):
+    return ",".join("?" for _ in ids)
+
+
+def _reserve_ids(c, table, count):
+    """``count`` fresh ids for ``table``, past any id AUTOINCREMENT has handed out."""
+    if not count:
+        return []
+    c.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table,))
+    row = c.fetchone()
+    c.execute(f"SELECT MAX(id) FROM {table}")
+    first = max(row[0] if row else 0, c.fetchone()[0] or 0) + 1
+    return list(range(first, first + count))
+
+
+def slab_totals(dealer_rows):
+    return (
+        sum(row.get('bags', 0) for row in dealer_rows),
+        sum(row.get('mt', 0.0) for row in dealer_rows),
+        sum(row.get('mtk', 0.0) for row in dealer_rows),
+        sum(row.get('amount', 0.0) for row in dealer_rows),
+    )
+
+
+def _dealer_values(row, rate):
+    return (
+        row['dealer_id'], row['despatched_to'], row['km'], row['bags'], rate,
+        row['mt'], row['mtk'], row['amount'], normalize_mda(row['mda_number']), row['date'],
+        row.get('description', 'FACTOM FOS'), row.get('remarks', '')
+    )
+
+
+def write_destination_entry(c, destination_entry_id, header, slabs):
+    """Insert (``destination_entry_id`` None) or update a destination entry.
+
+    ``header`` holds destination_id, letter_note, bill_number, date and
+    to_address. ``slabs`` is the form's slabs in order as
+    ``(range_entry_id, rate_range_id, rate, dealer_rows)``, range_entry_id
+    None for a slab not saved yet. A dealer row saved before carries its
+    ``dealer_entry_id``; rows without a calculated dealer are skipped, and
+    saved rows of the slabs that are no longer in the form are deleted.
+
+    Returns ``(destination_entry_id, range_entry_ids, dealer_entry_ids)``:
+    each slab's id and, per slab, each row's id (None for skipped rows), in
+    form order. The page stores them once the transaction commits.
+    """
+    if destination_entry_id is None:
+        c.execute("""
+            INSERT INTO destination_entry (destination_id, letter_note, bill_number, date, to_address)
+            VALUES (?, ?, ?, ?, ?)
+        """, (header['destination_id'], header['letter_note'], header['bill_number'],
+              header['date'], header['to_address']))
+        destination_entry_id = c.lastrowid
+    else:
+        c.execute("""
+            UPDATE destination_entry
+            SET date=?, to_address=?, bill_number=?, letter_note=?
+            WHERE id=?
+        """, (header['date'], header['to_address'], header['bill_number'], header['letter_note'],
+              destination_entry_id))
+
+    # Range entries: update the saved ones, insert the rest under reserved ids
+    reserved = iter(_reserve_ids(c, "range_entry", sum(1 for slab in slabs if slab[0] is None)))
+    range_entry_ids, range_inserts, range_updates = [], [], []
+    for range_entry_id, rate_range_id, rate, dealer_rows in slabs:
+        totals = slab_totals(dealer_rows)
+        if range_entry_id is None:
+            range_entry_id = next(reserved)
+            range_inserts.append((range_entry_id, destination_entry_id, rate_range_id, rate) + totals)
+        else:
+            range_updates.append((rate,) + totals + (range_entry_id,))
+        range_entry_ids.append(range_entry_id)
+
+    # Dealer entries: same split, by the id each row carries
+    new_rows = sum(
+        1 for _, _, _, dealer_rows in slabs for row in dealer_rows
+        if 'dealer_id' in row and 'bags' in row and not row.get('dealer_entry_id')
+    )
+    reserved = iter(_reserve_ids(c, "dealer_entry", new_rows))
+    dealer_entry_ids, dealer_inserts, dealer_updates = [], [], []
+    for range_entry_id, (_, _, rate, dealer_rows) in zip(range_entry_ids, slabs):
+        row_ids = []
+        for row in dealer_rows:
+            if 'dealer_id' not in row or 'bags' not in row:
+                row_ids.append(None)
+                continue
+            values = _dealer_values(row, rate)
+            dealer_entry_id = row.get('dealer_entry_id')
+            if dealer_entry_id:
+                dealer_updates.append(values + (dealer_entry_id,))
+            else:
+                dealer_entry_id = next(reserved)
+                dealer_inserts.append((dealer_entry_id, range_entry_id) + values)
+            row_ids.append(dealer_entry_id)
+        dealer_entry_ids.append(row_ids)
+
+    # Stale rows go first and the kept rows drop their MDA numbers, so numbers
+    # moved or swapped between rows do not trip the unique index mid-update
+    kept_ranges = [values[-1] for values in range_updates]
+    kept_rows = [values[-1] for values in dealer_updates]
+    if kept_ranges:
+        c.execute(f"""
+            DELETE FROM dealer_entry
+            WHERE range_entry_id IN ({_in_clause(kept_ranges)}) AND id NOT IN ({_in_clause(kept_rows)})
+        """, kept_ranges + kept_rows)
+    if kept_rows:
+        c.execute(f"UPDATE dealer_entry SET mda_number = NULL WHERE id IN ({_in_clause(kept_rows)})", kept_rows)
+
+    c.executemany("""
+        UPDATE range_entry
+        SET rate=?, total_bags=?, total_mt=?, total_mtk=?, total_amount=?
+        WHERE id=?
+    """, range_updates)
+    c.executemany("""
+        INSERT INTO range_entry (
+            id, destination_entry_id, rate_range_id, rate, total_bags,
+            total_mt, total_mtk, total_amount
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, range_inserts)
+    c.executemany("""
+        UPDATE dealer_entry
+        SET dealer_id=?, despatched_to=?, km=?, no_bags=?, rate=?,
+            mt=?, mtk=?, amount=?, mda_number=?, date=?,
+            description=?, remarks=?
+        WHERE id=?
+    """, dealer_updates)
+    c.executemany("""
+        INSERT INTO dealer_entry (
+            id, range_entry_id, dealer_id, despatched_to, km, no_bags, rate,
+            mt, mtk, amount, mda_number, date, description, remarks
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, dealer_inserts)
+
+    return destination_entry_id, range_entry_ids, dealer_entry_ids
+
+
+MAIN_BILL_FIELDS = ("letter_note", "to_address", "date_of_clearing", "fact_gst_number",
+                    "product", "hsn_sac_code", "year")
+
+
+def write_main_bill(c, main_bill_id, main_bill_data, destination_entry_ids):
+    """Insert (``main_bill_id`` None) or update a main bill and link exactly ``destination_entry_ids``.
+
+    Only links that changed are written. Returns ``(main_bill_id,
+    previous_entry_ids)``, the entries linked before the save, for the
+    summary refresh.
+    """
+    values = [main_bill_data[f] for f in MAIN_BILL_FIELDS]
+    if main_bill_id is None:
+        c.execute(f"""
+            INSERT INTO main_bill (bill_number, {", ".join(MAIN_BILL_FIELDS)})
+            VALUES (?, {_in_clause(MAIN_BILL_FIELDS)})
+        """, [main_bill_data["bill_number"]] + values)
+        main_bill_id = c.lastrowid
+    else:
+        c.execute(f"""
+            UPDATE main_bill SET {", ".join(f"{f} = ?" for f in MAIN_BILL_FIELDS)}
+            WHERE id = ?
+        """, values + [main_bill_id])
+
+    entry_ids = list(dict.fromkeys(int(i) for i in destination_entry_ids))
+    c.execute("SELECT id FROM destination_entry WHERE main_bill_id = ?", (main_bill_id,))
+    previous_entry_ids = [r[0] for r in c.fetchall()]
+    c.execute("SELECT destination_entry_id FROM main_bill_entries WHERE main_bill_id = ?", (main_bill_id,))
+    linked = {r[0] for r in c.fetchall()}
+
+    c.execute(f"""
+        DELETE FROM main_bill_entries
+        WHERE main_bill_id = ? AND destination_entry_id NOT IN ({_in_clause(entry_ids)})
+    """, [main_bill_id] + entry_ids)
+    c.execute(f"""
+        UPDATE destination_entry SET main_bill_id = NULL
+        WHERE main_bill_id = ? AND id NOT IN ({_in_clause(entry_ids)})
+    """, [main_bill_id] + entry_ids)
+    c.executemany(
+        "INSERT INTO main_bill_entries (main_bill_id, destination_entry_id) VALUES (?, ?)",
+        [(main_bill_id, de_id) for de_id in entry_ids if de_id not in linked]
+    )
+    c.execute(f"UPDATE destination_entry SET main_bill_id = ? WHERE id IN ({_in_clause(entry_ids)})",
+              [main_bill_id] + entry_ids)
+    return main_bill_id, previous_entry_ids
@@ -0,0 +1,133 @@
+"""MDA number allocation backed by the ``sequence`` table.
+
+``peek_mda_number`` only suggests the next number for the form; numbers are
+consumed with ``allocate_mda_numbers`` (one or a block) or ``claim_mda_number``
+when the clerk types their own. A partial unique index on
+``dealer_entry.mda_number`` rejects duplicates at save time. Databases with
+legacy duplicates get it from ``check_unique_mda_index`` at startup, once
+the duplicates it reports have been fixed.
+"""
+import re
+
+MDA_SEQUENCE = "mda"
+
+_INTEGRAL = re.compile(r"^\d+(\.0*)?$")
+
+
+def normalize_mda(value):
+    """'  0123 ' / '123.0' / 123 -> '123'; anything non-numeric is only trimmed."""
+    if value is None:
+        return None
+    text = str(value).strip()
+    if _INTEGRAL.match(text):
+        return str(int(float(text)))
+    return text
+
+
+def create_mda_sequence(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS sequence (
+        name TEXT PRIMARY KEY,
+        next_value INTEGER NOT NULL
+    )''')
+
+    # One-time backfill: store every numeric MDA number in canonical integer form
+    c.execute("SELECT id, mda_number FROM dealer_entry WHERE mda_number IS NOT NULL")
+    updates = []
+    for entry_id, mda in c.fetchall():
+        normalized = normalize_mda(mda)
+        if normalized != mda:
+            updates.append((normalized, entry_id))
+    c.executemany("UPDATE dealer_entry SET mda_number = ? WHERE id = ?", updates)
+
+    c.execute("""
+        SELECT MAX(CAST(mda_number AS INTEGER)) FROM dealer_entry
+        WHERE mda_number != '' AND mda_number NOT GLOB '*[^0-9]*'
+    """)
+    highest = c.fetchone()[0] or 0
+    c.execute("INSERT OR IGNORE INTO sequence (name, next_value) VALUES (?, ?)", (MDA_SEQUENCE, highest + 1))
+
+    if duplicate_mda_numbers(c):
+        # Legacy duplicates must be fixed by hand; keep lookups fast meanwhile
+        c.execute("CREATE INDEX IF NOT EXISTS idx_dealer_entry_mda ON dealer_entry(mda_number)")
+    else:
+        ensure_unique_mda_index(c)
+
+
+def ensure_unique_mda_index(c):
+    c.execute("DROP INDEX IF EXISTS idx_dealer_entry_mda")
+    c.execute("""CREATE UNIQUE INDEX IF NOT EXISTS idx_dealer_entry_mda_unique
+                 ON dealer_entry(mda_number)
+                 WHERE mda_number IS NOT NULL AND mda_number != ''""")
+
+
+def duplicate_mda_numbers(c):
+    """(mda_number, rows, destination entry ids) for every MDA number on more than one row."""
+    c.execute("""
+        SELECT dr.mda_number, COUNT(*), GROUP_CONCAT(DISTINCT re.destination_entry_id)
+        FROM dealer_entry dr
+        LEFT JOIN range_entry re ON re.id = dr.range_entry_id
+        WHERE dr.mda_number IS NOT NULL AND dr.mda_number != ''
+        GROUP BY dr.mda_number HAVING COUNT(*) > 1
+    """)
+    return c.fetchall()
+
+
+def check_unique_mda_index(c):
+    """Create the unique MDA index if it is missing and nothing blocks it.
+
+    Returns the duplicates still blocking it, as ``duplicate_mda_numbers``.
+    """
+    c.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_dealer_entry_mda_unique'")
+    if c.fetchone():
+        return []
+    duplicates = duplicate_mda_numbers(c)
+    if not duplicates:
+        ensure_unique_mda_index(c)
+    return duplicates
+
+
+def mda_in_use(c, mda_number, exclude_ids=()):
+    """True when a saved dealer row other than ``exclude_ids`` already has this MDA."""
+    exclude_ids = [int(i) for i in exclude_ids]
+    sql = "SELECT 1 FROM dealer_entry WHERE mda_number = ?"
+    if exclude_ids:
+        sql += f" AND id NOT IN ({','.join('?' for _ in exclude_ids)})"
+    c.execute(sql + " LIMIT 1", [normalize_mda(mda_number)] + exclude_ids)
+    return c.fetchone() is not None
+
+
+def peek_mda_number(c):
+    c.execute("SELECT next_value FROM sequence WHERE name = ?", (MDA_SEQUENCE,))
+    row = c.fetchone()
+    return row[0] if row else 1
+
+
+def _commit_if_owned(conn, owned):
+    if owned:
+        conn.commit()
+
+
+def allocate_mda_numbers(conn, count=1):
+    """Atomically reserve ``count`` consecutive MDA numbers and return them as a range."""
+    if count < 1:
+        raise ValueError("count must be at least 1")
+    owned = not conn.in_transaction
+    c = conn.cursor()
+    # The UPDATE takes the write lock, so the following read cannot race another writer
+    c.execute("UPDATE sequence SET next_value = next_value + ? WHERE name = ?", (count, MDA_SEQUENCE))
+    if c.rowcount == 0:
+        c.execute("INSERT INTO sequence (name, next_value) VALUES (?, ?)", (MDA_SEQUENCE, count + 1))
+    c.execute("SELECT next_value FROM sequence WHERE name = ?", (MDA_SEQUENCE,))
+    end = c.fetchone()[0]
+    _commit_if_owned(conn, owned)
+    return range(end - count, end)
+
+
+def claim_mda_number(conn, number):
+    """Record a hand-typed MDA number so the sequence never hands it out again."""
+    owned = not conn.in_transaction
+    c = conn.cursor()
+    c.execute("UPDATE sequence SET next_value = MAX(next_value, ?) WHERE name = ?", (int(number) + 1, MDA_SEQUENCE))
+    if c.rowcount == 0:
+        c.execute("INSERT INTO sequence (name, next_value) VALUES (?, ?)", (MDA_SEQUENCE, int(number) + 1))
+    _commit_if_owned(conn, owned)
@@ -0,0 +1,232 @@
+"""Versioned schema migrations for the billing database.
+
+The schema version lives in ``PRAGMA user_version``. Each migration runs once,
+inside its own transaction, and bumps the version when it commits.
+"""
+from db.bill_totals import refresh_bill_totals
+from db.entry_summary import create_summary_table, refresh_entry_summaries
+from db.mda import create_mda_sequence
+from db.dealer_search import create_dealer_fts
+from db.bill_list import create_bill_list_indexes
+from db.dealer_sync import create_dealer_sync_log
+
+
+def _column_exists(c, table, column):
+    c.execute(f"PRAGMA table_info({table})")
+    return any(row[1] == column for row in c.fetchall())
+
+
+# ---------- 1: baseline tables ----------
+def _create_tables(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS destination (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        place TEXT,
+        description TEXT,
+        is_garage BOOLEAN DEFAULT 0
+    )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS dealer (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        code TEXT UNIQUE,
+        name TEXT,
+        place TEXT,
+        pincode TEXT,
+        mobile TEXT,
+        distance REAL,
+        destination_id INTEGER,
+        active BOOLEAN DEFAULT 1,
+        FOREIGN KEY (destination_id) REFERENCES destination(id)
+    )''')
+
+    # Databases created before the active flag existed
+    if not _column_exists(c, "dealer", "active"):
+        c.execute("ALTER TABLE dealer ADD COLUMN active BOOLEAN DEFAULT 1")
+
+    c.execute('''CREATE TABLE IF NOT EXISTS rate_range (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        from_km REAL,
+        to_km REAL,
+        rate REAL,
+        is_mtk BOOLEAN DEFAULT 1
+    )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS destination_entry (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        destination_id INTEGER,
+        letter_note TEXT,
+        bill_number TEXT,
+        date TEXT,
+        to_address TEXT,
+        main_bill_id INTEGER DEFAULT NULL,
+        FOREIGN KEY (destination_id) REFERENCES destination(id),
+        FOREIGN KEY (main_bill_id) REFERENCES main_bill(id)
+    )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS range_entry (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        destination_entry_id INTEGER,
+        rate_range_id INTEGER,
+        rate REAL,
+        total_bags INTEGER,
+        total_mt REAL,
+        total_mtk REAL,
+        total_amount REAL,
+        FOREIGN KEY (destination_entry_id) REFERENCES destination_entry(id),
+        FOREIGN KEY (rate_range_id) REFERENCES rate_range(id)
+    )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS dealer_entry (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        range_entry_id INTEGER,
+        dealer_id INTEGER,
+        despatched_to TEXT,
+        km REAL,
+        no_bags INTEGER,
+        rate REAL,
+        mt REAL,
+        mtk REAL,
+        amount REAL,
+        mda_number TEXT,
+        date TEXT,
+        description TEXT DEFAULT 'FACTOM FOS',
+        remarks TEXT,
+        FOREIGN KEY (range_entry_id) REFERENCES range_entry(id),
+        FOREIGN KEY (dealer_id) REFERENCES dealer(id)
+    )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS main_bill (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        bill_number TEXT UNIQUE,
+        letter_note TEXT,
+        to_address TEXT,
+        date_of_clearing TEXT,
+        fact_gst_number TEXT,
+        product TEXT DEFAULT 'FACTOMFOS',
+        hsn_sac_code TEXT,
+        year TEXT,
+        is_garage BOOLEAN DEFAULT 0
+    )''')
+
+    c.execute('''CREATE TABLE IF NOT EXISTS main_bill_entries (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        main_bill_id INTEGER,
+        destination_entry_id INTEGER,
+        FOREIGN KEY (main_bill_id) REFERENCES main_bill(id),
+        FOREIGN KEY (destination_entry_id) REFERENCES destination_entry(id)
+    )''')
+
+
+# ---------- 2: foreign key indexes ----------
+def _create_entry_fk_indexes(c):
+    # The FK column alone: rows sharing a key stay in rowid order, the order
+    # readers without an ORDER BY have always returned them in
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_range_entry_destination_entry
+                 ON range_entry(destination_entry_id)""")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_dealer_entry_range_entry
+                 ON dealer_entry(range_entry_id)""")
+
+
+def _create_fk_indexes(c):
+    _create_entry_fk_indexes(c)
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_dealer_destination_distance
+                 ON dealer(destination_id, distance)""")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_main_bill_entries_main_bill
+                 ON main_bill_entries(main_bill_id, destination_entry_id)""")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_main_bill_entries_destination_entry
+                 ON main_bill_entries(destination_entry_id)""")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_destination_entry_main_bill
+                 ON destination_entry(main_bill_id)""")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_destination_entry_destination_date
+                 ON destination_entry(destination_id, date)""")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_main_bill_date_of_clearing
+                 ON main_bill(date_of_clearing)""")
+    c.execute("ANALYZE")
+
+
+# ---------- 3: stored bill totals ----------
+def _add_bill_totals(c):
+    for column, decl in (("total_bags", "INTEGER DEFAULT 0"),
+                         ("total_mt", "REAL DEFAULT 0"),
+                         ("total_mtk", "REAL DEFAULT 0"),
+                         ("total_amount", "REAL DEFAULT 0"),
+                         ("ranges_label", "TEXT")):
+        if not _column_exists(c, "main_bill", column):
+            c.execute(f"ALTER TABLE main_bill ADD COLUMN {column} {decl}")
+    refresh_bill_totals(c)
+
+
+# ---------- 4: per-entry summary table ----------
+def _add_entry_summary(c):
+    create_summary_table(c)
+    refresh_entry_summaries(c)
+
+
+# ---------- 5: MDA number sequence ----------
+def _add_mda_sequence(c):
+    create_mda_sequence(c)
+
+
+# ---------- 6: dealer full-text index ----------
+def _add_dealer_fts(c):
+    create_dealer_fts(c)
+
+
+# ---------- 7: keyset and prefix indexes for the bill list ----------
+def _add_bill_list_indexes(c):
+    create_bill_list_indexes(c)
+    c.execute("ANALYZE main_bill")
+
+
+# ---------- 8: dealer sync log ----------
+def _add_dealer_sync_log(c):
+    create_dealer_sync_log(c)
+
+
+# ---------- 9: FK-only entry indexes ----------
+def _narrow_entry_fk_indexes(c):
+    # Step 2 once built these with trailing columns, which reordered rows of
+    # the same slab or entry by dealer and amount
+    c.execute("DROP INDEX IF EXISTS idx_range_entry_destination_entry")
+    c.execute("DROP INDEX IF EXISTS idx_dealer_entry_range_entry")
+    _create_entry_fk_indexes(c)
+    c.execute("ANALYZE range_entry")
+    c.execute("ANALYZE dealer_entry")
+
+
+# Ordered (version, step) pairs. Append new migrations; never renumber.
+MIGRATIONS = [
+    (1, _create_tables),
+    (2, _create_fk_indexes),
+    (3, _add_bill_totals),
+    (4, _add_entry_summary),
+    (5, _add_mda_sequence),
+    (6, _add_dealer_fts),
+    (7, _add_bill_list_indexes),
+    (8, _add_dealer_sync_log),
+    (9, _narrow_entry_fk_indexes),
+]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply every migration newer than the database's schema version."""
+    conn.commit()
+    version = get_schema_version(conn)
+    c = conn.cursor()
+    for target, step in MIGRATIONS:
+        if target <= version:
+            continue
+        try:
+            c.execute("BEGIN")
+            step(c)
+            c.execute(f"PRAGMA user_version = {int(target)}")
+            c.execute("COMMIT")
+        except Exception:
+            c.execute("ROLLBACK")
+            raise
+        version = target
+    return version
@@ -0,0 +1,128 @@
+"""In-memory rate card built from ``rate_range``.
+
+Slabs are kept sorted by ``from_km`` so a distance resolves to its slab with
+a binary search instead of a ``BETWEEN`` query per dealer. The card is cached
+per process; anything that writes ``rate_range`` must call ``invalidate()``.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+
+import numpy as np
+
+Slab = namedtuple("Slab", "id from_km to_km rate is_mtk")
+
+# Distances are recorded to one decimal, so 0-10 followed by 10.1-25 is contiguous
+DISTANCE_STEP = 0.1
+_EPS = 1e-9
+
+
+class RateCard:
+    def __init__(self, rows):
+        self.by_id = {row[0]: Slab(*row) for row in rows}
+        self.slabs = sorted(self.by_id.values(), key=lambda s: (s.from_km, s.to_km, s.id))
+        self._starts = [s.from_km for s in self.slabs]
+        # Running max of to_km lets a lookup stop walking left as soon as
+        # no earlier slab can still reach the distance
+        self._reach = []
+        reach = float("-inf")
+        for s in self.slabs:
+            reach = max(reach, s.to_km)
+            self._reach.append(reach)
+
+    @classmethod
+    def load(cls, c):
+        c.execute("SELECT id, from_km, to_km, rate, is_mtk FROM rate_range ORDER BY id")
+        return cls(c.fetchall())
+
+    def get(self, rate_range_id):
+        return self.by_id.get(int(rate_range_id))
+
+    def lookup(self, distance):
+        """Slab whose [from_km, to_km] contains ``distance``, or None."""
+        if distance is None:
+            return None
+        i = bisect_right(self._starts, distance) - 1
+        match = None
+        while i >= 0 and self._reach[i] >= distance:
+            slab = self.slabs[i]
+            # On overlapping slabs keep the oldest, as the old BETWEEN query did
+            if slab.to_km >= distance and (match is None or slab.id < match.id):
+                match = slab
+            i -= 1
+        return match
+
+    def lookup_many(self, distances):
+        """Resolve a batch of distances; unmatched distances map to None."""
+        cache = {}
+        result = []
+        for distance in distances:
+            if distance not in cache:
+                cache[distance] = self.lookup(distance)
+            result.append(cache[distance])
+        return result
+
+    def lookup_array(self, distances):
+        """Slab ids for an array of distances, -1 where no slab matches.
+
+        One ``searchsorted`` over the slab starts; a card with overlapping
+        slabs falls back to ``lookup`` so the oldest slab still wins.
+        """
+        distances = np.asarray(distances, dtype=float)
+        if not self.slabs:
+            return np.full(distances.shape, -1, dtype=np.int64)
+        if self.overlaps():
+            unique, inverse = np.unique(distances, return_inverse=True)
+            ids = [-1 if np.isnan(d) else getattr(self.lookup(float(d)), "id", -1) for d in unique]
+            return np.asarray(ids, dtype=np.int64)[inverse.reshape(distances.shape)]
+        starts = np.asarray(self._starts, dtype=float)
+        ends = np.asarray([s.to_km for s in self.slabs], dtype=float)
+        ids = np.asarray([s.id for s in self.slabs], dtype=np.int64)
+        i = np.searchsorted(starts, distances, side="right") - 1
+        i_safe = np.clip(i, 0, None)
+        # NaN distances compare False and stay unmatched
+        hit = (i >= 0) & (ends[i_safe] >= distances)
+        return np.where(hit, ids[i_safe], -1)
+
+    def overlaps(self):
+        """Pairs of slabs whose distance intervals intersect."""
+        found = []
+        for i, slab in enumerate(self.slabs):
+            for other in self.slabs[i + 1:]:
+                if other.from_km > slab.to_km:
+                    break
+                found.append((slab, other))
+        return found
+
+    def gaps(self, step=DISTANCE_STEP):
+        """(after_km, before_km) intervals no slab covers."""
+        found = []
+        reach = None
+        for slab in self.slabs:
+            if reach is not None and slab.from_km - reach > step + _EPS:
+                found.append((reach, slab.from_km))
+            reach = slab.to_km if reach is None else max(reach, slab.to_km)
+        return found
+
+    def describe_problems(self):
+        """Human readable overlap/gap warnings, empty when the card is clean."""
+        lines = [
+            f"Overlap: {a.from_km}-{a.to_km} km and {b.from_km}-{b.to_km} km"
+            for a, b in self.overlaps()
+        ]
+        lines += [f"Gap: no rate between {lo} km and {hi} km" for lo, hi in self.gaps()]
+        return lines
+
+
+_current = None
+
+
+def get_rate_card(c):
+    global _current
+    if _current is None:
+        _current = RateCard.load(c)
+    return _current
+
+
+def invalidate():
+    global _current
+    _current = None
@@ -0,0 +1,163 @@
+"""Batch export of many main bills for month-end and year-end audits.
+
+Snapshots are read once in the calling process; rendering is spread over a
+pool of worker processes (one per core by default), each returning the PDF
+as bytes. The bills are written either as a zip of one PDF per bill or as a
+single merged PDF with a bookmark per bill, in the order they were given.
+
+Can also be run from the command line:
+    python -m reports.batch_export --year 2024-25 --merged audit.pdf
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pypdf import PdfWriter
+
+from reports.main_bill import (load_saved_main_bill, load_main_bill_snapshot,
+                               main_bill_file_stem, render_main_bill_pdf)
+from reports.pdf_cache import PdfCache, cache_key
+from reports.pdf_template import format_stages
+from reports.print_queue import safe_file_stem
+
+ZIP, MERGED = "zip", "merged"
+
+
+class BatchResult:
+    def __init__(self, path, timings, elapsed, workers):
+        self.path = path
+        self.timings = timings      # [(bill_number, render_ms, stage_ms)] in export order
+        self.elapsed = elapsed
+        self.workers = workers
+
+    @property
+    def bills_per_second(self):
+        return len(self.timings) / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        lines = [f"{bill_number}: {ms:.0f} ms ({format_stages(stages) or 'cached'})" for bill_number, ms, stages in self.timings]
+        lines.append(f"{len(self.timings)} bills in {self.elapsed:.1f} s on {self.workers} workers"
+                     f" ({self.bills_per_second:.1f} bills/s)")
+        return "\n".join(lines)
+
+
+def load_bill_snapshots(c, main_bill_ids):
+    snapshots = []
+    for main_bill_id in main_bill_ids:
+        saved = load_saved_main_bill(c, main_bill_id)
+        if saved:
+            snapshots.append(load_main_bill_snapshot(c, *saved))
+    return snapshots
+
+
+def render_bill_bytes(snapshot, key, cache):
+    """Runs in a worker process; returns (pdf_bytes, render_ms, stage_ms)."""
+    started = time.perf_counter()
+    buffer = io.BytesIO()
+    timer = render_main_bill_pdf(snapshot, buffer)
+    cache.put(key, buffer.getvalue(), evict=False)
+    return buffer.getvalue(), (time.perf_counter() - started) * 1000, timer.stages
+
+
+def _write_zip(path, snapshots, pdfs):
+    used = set()
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for snapshot, pdf in zip(snapshots, pdfs):
+            stem = safe_file_stem(main_bill_file_stem(snapshot))
+            name, n = f"{stem}.pdf", 2
+            while name in used:
+                name, n = f"{stem}-{n}.pdf", n + 1
+            used.add(name)
+            archive.writestr(name, pdf)
+
+
+def _write_merged(path, snapshots, pdfs):
+    writer = PdfWriter()
+    for snapshot, pdf in zip(snapshots, pdfs):
+        writer.append(io.BytesIO(pdf), outline_item=f"Bill {snapshot['bill'].get('bill_number', '')}")
+    with open(path, "wb") as f:
+        writer.write(f)
+
+
+def export_bills(snapshots, out_path, mode=ZIP, workers=None, progress=None, cache=None):
+    """Render ``snapshots`` in parallel and write them to ``out_path``.
+
+    Bills already in the PDF cache are not rendered again.
+    ``progress(done, total)`` is called from this thread after each bill.
+    The output is written to a ``.part`` file and renamed into place.
+    """
+    cache = cache or PdfCache()
+    started = time.perf_counter()
+    pdfs = [None] * len(snapshots)
+    timings = [None] * len(snapshots)
+    done = 0
+
+    misses = []
+    for i, snapshot in enumerate(snapshots):
+        key = cache_key("main_bill", snapshot)
+        read_started = time.perf_counter()
+        pdfs[i] = cache.read(key)
+        if pdfs[i] is None:
+            misses.append((i, key))
+            continue
+        timings[i] = (snapshot["bill"].get("bill_number", ""), (time.perf_counter() - read_started) * 1000, {})
+        done += 1
+        if progress:
+            progress(done, len(snapshots))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(misses) or 1))
+    if misses:
+        # spawn: the workers must not inherit the Tk process state
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(render_bill_bytes, snapshots[i], key, cache): i for i, key in misses}
+            for future in as_completed(futures):
+                i = futures[future]
+                pdfs[i], ms, stages = future.result()
+                timings[i] = (snapshots[i]["bill"].get("bill_number", ""), ms, stages)
+                done += 1
+                if progress:
+                    progress(done, len(snapshots))
+        cache.evict()
+
+    part = out_path + ".part"
+    try:
+        (_write_merged if mode == MERGED else _write_zip)(part, snapshots, pdfs)
+        os.replace(part, out_path)
+    except Exception:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    return BatchResult(out_path, timings, time.perf_counter() - started, workers)
+
+
+def main():
+    from db.bill_list import fetch_bill_ids
+    from db.connection import connect, DB_PATH
+
+    parser = argparse.ArgumentParser(description="Export main bills to a zip or a merged PDF.")
+    parser.add_argument("output")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--year")
+    parser.add_argument("--from", dest="date_from", help="dd-mm-yyyy")
+    parser.add_argument("--to", dest="date_to", help="dd-mm-yyyy")
+    parser.add_argument("--merged", action="store_true")
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    conn = connect(args.db, profile="read-only reporting")
+    ids = fetch_bill_ids(conn.cursor(), date_from=args.date_from, date_to=args.date_to, year=args.year)
+    snapshots = load_bill_snapshots(conn.cursor(), ids)
+    conn.close()
+    if not snapshots:
+        print("No bills match.")
+        return
+    result = export_bills(snapshots, args.output, MERGED if args.merged else ZIP, args.workers)
+    print(result.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Bill pack: the main bill and the report of every linked destination entry
+in one PDF, with a contents page and a bookmark per document.
+
+Built straight from the database, without any Tk widgets: the main bill
+snapshot as for ``export_pdf`` and all annexures from one batched query.
+The pack renders in one document, so styles and page furniture are shared.
+
+Can also be run from the command line:
+    python -m reports.bill_pack SE/00042 pack.pdf
+"""
+import argparse
+
+from reports.main_bill import (load_saved_main_bill, load_main_bill_snapshot, build_main_bill_story,
+                               MAIN_BILL_PAGE)
+from reports.entry_report import load_entry_snapshots, build_entry_story, entry_page_furniture, ENTRY_PAGE
+from reports.pdf_template import Section, build_sections_pdf
+
+
+def load_bill_pack(c, main_bill_data, destination_entry_ids):
+    ids = sorted(int(i) for i in destination_entry_ids)
+    entries = load_entry_snapshots(c, ids)
+    return {
+        "main_bill": load_main_bill_snapshot(c, main_bill_data, ids),
+        "entries": [entries[i] for i in ids if i in entries],
+    }
+
+
+def bill_pack_file_stem(pack):
+    return f"bill_pack_{pack['main_bill']['bill'].get('bill_number', 'Unknown')}"
+
+
+def render_bill_pack_pdf(pack, pdf_path, timer=None):
+    """Render the pack; returns the ``StageTimer`` with story/layout/write times."""
+    bill = pack["main_bill"]
+    bill_number = bill["bill"].get("bill_number", "")
+    sections = [Section(f"Main Bill {bill_number}", MAIN_BILL_PAGE,
+                        lambda: build_main_bill_story(bill), None)]
+    for n, entry in enumerate(pack["entries"], 1):
+        title = f"Annexure {n}: {entry['destination_name']}"
+        if entry["bill_number"]:
+            title += f", Bill No. {entry['bill_number']}"
+        title += f" ({entry['date']})"
+        sections.append(Section(title, ENTRY_PAGE, lambda entry=entry: build_entry_story(entry),
+                                entry_page_furniture(entry)))
+    return build_sections_pdf(pdf_path, f"Bill Pack {bill_number}", sections, MAIN_BILL_PAGE, timer=timer)
+
+
+def main():
+    from db.connection import connect, DB_PATH
+    from reports.pdf_template import StageTimer
+
+    parser = argparse.ArgumentParser(description="Export a main bill with all its annexures as one PDF.")
+    parser.add_argument("bill_number")
+    parser.add_argument("output")
+    parser.add_argument("--db", default=DB_PATH)
+    args = parser.parse_args()
+
+    conn = connect(args.db, profile="read-only reporting")
+    c = conn.cursor()
+    c.execute("SELECT id FROM main_bill WHERE bill_number = ?", (args.bill_number,))
+    row = c.fetchone()
+    saved = load_saved_main_bill(c, row[0]) if row else None
+    if not saved:
+        print(f"Bill {args.bill_number} not found.")
+        return
+    timer = StageTimer()
+    with timer.stage("load"):
+        pack = load_bill_pack(c, *saved)
+    conn.close()
+    render_bill_pack_pdf(pack, args.output, timer)
+    print(f"{len(pack['entries'])} annexures: {timer} ms")
+
+
+if __name__ == "__main__":
+    main()
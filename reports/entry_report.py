@@ -0,0 +1,164 @@
+"""Destination entry report (landscape, one table per rate slab).
+
+``load_entry_snapshot`` reads the entry on the UI side; ``render_entry_pdf``
+only needs that snapshot, so it can run in a worker process.
+"""
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+from reportlab.platypus import Table, TableStyle, Paragraph, Spacer, KeepTogether, CondPageBreak
+from reports.pdf_template import (build_pdf, entry_styles, entry_column_widths, entry_company_column,
+                                  entry_signature_footer, PageFurniture, ChunkedLongTable, usable_width,
+                                  ENTRY_TABLE, ENTRY_CONTINUED_TABLE)
+from db.rate_card import get_rate_card
+
+# Slabs up to this many dealer rows are one Table kept together, as before.
+# Larger ones are laid out page by page; benchmarks/bench_entry_pdf.py only
+# shows that winning consistently above about a thousand rows.
+KEEP_TOGETHER_ROWS = 1000
+
+ENTRY_PAGE = dict(pagesize=landscape(A4), leftMargin=20, rightMargin=20, topMargin=100, bottomMargin=80)
+
+
+def load_entry_snapshot(c, destination_entry_id):
+    """The entry header and its slabs with dealer rows, or None if it is gone."""
+    return load_entry_snapshots(c, [destination_entry_id]).get(int(destination_entry_id))
+
+
+def load_entry_snapshots(c, destination_entry_ids):
+    """Snapshots of many entries, keyed by id, read with one query."""
+    ids = [int(i) for i in destination_entry_ids]
+    if not ids:
+        return {}
+    rate_card = get_rate_card(c)
+    placeholders = ",".join("?" for _ in ids)
+    c.execute(f"""
+        SELECT de.id, de.letter_note, de.bill_number, de.date, de.to_address, ds.name,
+               re.id, re.rate_range_id, re.rate, re.total_bags, re.total_mt, re.total_mtk, re.total_amount,
+               dr.dealer_id, dr.despatched_to, dr.km, dr.no_bags, dr.mt, dr.mtk, dr.amount,
+               dr.mda_number, dr.date, dr.description, dr.remarks
+        FROM destination_entry de
+        JOIN destination ds ON ds.id = de.destination_id
+        LEFT JOIN range_entry re ON re.destination_entry_id = de.id
+        LEFT JOIN dealer_entry dr ON dr.range_entry_id = re.id
+        WHERE de.id IN ({placeholders})
+        ORDER BY de.id, re.id, dr.id
+    """, ids)
+
+    snapshots = {}
+    slabs = {}
+    for row in c.fetchall():
+        entry_id, letter_note, bill_number, date, to_address, destination_name = row[:6]
+        range_entry_id, rate_range_id, rate, total_bags, total_mt, total_mtk, total_amount = row[6:13]
+        snapshot = snapshots.get(entry_id)
+        if snapshot is None:
+            snapshot = snapshots[entry_id] = {
+                "letter_note": letter_note,
+                "bill_number": bill_number,
+                "date": date,
+                "to_address": to_address or "",
+                "destination_name": destination_name,
+                "ranges": [],
+            }
+        if range_entry_id is None:
+            continue
+        slab = slabs.get(range_entry_id)
+        if slab is None:
+            rate_slab = rate_card.get(rate_range_id)
+            slab = slabs[range_entry_id] = {
+                "name": f"{destination_name.upper()} {rate_slab.from_km}-{rate_slab.to_km}",
+                "rate": rate,
+                "dealers": [],
+                "totals": (total_bags, total_mt, total_mtk, total_amount),
+            }
+            snapshot["ranges"].append(slab)
+        if row[13] is not None:
+            slab["dealers"].append(row[13:])
+    return snapshots
+
+
+def entry_file_stem(snapshot):
+    return f"bill_report_{snapshot['bill_number'] or snapshot['destination_name']}"
+
+
+def trim_text(text, max_len=30):  # adjust length to what fits your column
+    if not text:
+        return ""
+    return text if len(text) <= max_len else text[:max_len] + "…"
+
+
+def entry_page_furniture(snapshot):
+    """Company header, addressee and signature footer for one entry's pages."""
+    styles = entry_styles()
+
+    # RIGHT COLUMN - To Address and Bill Info
+    to_address_lines = snapshot["to_address"].split('\n')
+    right_column = [Paragraph(line, styles['CustomNormal']) for line in to_address_lines] + [
+        Spacer(1, 6),
+        Paragraph(f"Date: {snapshot['date']}", styles['CustomNormal']),
+    ]
+    header_table = Table([[list(entry_company_column()), "", right_column]], colWidths=[480, 40, 280])
+    header_table.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP')]))
+    return PageFurniture(ENTRY_PAGE, header_table, 50, entry_signature_footer(), 15 * mm)
+
+
+def render_entry_pdf(snapshot, pdf_file, timer=None, keep_together_rows=KEEP_TOGETHER_ROWS):
+    """Render the report; returns the ``StageTimer`` with story/layout/write times."""
+    return build_pdf(pdf_file, lambda: build_entry_story(snapshot, keep_together_rows), ENTRY_PAGE,
+                     timer=timer, on_page=entry_page_furniture(snapshot))
+
+
+def build_entry_story(snapshot, keep_together_rows=KEEP_TOGETHER_ROWS):
+    styles = entry_styles()
+    elements = []
+
+    letter_note = snapshot["letter_note"]
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph(f"Bill No.: {snapshot['bill_number']},", styles['CustomNormal']))
+    elements.append(Spacer(1, 6))
+    elements.append(Paragraph('Sir,', styles['CustomNormal']))
+    elements.append(Paragraph(letter_note if letter_note else "Please find the details below:", styles['CustomNormal']))
+    elements.append(Spacer(1, 8))
+
+    # Tables for ranges
+    col_widths = entry_column_widths(usable_width(ENTRY_PAGE))
+
+    for slab in snapshot["ranges"]:
+        rate = slab["rate"]
+        table_data = [["SL NO", "Date", "MDA NO", "Description", "Despatched to", "Bag", "MT", "KM", "MTK", "Rate", "Amount", "Remarks"]]
+        for idx, (_, despatched_to, km, no_bags, mt, mtk, amount, mda_number, entry_date, description, remarks) in enumerate(slab["dealers"], 1):
+            table_data.append([
+                str(idx),
+                entry_date,
+                mda_number,
+                trim_text(description, 32),
+                trim_text(despatched_to, 32),
+                str(no_bags),
+                f"{mt:.3f}",
+                str(km),
+                f"{mtk:.2f}",
+                f"{rate:.2f}",
+                f"{amount:.2f}",
+                Paragraph(remarks or "", styles['CustomNormal'])          # optional: wrap Remarks
+            ])
+        # Add total row
+        total_bags, total_mt, total_mtk, total_amount = slab["totals"]
+        table_data.append(["", "", "", "", "TOTAL", str(total_bags), f"{total_mt:.3f}", "", f"{total_mtk:.2f}", f"{rate:.2f}", f"{total_amount:.2f}", ""])
+
+        if len(slab["dealers"]) > keep_together_rows:
+            # Title, header and a few rows must share a page
+            elements.append(CondPageBreak(80))
+            elements.append(Paragraph(slab["name"], styles['CenterBold']))
+            elements.append(Spacer(1, 3))
+            elements.append(ChunkedLongTable(table_data[0], table_data[1:], col_widths,
+                                             ENTRY_TABLE, ENTRY_CONTINUED_TABLE))
+        else:
+            table = Table(table_data, colWidths=col_widths, hAlign="CENTER", style=ENTRY_TABLE)  # center table
+            elements.append(KeepTogether([
+                Paragraph(slab["name"], styles['CenterBold']),
+                Spacer(1, 3),
+                table
+            ]))
+        elements.append(Spacer(1, 6))
+
+    elements.append(Spacer(1, 20))
+    return elements
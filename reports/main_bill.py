@@ -0,0 +1,296 @@
+"""Main bill PDF: a data snapshot taken on the UI side and a renderer.
+
+The snapshot is a plain dict so it can be handed to a worker process; the
+renderer never touches the database.
+"""
+from collections import defaultdict
+from num2words import num2words
+from reportlab.platypus import Paragraph, Table, TableStyle, Spacer
+from reportlab.lib.pagesizes import A4
+from reports.pdf_template import (build_pdf, main_bill_styles, main_bill_company_header,
+                                  BANK_LINES, DATE_BOX_TABLE, BILL_INFO_TABLE, GARAGE_TABLE, SLAB_TABLE)
+
+MAIN_BILL_PAGE = dict(pagesize=A4, topMargin=40, bottomMargin=30, leftMargin=30, rightMargin=30)
+
+
+def load_saved_main_bill(c, main_bill_id):
+    """``(main_bill_data, destination_entry_ids)`` of a saved bill, or None."""
+    c.execute("""
+        SELECT bill_number, letter_note, to_address, date_of_clearing, fact_gst_number,
+               product, hsn_sac_code, year
+        FROM main_bill WHERE id = ?
+    """, (main_bill_id,))
+    row = c.fetchone()
+    if not row:
+        return None
+    keys = ("bill_number", "letter_note", "to_address", "date_of_clearing", "fact_gst_number",
+            "product", "hsn_sac_code", "year")
+    main_bill_data = dict(zip(keys, row))
+    main_bill_data["created_date"] = row[3] or ""
+
+    c.execute("SELECT destination_entry_id FROM main_bill_entries WHERE main_bill_id = ?", (main_bill_id,))
+    return main_bill_data, [r[0] for r in c.fetchall()]
+
+
+def load_main_bill_snapshot(c, main_bill_data, destination_entry_ids):
+    """Everything ``render_main_bill_pdf`` needs, read in one go."""
+    ids = [int(i) for i in destination_entry_ids]
+    placeholders = ",".join("?" for _ in ids)
+
+    # detect if garage
+    c.execute(f"""
+        SELECT COUNT(*) FROM destination
+        WHERE id IN (
+            SELECT destination_id FROM destination_entry WHERE id IN ({placeholders})
+        ) AND is_garage = 1
+    """, ids)
+    is_garage_bill = c.fetchone()[0] > 0
+
+    if is_garage_bill:
+        c.execute(f'''
+            SELECT
+                ds.name AS destination_name,
+                dr.no_bags, dr.mt, dr.km, dr.mtk, dr.amount
+            FROM dealer_entry dr
+            JOIN range_entry re ON dr.range_entry_id = re.id
+            JOIN destination_entry de ON re.destination_entry_id = de.id
+            JOIN destination ds ON de.destination_id = ds.id
+            WHERE de.id IN ({placeholders})
+            ORDER BY ds.name
+        ''', ids)
+    else:
+        c.execute(f'''
+            SELECT rr.from_km, rr.to_km, rr.rate, rr.is_mtk,
+                d.name AS dealer_name,
+                dsd.place AS destination_place,
+                dr.no_bags, dr.mt, dr.km, dr.mt * dr.km AS qty_km, dr.mtk, dr.amount
+            FROM dealer_entry dr
+            JOIN range_entry re ON dr.range_entry_id = re.id
+            JOIN destination_entry de ON re.destination_entry_id = de.id
+            JOIN dealer d ON dr.dealer_id = d.id
+            JOIN destination dsd ON d.destination_id = dsd.id
+            JOIN rate_range rr ON re.rate_range_id = rr.id
+            WHERE de.id IN ({placeholders})
+            ORDER BY rr.from_km, dsd.place, d.name
+        ''', ids)
+
+    return {
+        "bill": dict(main_bill_data),
+        "entry_ids": sorted(ids),
+        "is_garage_bill": is_garage_bill,
+        "rows": c.fetchall(),
+    }
+
+
+def main_bill_file_stem(snapshot):
+    bill_no = snapshot["bill"].get("bill_number", "Unknown")
+    prefix = "garage_bill" if snapshot["is_garage_bill"] else "main_bill"
+    return f"{prefix}_{bill_no}"
+
+
+def render_main_bill_pdf(snapshot, pdf_path, timer=None):
+    """Render the bill; returns the ``StageTimer`` with story/layout/write times."""
+    return build_pdf(pdf_path, lambda: build_main_bill_story(snapshot), MAIN_BILL_PAGE, timer=timer)
+
+
+def build_main_bill_story(snapshot):
+    bill = snapshot["bill"]
+    is_garage_bill = snapshot["is_garage_bill"]
+    rows = snapshot["rows"]
+    styles = main_bill_styles()
+
+    elements = []
+
+    elements.append(main_bill_company_header())
+    elements.append(Spacer(1, 12))
+    # Compact box for Date of Clearing
+    date_paragraph = Paragraph(
+        f"<b>Date of Clearing:</b><br/>{bill['date_of_clearing']}", styles['Normal']
+    )
+
+    # Narrower column, minimal padding
+    date_box_table = Table([[date_paragraph]], colWidths=[100], hAlign='LEFT', style=DATE_BOX_TABLE)
+
+    # Info rows as a structured table
+    info_rows = [
+        [f"BILL NO: {bill['bill_number']}", f"Date: {bill['created_date']}"],
+        ["TO", ""],
+        [bill['to_address'], ""],
+        [f"Sir,\n Ref:- {bill['letter_note']}", date_box_table],
+        [f"PRODUCT: {bill['product']}", "WESTHILL RH"],
+        [f"FACT GST {bill['fact_gst_number']}", ""],
+        [f"HSN/SAC CODE: {bill['hsn_sac_code']}", f"YEAR: {bill['year']}"],
+    ]
+    col_widths = [280, 250]
+    elements.append(Table(info_rows, colWidths=col_widths, hAlign='LEFT', style=BILL_INFO_TABLE))
+
+    elements.append(Spacer(1, 10))
+
+    section_title = "TRANSPORTATION (DEPOT)" if is_garage_bill else "TRANSPORTATION"
+    elements.append(Paragraph(section_title, styles["CenterBold"]))
+    elements.append(Spacer(1, 5))
+
+    grand_amount = 0
+    data = []
+
+    if is_garage_bill:
+        # Garage mode: one aggregated row per destination
+        headers = ["SL/NO", "Destination", "Qty/MT", "KM", "MTK", "Amount"]
+        data = [headers]
+
+        # Group & aggregate by destination (single aggregated row per destination)
+        grouped = defaultdict(lambda: {"qty": 0, "mt": 0.0, "km": 0.0, "mtk": 0.0, "amount": 0.0, "count_km": 0})
+        for row in rows:
+            dest_name, qty, mt, km, mtk, amount = row
+            grouped[dest_name]["qty"] += (qty or 0)
+            grouped[dest_name]["mt"] += (mt or 0.0)
+            # km might be same for all entries of a garage; store last non-zero / compute average if needed
+            if km is not None:
+                grouped[dest_name]["km"] = km
+            grouped[dest_name]["mtk"] += (mtk or 0.0)
+            grouped[dest_name]["amount"] += (amount or 0.0)
+
+        # Build rows: one per destination
+        sl = 1
+        grand_tot_mt = grand_tot_km = grand_tot_mtk = grand_tot_amount = 0.0
+
+        for dest, vals in grouped.items():
+            dest_mt = vals["mt"]
+            dest_km = vals.get("km", 0.0) or 0.0
+            dest_mtk = vals["mtk"]
+            dest_amount = vals["amount"]
+
+            data.append([
+                str(sl),
+                dest,
+                f"{dest_mt:.2f}",
+                f"{dest_km:.2f}",
+                f"{dest_mtk:.2f}",
+                f"{dest_amount:.2f}"
+            ])
+            sl += 1
+
+            grand_tot_mt += dest_mt
+            # For grand KM we usually don't sum km; if you want sum of KM use below, otherwise keep as 0 or avg.
+            grand_tot_km += dest_km
+            grand_tot_mtk += dest_mtk
+            grand_tot_amount += dest_amount
+
+        # Final GRAND TOTAL row
+        data.append([
+            "", "GRAND TOTAL",
+            f"{grand_tot_mt:.2f}",
+            f"{grand_tot_km:.2f}",
+            f"{grand_tot_mtk:.2f}",
+            f"{grand_tot_amount:.2f}"
+        ])
+
+        tbl = Table(data, colWidths=[40, 150, 70, 60, 70, 80], style=GARAGE_TABLE)
+
+        elements.append(tbl)
+        grand_amount = grand_tot_amount
+
+    else:
+        # Table headers
+        table_data = [[
+            'Sl. No.', 'Destinations', 'Qty', 'Total Qty', 'KM', 'MT x KM', 'Total MT x KM', 'Rate', 'Amount Rs.', 'Total Amount'
+        ]]
+
+        # Group by slab
+        grouped = defaultdict(list)
+        for row in rows:
+            key = (row[0], row[1], row[2], row[3])  # from_km, to_km, rate, is_mtk
+            grouped[key].append(row)
+
+        table_styles = []
+        sl_no = 1
+        row_index = 1
+        grand_qty = grand_mt = grand_mtk = grand_amount = 0
+
+        for (from_km, to_km, rate, is_mtk), entries in grouped.items():
+            start_row = row_index
+            slab_qty = slab_mt = slab_mtk = slab_amount = 0
+            slab_label = f"SLAB {int(from_km)}-{int(to_km)}"
+
+            # ---- group entries by destination within each slab ----
+            dest_grouped = defaultdict(lambda: {"qty": 0, "mt": 0, "mtk": 0, "amount": 0, "km": 0})
+            for entry in entries:
+                dest_name = entry[5]
+                qty = entry[6]
+                mt = entry[7]
+                km = entry[8]
+                mtk = entry[10]
+                amount = entry[11]
+
+                dest_grouped[dest_name]["qty"] += qty
+                dest_grouped[dest_name]["mt"] += mt
+                dest_grouped[dest_name]["km"] = km  # usually same for same dest
+                dest_grouped[dest_name]["mtk"] += mtk
+                dest_grouped[dest_name]["amount"] += amount
+
+            # ---- Insert aggregated destination rows ----
+            for dest_name, vals in dest_grouped.items():
+                table_data.append([
+                    sl_no, dest_name,
+                    f"{vals['qty']:.2f}", "", slab_label,
+                    f"{vals['mt'] * vals['km']:.2f}", "", f"{rate:.2f}", f"{vals['amount']:.2f}", ""
+                ])
+
+                slab_qty += vals["qty"]
+                slab_mt += vals["mt"]
+                slab_mtk += vals["mtk"]
+                slab_amount += vals["amount"]
+                row_index += 1
+
+            # Merge total columns for slab
+            table_data[start_row][3] = f"{slab_mt:.2f}"
+            table_data[start_row][6] = f"{slab_mtk:.2f}"
+            table_data[start_row][9] = f"{slab_amount:.2f}"
+
+            # Add span styles
+            table_styles.extend([
+                ('SPAN', (0, start_row), (0, row_index - 1)),  # SL no
+                ('SPAN', (3, start_row), (3, row_index - 1)),  # Total Qty
+                ('SPAN', (4, start_row), (4, row_index - 1)),  # KM
+                ('SPAN', (6, start_row), (6, row_index - 1)),  # Total MT x KM
+                ('SPAN', (7, start_row), (7, row_index - 1)),  # Rate
+                ('SPAN', (9, start_row), (9, row_index - 1)),  # Total Amount
+            ])
+
+            sl_no += 1
+            grand_qty += slab_qty
+            grand_mt += slab_mt
+            grand_mtk += slab_mtk
+            grand_amount += slab_amount
+
+        # Grand total row
+        table_data.append([
+            "", "GRAND TOTAL", "", f"{grand_mt:.2f}", "", "", f"{grand_mtk:.2f}", "", "", f"{grand_amount:.2f}"
+        ])
+
+        # Build ReportLab table
+        tbl = Table(table_data, colWidths=[35, 90, 40, 55, 55, 55, 70, 40, 70, 75])
+        tbl.setStyle(TableStyle(table_styles + SLAB_TABLE))
+        elements.append(tbl)
+        elements.append(Spacer(1, 12))
+
+    # Rupees in words
+    grand_amount_str = f"{grand_amount:,.2f}".replace(",", "")
+    elements.append(Spacer(1, 12))
+    amount_words = num2words((float(grand_amount_str)), lang='en_IN').replace("euro", "rupees").title() + " Only"
+    elements.append(Paragraph(
+        f"We are claiming for Rs. {grand_amount:,.2f} ({amount_words}) for Clearing & Transportation Bill of Fertilizer.",
+        styles['Small']
+    ))
+    elements.append(Spacer(1, 12))
+    for line in BANK_LINES:
+        elements.append(Paragraph(line, styles['Small']))
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph("Acknowledge copies of Delivery advice attached with this bill", styles['Small']))
+    elements.append(Paragraph("I request you to approve the bill and payment may be made at an early date.", styles['Small']))
+    elements.append(Spacer(1, 20))
+
+    elements.append(Paragraph("Thanking you", styles['Small']))
+    elements.append(Spacer(1, 6))
+    elements.append(Paragraph("Yours faithfully", styles['RightAlign']))
+    return elements
@@ -0,0 +1,92 @@
+"""Content-addressed cache of rendered main bill PDFs.
+
+A bill's key is a hash of its snapshot: the ``main_bill`` header fields,
+the set of linked destination entries and the ``dealer_entry`` rows (with
+the dealer, destination and slab values printed next to them). Any edit
+that changes what the PDF shows, whether through ``save_changes``,
+``save_main_bill`` or the master data, gives a new key, so a stale PDF is
+never served. Rendering is deterministic (ReportLab invariant mode: fixed
+creation date and document ID), so equal keys always mean equal files.
+
+Files live in ``CACHE_DIR`` as ``<key>.pdf``. A hit bumps the file's mtime;
+when the directory grows past ``max_bytes`` the least recently used files
+are removed.
+"""
+import hashlib
+import json
+import os
+
+CACHE_DIR = "pdf_cache"
+MAX_BYTES = 256 * 1024 * 1024
+
+# Bump when the main bill layout changes so old renders are not reused
+LAYOUT_VERSION = 1
+
+
+def cache_key(kind, snapshot):
+    payload = json.dumps([kind, LAYOUT_VERSION, snapshot], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PdfCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key):
+        """Path of the cached PDF for ``key``, or None."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def read(self, key):
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data, evict=True):
+        """Store ``data`` under ``key``; batch writers pass ``evict=False`` and evict once."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(key)
+        # pid-unique part file: several worker processes may store at once
+        part = f"{path}.{os.getpid()}.part"
+        with open(part, "wb") as f:
+            f.write(data)
+        os.replace(part, path)
+        if evict:
+            self.evict()
+        return path
+
+    def evict(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith(".pdf"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,440 @@
+"""Shared PDF layout for the main bill and the destination entry report.
+
+Style sheets, the company blocks, table styles and the static page
+furniture do not depend on the bill being printed, so they are built once
+per process and reused by every document and every page (the print queue
+and batch export keep their worker processes alive between jobs).
+
+Documents are built through ``build_pdf``, which times each stage:
+``story`` (building the flowables), ``layout`` (ReportLab splitting them
+into pages and drawing each page) and ``write`` (serialising the file).
+"""
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import (SimpleDocTemplate, BaseDocTemplate, PageTemplate, Frame, Flowable, Paragraph,
+                                Spacer, Table, LongTable, TableStyle, NextPageTemplate, PageBreak)
+from reportlab.platypus.tableofcontents import TableOfContents
+
+FONT = "Helvetica"
+BOLD_FONT = "Helvetica-Bold"
+
+COMPANY_MOBILE = "Mob: 9447004108"
+BANK_LINES = (
+    "Kindly arrange payment to M/S. Shan Enterprises, through IFSC NO.",
+    "CNRB0014404 - A/C. No.44041400000041 Canara Bank, Panniyankara Branch, Calicut.",
+)
+
+
+# ---------- stage timing ----------
+class StageTimer:
+    """Accumulates milliseconds per stage; ``hook(stage, ms)`` sees each one."""
+
+    def __init__(self, hook=None):
+        self.hook = hook
+        self.stages = {}
+
+    def add(self, stage, ms):
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+        if self.hook:
+            self.hook(stage, ms)
+
+    @contextmanager
+    def stage(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, (time.perf_counter() - started) * 1000)
+
+    def __str__(self):
+        return format_stages(self.stages)
+
+
+def format_stages(stages):
+    return " / ".join(f"{stage} {ms:.0f}" for stage, ms in stages.items())
+
+
+def _timed_canvas(timer, written):
+    class TimedCanvas(Canvas):
+        def save(self):
+            started = time.perf_counter()
+            super().save()
+            written.append((time.perf_counter() - started) * 1000)
+    return TimedCanvas
+
+
+def _timed_build(build, timer):
+    written = []
+    started = time.perf_counter()
+    build(_timed_canvas(timer, written))
+    elapsed = (time.perf_counter() - started) * 1000
+    timer.add("layout", elapsed - sum(written))
+    timer.add("write", sum(written))
+    return timer
+
+
+def usable_width(page):
+    return page["pagesize"][0] - page["leftMargin"] - page["rightMargin"]
+
+
+def build_pdf(target, build_story, page, timer=None, on_page=None):
+    """Build a PDF at ``target`` (a path or file object).
+
+    ``page`` holds the page size and margins; ``build_story()`` returns the
+    flowables; ``on_page(canvas, doc)`` draws the furniture on every page.
+    """
+    timer = timer or StageTimer()
+    # Invariant mode fixes the creation date and document ID: same input, same bytes
+    doc = SimpleDocTemplate(target, invariant=1, **page)
+    with timer.stage("story"):
+        story = build_story()
+    page_options = {"onFirstPage": on_page, "onLaterPages": on_page} if on_page else {}
+    return _timed_build(lambda canvasmaker: doc.build(story, canvasmaker=canvasmaker, **page_options), timer)
+
+
+Section = namedtuple("Section", "title page build_story on_page")
+
+
+class SectionMark(Flowable):
+    """Zero-size marker at the start of a section, for the contents and outline."""
+
+    def __init__(self, title, key):
+        super().__init__()
+        self.title = title
+        self.key = key
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        pass
+
+
+class SectionsDocTemplate(BaseDocTemplate):
+    def afterFlowable(self, flowable):
+        if isinstance(flowable, SectionMark):
+            self.canv.bookmarkPage(flowable.key)
+            self.canv.addOutlineEntry(flowable.title, flowable.key, level=0)
+            self.notify("TOCEntry", (0, flowable.title, self.page, flowable.key))
+
+
+def _page_template(template_id, page, on_page=None):
+    width, height = page["pagesize"]
+    frame = Frame(page["leftMargin"], page["bottomMargin"],
+                  width - page["leftMargin"] - page["rightMargin"],
+                  height - page["topMargin"] - page["bottomMargin"], id="normal")
+    options = {"onPage": on_page} if on_page else {}
+    return PageTemplate(id=template_id, frames=[frame], pagesize=page["pagesize"], **options)
+
+
+def build_sections_pdf(target, title, sections, contents_page, timer=None):
+    """One PDF of several documents, each on its own page size and furniture.
+
+    A contents page (on ``contents_page``) lists the sections with page
+    numbers and links; each section also gets a PDF bookmark.
+    """
+    timer = timer or StageTimer()
+    doc = SectionsDocTemplate(target, invariant=1, title=title, **contents_page)
+    doc.addPageTemplates([_page_template("contents", contents_page)] + [
+        _page_template(f"section-{i}", section.page, section.on_page) for i, section in enumerate(sections)
+    ])
+
+    with timer.stage("story"):
+        contents = TableOfContents()
+        story = [Paragraph(title, contents_styles()["Title"]), Spacer(1, 12), contents]
+        for i, section in enumerate(sections):
+            story += [NextPageTemplate(f"section-{i}"), PageBreak(), SectionMark(section.title, f"section-{i}")]
+            story += section.build_story()
+
+    # Two passes: the first collects the page numbers for the contents
+    return _timed_build(lambda canvasmaker: doc.multiBuild(story, canvasmaker=canvasmaker), timer)
+
+
+# ---------- styles ----------
+@lru_cache(maxsize=None)
+def main_bill_styles():
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='CenterBold', alignment=TA_CENTER, fontSize=11, leading=14, spaceAfter=6, spaceBefore=4, fontName=BOLD_FONT))
+    styles.add(ParagraphStyle(name='NormalBold', fontSize=10, leading=12, spaceAfter=3))
+    styles.add(ParagraphStyle(name='RightNormal', alignment=TA_RIGHT, fontSize=10, leading=12))
+    styles.add(ParagraphStyle(name='Small', fontSize=9, fontName=FONT))
+    styles.add(ParagraphStyle(name='RightAlign', alignment=TA_RIGHT, fontName=FONT))
+    return styles
+
+
+@lru_cache(maxsize=None)
+def contents_styles():
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=None)
+def entry_styles():
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Small', fontSize=8, leading=10))
+    styles.add(ParagraphStyle(name='NormalBold', fontSize=10, leading=10, fontName=BOLD_FONT))
+    styles.add(ParagraphStyle(name='TitleBold', fontSize=13, leading=14, fontName=BOLD_FONT, alignment=0))
+    styles.add(ParagraphStyle(name='CustomNormal', fontSize=10, leading=12))
+    styles.add(ParagraphStyle(name='CenterBold', fontSize=10, fontName=BOLD_FONT, alignment=1))
+    return styles
+
+
+# ---------- table styles ----------
+MAIN_BILL_HEADER_TABLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('ALIGN', (0, 0), (0, 0), 'LEFT'),
+    ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
+    ('FONTNAME', (0, 0), (-1, -1), FONT),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+])
+
+DATE_BOX_TABLE = TableStyle([
+    ('BOX', (0, 0), (-1, -1), 0.5, colors.black),
+    ('LEFTPADDING', (0, 0), (-1, -1), 4),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+])
+
+BILL_INFO_TABLE = [
+    ('LEFTPADDING', (0, 0), (-1, -1), 30),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 30),
+    ('SPAN', (0, 5), (1, 5)),  # Centered GST row
+    ('ALIGN', (0, 5), (1, 5), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, -1), FONT),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('SPAN', (0, 5), (1, 5)),  # Span GST across both columns
+    ('ALIGN', (0, 5), (0, 5), 'CENTER'),
+]
+
+GARAGE_TABLE = TableStyle([
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), BOLD_FONT),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
+    ('FONTNAME', (1, -1), (-1, -1), BOLD_FONT),
+])
+
+# Per-bill SPAN commands are prepended to these
+SLAB_TABLE = [
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), BOLD_FONT),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+    ('FONTNAME', (0, 1), (-1, -1), FONT),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
+    ('BOX', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+]
+
+def _entry_table_commands(last_body_row):
+    return [
+        ('FONT', (0, 0), (-1, 0), BOLD_FONT),
+        ('FONT', (0, 1), (-1, -1), FONT),
+        ('FONTSIZE', (0, 0), (-1, 0), 10.5),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+
+        ('GRID', (0, 0), (-1, -1), 0.8, colors.black),
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('WORDWRAP', (3, 1), (4, last_body_row), True),
+
+        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+        ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
+        ('ALIGN', (3, 1), (4, last_body_row), 'LEFT'),
+        ('ALIGN', (11, 1), (11, last_body_row), 'LEFT'),
+
+        ('LEFTPADDING', (0, 0), (-1, -1), 3),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 3),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+    ]
+
+
+# The last row is the slab total
+ENTRY_TABLE = TableStyle(_entry_table_commands(-2) + [
+    ('FONTSIZE', (0, -1), (-1, -1), 9.5),
+    ('FONTNAME', (0, -1), (-1, -1), BOLD_FONT),
+    ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+])
+
+# A page of a long slab that does not reach the total row
+ENTRY_CONTINUED_TABLE = TableStyle(_entry_table_commands(-1))
+
+ENTRY_COLUMN_WIDTHS = (30, 45, 60, 60, 160, 35, 40, 40, 45, 40, 50, 40)
+
+
+@lru_cache(maxsize=None)
+def entry_column_widths(usable_width, shrink_factor=0.98):
+    """Entry table columns scaled to the page (``shrink_factor`` of usable width)."""
+    scale = usable_width * shrink_factor / sum(ENTRY_COLUMN_WIDTHS)
+    return [w * scale for w in ENTRY_COLUMN_WIDTHS]
+
+
+# ---------- company blocks ----------
+@lru_cache(maxsize=None)
+def main_bill_company_header():
+    """Company address on the left, GST number on the right."""
+    styles = main_bill_styles()
+    header_para = Paragraph(
+        "<font size=14><b>M/S. SHAN ENTERPRISES</b></font><br/>"
+        "Clearing & Transporting Contractor<br/>"
+        "21/4185 C, Meenchandathally, Gate<br/>"
+        "P.O. Arts College Calicut – 673018<br/>"
+        f"{COMPANY_MOBILE}",
+        styles['Normal']
+    )
+    gst_para = Paragraph("<b>GST32ACNFSB060K1ZP</b>", styles['Normal'])
+    return Table([[header_para, gst_para]], colWidths=[360, 160], style=MAIN_BILL_HEADER_TABLE)
+
+
+@lru_cache(maxsize=None)
+def entry_company_column():
+    styles = entry_styles()
+    return (
+        Paragraph("GSTIN: 32ACNFS 8060K1ZP", styles['Small']),
+        Paragraph("M/s. SHAN ENTERPRISES", styles['TitleBold']),
+        Paragraph("Clearing & Transporting contractor", styles['CustomNormal']),
+        Paragraph("21-4185, C-Meenchanda gate Calicut - 673018", styles['CustomNormal']),
+        Paragraph(COMPANY_MOBILE, styles['CustomNormal']),
+    )
+
+
+@lru_cache(maxsize=None)
+def entry_signature_footer():
+    styles = entry_styles()
+    footer_table = Table([[
+        Paragraph("Passed by", styles['CustomNormal']),
+        "",
+        Paragraph("Officer in charge", styles['CustomNormal']),
+        "",
+        Paragraph("Signature of contractor", styles['CustomNormal'])
+    ]], colWidths=[120, 140, 140, 140, 140])
+    footer_table.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ]))
+    return footer_table
+
+
+class PageFurniture:
+    """Header and footer drawn on every page of ``page``; each is wrapped only once.
+
+    The header sits ``header_offset`` above the top of the frame, the footer
+    at ``footer_y`` from the bottom of the page.
+    """
+
+    def __init__(self, page, header, header_offset, footer, footer_y):
+        self.page = page
+        self.header = header
+        self.header_offset = header_offset
+        self.footer = footer
+        self.footer_y = footer_y
+        self.header_height = None
+        self.footer_wrapped = False
+
+    def __call__(self, canvas, doc):
+        page = self.page
+        width = usable_width(page)
+        canvas.saveState()
+        if self.header_height is None:
+            _, self.header_height = self.header.wrap(width, page["topMargin"])
+        self.header.drawOn(canvas, page["leftMargin"],
+                           page["pagesize"][1] - page["bottomMargin"] - self.header_height + self.header_offset)
+        if not self.footer_wrapped:
+            self.footer.wrap(width, page["bottomMargin"])
+            self.footer_wrapped = True
+        self.footer.drawOn(canvas, page["leftMargin"], self.footer_y)
+        canvas.restoreState()
+
+
+class ChunkedLongTable(Flowable):
+    """A long table with a header row, laid out one page at a time.
+
+    A plain ``Table`` re-measures every remaining row each time it is split
+    onto a new page, so a slab of a few thousand rows costs quadratic time.
+    Here row heights are measured once, ``chunk_rows`` rows at a time, against
+    the fixed column widths; each split then cuts a page-sized ``LongTable``
+    (header repeated, heights passed in) off the front and keeps the rest.
+
+    ``rows`` excludes the header; its last row gets ``style`` (the total row),
+    pages that end before it get ``continued_style``.
+    """
+
+    def __init__(self, header, rows, col_widths, style, continued_style,
+                 chunk_rows=200, hAlign="CENTER", _heights=None):
+        super().__init__()
+        self.header = header
+        self.rows = rows
+        self.col_widths = list(col_widths)
+        self.style = style
+        self.continued_style = continued_style
+        self.chunk_rows = chunk_rows
+        self.hAlign = hAlign
+        self.width = sum(self.col_widths)
+        self._heights = _heights
+        self.height = None if _heights is None else _heights[0] + sum(_heights[1])
+
+    def _measure(self, avail_width):
+        heights = []
+        header_height = None
+        for start in range(0, len(self.rows), self.chunk_rows):
+            chunk = self.rows[start:start + self.chunk_rows]
+            is_last = start + self.chunk_rows >= len(self.rows)
+            table = Table([self.header] + chunk, colWidths=self.col_widths,
+                          style=self.style if is_last else self.continued_style)
+            table.wrap(avail_width, 1e9)
+            header_height = table._rowHeights[0]
+            heights.extend(table._rowHeights[1:])
+        self._heights = (header_height, heights)
+        self.height = header_height + sum(heights)
+
+    def wrap(self, availWidth, availHeight):
+        if self._heights is None:
+            self._measure(availWidth)
+        return self.width, self.height
+
+    def _page(self, count):
+        header_height, heights = self._heights
+        is_last = count == len(self.rows)
+        return LongTable([self.header] + self.rows[:count], colWidths=self.col_widths,
+                         rowHeights=[header_height] + heights[:count], repeatRows=1, hAlign=self.hAlign,
+                         style=self.style if is_last else self.continued_style)
+
+    def split(self, availWidth, availHeight):
+        if self._heights is None:
+            self._measure(availWidth)
+        header_height, heights = self._heights
+        room = availHeight - header_height
+        count = 0
+        while count < len(heights) and heights[count] <= room:
+            room -= heights[count]
+            count += 1
+        if count == 0:
+            return []
+        if count == len(self.rows):
+            return [self._page(count)]
+        rest = ChunkedLongTable(self.header, self.rows[count:], self.col_widths, self.style,
+                                self.continued_style, self.chunk_rows, self.hAlign,
+                                _heights=(header_height, heights[count:]))
+        return [self._page(count), rest]
+
+    def draw(self):
+        table = self._page(len(self.rows))
+        table.wrap(self.width, self.height)
+        table.drawOn(self.canv, 0, 0)
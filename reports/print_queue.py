@@ -0,0 +1,176 @@
+"""Print-job queue: PDFs are rendered in a worker process.
+
+The UI takes a snapshot of the data (see ``reports.main_bill`` and
+``reports.entry_report``), submits it and carries on. Each job renders to a
+``.part`` file next to its target and is renamed into place when complete,
+so a half-written PDF is never opened. Output names are unique per job.
+
+Main bills and bill packs go through the PDF cache (``reports.pdf_cache``): an unchanged
+document is copied from the cache instead of being rendered again.
+"""
+import multiprocessing
+import os
+import re
+import shutil
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime
+from itertools import count
+
+from reports.main_bill import render_main_bill_pdf
+from reports.entry_report import render_entry_pdf
+from reports.bill_pack import render_bill_pack_pdf
+from reports.pdf_cache import PdfCache, cache_key
+
+RENDERERS = {
+    "main_bill": render_main_bill_pdf,
+    "entry_report": render_entry_pdf,
+    "bill_pack": render_bill_pack_pdf,
+}
+
+CACHED_KINDS = {"main_bill", "bill_pack"}
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+def safe_file_stem(stem):
+    """Bill numbers may contain '/' and other characters paths cannot."""
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(stem)).strip("._") or "document"
+
+
+def render_to_file(kind, snapshot, path, key=None, cache=None):
+    """Runs in the worker process; returns (started, finished, stage_ms).
+
+    With a ``key`` the finished PDF is also stored in ``cache``.
+    """
+    started = time.time()
+    part = path + ".part"
+    try:
+        timer = RENDERERS[kind](snapshot, part)
+        os.replace(part, path)
+    except Exception:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    if key is not None:
+        with open(path, "rb") as f:
+            cache.put(key, f.read())
+    return started, time.time(), timer.stages
+
+
+class PrintJob:
+    def __init__(self, job_id, kind, title, path):
+        self.id = job_id
+        self.kind = kind
+        self.title = title
+        self.path = path
+        self.status = QUEUED
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.error = None
+        self.stages = {}
+        self.cached = False
+
+    @property
+    def wait_ms(self):
+        return None if self.started is None else (self.started - self.submitted) * 1000
+
+    @property
+    def render_ms(self):
+        return None if self.finished is None or self.started is None else (self.finished - self.started) * 1000
+
+
+class PrintQueue:
+    def __init__(self, output_dir=None, workers=1, cache=None):
+        self.output_dir = output_dir or os.getcwd()
+        self.workers = workers
+        self.cache = cache or PdfCache()
+        self.pool = None
+        self.jobs = []
+        self.futures = {}
+        self.reserved = set()
+        self.ids = count(1)
+
+    def unique_path(self, stem):
+        stem = f"{safe_file_stem(stem)}_{datetime.now():%Y%m%d-%H%M%S}"
+        path = os.path.join(self.output_dir, f"{stem}.pdf")
+        n = 2
+        while path in self.reserved or os.path.exists(path):
+            path = os.path.join(self.output_dir, f"{stem}-{n}.pdf")
+            n += 1
+        self.reserved.add(path)
+        return path
+
+    def _pool(self):
+        if self.pool is None:
+            # spawn: the worker must not inherit the Tk process state
+            self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return self.pool
+
+    def _copy_cached(self, key, job):
+        """A finished future if the cached PDF was copied to the job's path, else None."""
+        cached = self.cache.get(key)
+        if not cached:
+            return None
+        started = time.time()
+        part = job.path + ".part"
+        try:
+            shutil.copyfile(cached, part)
+            os.replace(part, job.path)
+        except OSError:
+            # Evicted by a worker since the lookup, or unreadable: render it instead
+            if os.path.exists(part):
+                os.remove(part)
+            return None
+        job.cached = True
+        future = Future()
+        future.set_result((started, time.time(), {}))
+        return future
+
+    def submit(self, kind, snapshot, stem, title=None):
+        job = PrintJob(next(self.ids), kind, title or stem, self.unique_path(stem))
+        key = cache_key(kind, snapshot) if kind in CACHED_KINDS else None
+        try:
+            future = self._copy_cached(key, job) if key else None
+            if future is None:
+                future = self._pool().submit(render_to_file, kind, snapshot, job.path, key, self.cache)
+        except Exception:
+            self.reserved.discard(job.path)
+            raise
+        # Listed only once it has a future, so a poll never sees it stuck as queued
+        self.futures[job.id] = future
+        self.jobs.append(job)
+        return job
+
+    def pending(self):
+        return bool(self.futures)
+
+    def poll(self):
+        """Update job statuses; return the jobs that finished since the last poll."""
+        finished = []
+        for job in self.jobs:
+            future = self.futures.get(job.id)
+            if future is None:
+                continue
+            if not future.done():
+                if future.running():
+                    job.status = RUNNING
+                continue
+            del self.futures[job.id]
+            self.reserved.discard(job.path)
+            try:
+                job.started, job.finished, job.stages = future.result()
+                job.status = DONE
+            except Exception as e:
+                job.finished = time.time()
+                job.status = FAILED
+                job.error = e
+            finished.append(job)
+        return finished
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
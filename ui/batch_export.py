@@ -0,0 +1,164 @@
+"""Batch Export dialog for the View Main Bills page.
+
+Bills are picked by selection, by the page's current search or by fiscal
+year; their snapshots are read on the query executor and the rendering runs
+on a separate thread that drives the worker processes, so the window stays
+responsive while a year of bills is exported.
+"""
+import queue
+import threading
+from tkinter import *
+from tkinter import ttk, messagebox, filedialog
+
+from db.bill_list import fetch_bill_ids, fetch_bill_years
+from reports.batch_export import load_bill_snapshots, export_bills, ZIP, MERGED
+from ui.executor import submit_query
+from ui.print_jobs import open_file
+
+POLL_MS = 100
+
+
+def ids_for_bill_numbers(c, bill_numbers):
+    placeholders = ",".join("?" for _ in bill_numbers)
+    c.execute(f"SELECT bill_number, id FROM main_bill WHERE bill_number IN ({placeholders})", list(bill_numbers))
+    ids = dict(c.fetchall())
+    return [ids[n] for n in bill_numbers if n in ids]
+
+
+class BatchExportDialog(Toplevel):
+    def __init__(self, master, conn, selected_bill_numbers, filters):
+        super().__init__(master)
+        self.conn = conn
+        self.title("Batch Export Bills")
+        self.geometry("520x460")
+        self.selected_bill_numbers = list(selected_bill_numbers)
+        self.filters = dict(filters)
+        self.progress_queue = queue.Queue()
+        self.result = None
+
+        scope_frame = LabelFrame(self, text="Bills")
+        scope_frame.pack(fill=X, padx=10, pady=(10, 5))
+        self.scope_var = StringVar(value="selected" if self.selected_bill_numbers else "search")
+        Radiobutton(scope_frame, text=f"Selected bills ({len(self.selected_bill_numbers)})", variable=self.scope_var,
+                    value="selected", state=NORMAL if self.selected_bill_numbers else DISABLED).pack(anchor=W)
+        Radiobutton(scope_frame, text="All bills matching the current search", variable=self.scope_var,
+                    value="search").pack(anchor=W)
+        year_row = Frame(scope_frame)
+        year_row.pack(anchor=W)
+        Radiobutton(year_row, text="Fiscal year:", variable=self.scope_var, value="year").pack(side=LEFT)
+        self.year_var = StringVar()
+        self.year_combo = ttk.Combobox(year_row, textvariable=self.year_var, state="readonly", width=12)
+        self.year_combo.pack(side=LEFT, padx=5)
+
+        format_frame = LabelFrame(self, text="Output")
+        format_frame.pack(fill=X, padx=10, pady=5)
+        self.format_var = StringVar(value=ZIP)
+        Radiobutton(format_frame, text="Zip archive, one PDF per bill", variable=self.format_var, value=ZIP).pack(anchor=W)
+        Radiobutton(format_frame, text="Single merged PDF with a bookmark per bill", variable=self.format_var,
+                    value=MERGED).pack(anchor=W)
+
+        self.export_btn = Button(self, text="📦 Export", command=self.start_export)
+        self.export_btn.pack(pady=5)
+        self.progress = ttk.Progressbar(self, mode="determinate", length=400)
+        self.progress.pack(pady=5)
+        self.status_label = Label(self, text="")
+        self.status_label.pack()
+
+        self.summary_text = Text(self, height=10, width=60, state=DISABLED)
+        self.summary_text.pack(fill=BOTH, expand=True, padx=10, pady=5)
+        self.open_btn = Button(self, text="Open", command=lambda: open_file(self.result.path), state=DISABLED)
+        self.open_btn.pack(pady=(0, 10))
+
+        submit_query(self.conn, lambda conn: fetch_bill_years(conn.cursor()), on_done=self.show_years, busy=self)
+
+    def show_years(self, years):
+        self.year_combo["values"] = years
+        if years:
+            self.year_var.set(years[0])
+
+    def bill_ids_job(self):
+        scope = self.scope_var.get()
+        if scope == "selected":
+            bill_numbers = self.selected_bill_numbers
+            return lambda conn: ids_for_bill_numbers(conn.cursor(), bill_numbers)
+        if scope == "year":
+            year = self.year_var.get()
+            return lambda conn: fetch_bill_ids(conn.cursor(), year=year)
+        filters = self.filters
+        return lambda conn: fetch_bill_ids(conn.cursor(), **filters)
+
+    def start_export(self):
+        if self.scope_var.get() == "year" and not self.year_var.get():
+            messagebox.showwarning("No Year", "Please choose a fiscal year.", parent=self)
+            return
+        mode = self.format_var.get()
+        extension = ".pdf" if mode == MERGED else ".zip"
+        out_path = filedialog.asksaveasfilename(
+            parent=self, defaultextension=extension,
+            filetypes=[("PDF", "*.pdf")] if mode == MERGED else [("Zip archive", "*.zip")]
+        )
+        if not out_path:
+            return
+
+        ids_job = self.bill_ids_job()
+        self.export_btn.config(state=DISABLED)
+        self.open_btn.config(state=DISABLED)
+        self.status_label.config(text="Reading bills…")
+        submit_query(
+            self.conn, lambda conn: load_bill_snapshots(conn.cursor(), ids_job(conn)),
+            on_done=lambda snapshots: self.render(snapshots, out_path, mode),
+            on_error=self.fail, busy=self
+        )
+
+    def render(self, snapshots, out_path, mode):
+        if not snapshots:
+            self.export_btn.config(state=NORMAL)
+            self.status_label.config(text="No bills to export.")
+            return
+        self.progress.config(maximum=len(snapshots), value=0)
+        self.status_label.config(text=f"Rendering {len(snapshots)} bills…")
+
+        def run():
+            try:
+                result = export_bills(snapshots, out_path, mode,
+                                      progress=lambda done, total: self.progress_queue.put(("progress", done)))
+                self.progress_queue.put(("done", result))
+            except Exception as e:
+                self.progress_queue.put(("error", e))
+
+        threading.Thread(target=run, name="batch-export", daemon=True).start()
+        self.after(POLL_MS, self.poll)
+
+    def poll(self):
+        if not self.winfo_exists():
+            return
+        while True:
+            try:
+                kind, payload = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.progress.config(value=payload)
+            elif kind == "done":
+                self.finish(payload)
+                return
+            else:
+                self.fail(payload)
+                return
+        self.after(POLL_MS, self.poll)
+
+    def finish(self, result):
+        self.result = result
+        self.export_btn.config(state=NORMAL)
+        self.open_btn.config(state=NORMAL)
+        self.status_label.config(text=f"{len(result.timings)} bills in {result.elapsed:.1f} s "
+                                      f"({result.bills_per_second:.1f} bills/s)")
+        self.summary_text.config(state=NORMAL)
+        self.summary_text.delete("1.0", END)
+        self.summary_text.insert(END, result.summary())
+        self.summary_text.config(state=DISABLED)
+
+    def fail(self, error):
+        self.export_btn.config(state=NORMAL)
+        self.status_label.config(text="Export failed.")
+        messagebox.showerror("Export Failed", str(error), parent=self)
@@ -0,0 +1,476 @@
+"""Editable dealer-row grid for one range slab of the destination entry form.
+
+Every dealer row of the slab is an item of one Treeview. A single Entry
+(or, for the dealer column, a single Combobox) is placed over the cell
+being edited, so the slab uses the same handful of Tk widgets whether it
+has one row or several hundred. The rows themselves live in ``rows``, a
+plain list of dicts: the typed text under ``"cells"`` and, once the row
+calculates, the same keys the save path has always read (dealer_id, km,
+bags, mt, mtk, amount, mda_number, date, ...). A row that does not
+calculate carries no dealer_id/bags and is skipped on save.
+
+``totals`` holds the slab's running (bags, mt, mtk, amount). Each change
+moves it by the changed rows' difference only. The row being edited is
+recalculated as bags (or an exact dealer) are typed, and ``on_change``
+runs once per idle cycle however many rows changed, so editing one row
+of a 300-row slab costs the same as in a 3-row slab.
+
+Keys on the grid:
+    Up / Down / Left / Right    move between cells
+    Enter, F2, double-click     edit the cell (typing a character also starts an edit)
+    Delete                      remove the selected rows
+    Ctrl+C / Ctrl+V             copy the selected rows / paste tab-separated cells at the cell
+In the editor Return commits and moves down (adding a row at the end),
+Tab / Shift+Tab commit and move right / left, Escape cancels.
+"""
+from datetime import datetime
+from tkinter import *
+from tkinter import ttk
+
+from ui.dealer_matcher import Debouncer
+
+# (key, heading, width); every column but details is editable
+COLUMNS = (
+    ("dealer", "Dealer", 260),
+    ("despatched_to", "Despatched To", 200),
+    ("mda_number", "MDA No.", 80),
+    ("date", "Date", 90),
+    ("bags", "Bags", 60),
+    ("description", "Description", 110),
+    ("remarks", "Remarks", 110),
+    ("details", "Details", 300),
+)
+EDITABLE = [key for key, _, _ in COLUMNS if key != "details"]
+HEADINGS = {key: heading for key, heading, _ in COLUMNS}
+TEXT_FIELDS = ("despatched_to", "mda_number", "date", "description", "remarks")
+CALCULATED = ("dealer_id", "dealer_name", "dealer_place", "km", "bags", "mt", "mtk", "amount")
+TOTAL_FIELDS = ("bags", "mt", "mtk", "amount")
+# Cells recalculated on every keystroke while they are edited
+LIVE_FIELDS = ("dealer", "bags")
+
+MAX_VISIBLE_ROWS = 15
+
+
+def blank_cells():
+    return {
+        "dealer": "", "despatched_to": "", "mda_number": "",
+        "date": datetime.now().strftime("%Y-%m-%d"),
+        "bags": "", "description": "FACTOM FOS", "remarks": "",
+    }
+
+
+def details_text(row):
+    return f"MT: {row['mt']:.2f} | KM: {row['km']} | MTK: {row['mtk']:.2f} | ₹{row['amount']:.2f}"
+
+
+def make_row(cells=None, values=None):
+    """A model row from typed ``cells``; ``values`` are saved fields shown as they are."""
+    row = {"cells": blank_cells()}
+    row["cells"].update(cells or {})
+    row.update({key: row["cells"][key] for key in TEXT_FIELDS})
+    row["details"] = ""
+    if values:
+        row.update(values)
+        row["details"] = details_text(row)
+        # The dealer it was saved with, for when that dealer is not in the slab's map
+        row["saved_dealer"] = (row["cells"]["dealer"], values["dealer_id"], values["km"])
+    return row
+
+
+def is_blank(row):
+    return not row["cells"]["dealer"] and not row["cells"]["bags"]
+
+
+def row_totals(row):
+    """What the row adds to its slab's totals; rows that do not calculate add nothing."""
+    return tuple(row.get(key, 0) for key in TOTAL_FIELDS)
+
+
+class DealerGrid(Frame):
+    def __init__(self, master, rate, is_mtk, dealer_map, dealer_matcher, on_change=None):
+        super().__init__(master)
+        self.rate = rate
+        self.is_mtk = is_mtk
+        self.dealer_map = dealer_map
+        self.dealer_matcher = dealer_matcher
+        self.on_change = on_change or (lambda: None)
+        self.rows = []
+        # Running (bags, mt, mtk, amount) of every row, kept by applying each row's delta
+        self.totals = [0, 0.0, 0.0, 0.0]
+        self._change_pending = None
+        self.column = 0             # focused column, index into EDITABLE
+        self._editing = None        # (row_index, key, editor)
+
+        table = Frame(self)
+        table.pack(fill=X)
+        self.tree = ttk.Treeview(table, columns=[key for key, _, _ in COLUMNS], show="headings",
+                                 height=1, selectmode="extended")
+        for key, heading, width in COLUMNS:
+            self.tree.heading(key, text=heading)
+            self.tree.column(key, width=width, anchor=W, stretch=key == "details")
+        scrollbar = ttk.Scrollbar(table, orient=VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=lambda *args: (self.commit_edit(), scrollbar.set(*args)))
+        self.tree.pack(side=LEFT, fill=X, expand=True)
+        scrollbar.pack(side=RIGHT, fill=Y)
+        self.status = Label(self, anchor=W, fg="gray")
+        self.status.pack(fill=X)
+
+        # The only editors, reused for every cell
+        self.edit_var = StringVar()
+        self.entry_editor = Entry(self.tree, textvariable=self.edit_var)
+        self.dealer_var = StringVar()
+        self.dealer_editor = ttk.Combobox(self.tree, textvariable=self.dealer_var)
+        for editor in (self.entry_editor, self.dealer_editor):
+            editor.bind("<Return>", lambda e: self._commit_and_move(1, 0))
+            editor.bind("<Tab>", lambda e: self._commit_and_move(0, 1))
+            editor.bind("<Shift-Tab>", lambda e: self._commit_and_move(0, -1))
+            editor.bind("<ISO_Left_Tab>", lambda e: self._commit_and_move(0, -1))
+            editor.bind("<Escape>", self.cancel_edit)
+        # The dealer dropdown takes focus while open, so only the Entry commits on focus loss
+        self.entry_editor.bind("<FocusOut>", lambda e: self.commit_edit())
+        self.dealer_editor.bind("<<ComboboxSelected>>", lambda e: self._commit_and_move(0, 0))
+        self.dealer_editor.bind("<KeyRelease>", Debouncer(self.dealer_editor, 150, self._filter_dealers))
+        # The row being edited recalculates as it is typed, not only on commit
+        self.edit_var.trace_add("write", lambda *args: self._live_update())
+        self.dealer_var.trace_add("write", lambda *args: self._live_update())
+
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<Double-1>", self._on_double_click)
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self._show_status())
+        self.tree.bind("<Left>", lambda e: self._move(0, -1))
+        self.tree.bind("<Right>", lambda e: self._move(0, 1))
+        self.tree.bind("<Return>", lambda e: self.edit_cell(self.current_row(), EDITABLE[self.column]))
+        self.tree.bind("<F2>", lambda e: self.edit_cell(self.current_row(), EDITABLE[self.column]))
+        self.tree.bind("<Delete>", lambda e: self.remove_selected())
+        self.tree.bind("<Control-c>", self.copy)
+        self.tree.bind("<Control-v>", self.paste)
+        self.tree.bind("<Key>", self._on_key)
+
+    # ---------- model ----------
+    def recalculate(self, row):
+        """Refresh the row's saved fields from its cells, as the old Calc button did."""
+        cells = row["cells"]
+        row.update({key: cells[key] for key in TEXT_FIELDS})
+        for key in CALCULATED:
+            row.pop(key, None)
+        if is_blank(row):
+            row["details"] = ""
+            return
+        dealer = self.dealer_map.get(cells["dealer"])
+        if dealer is None:
+            saved = row.get("saved_dealer")
+            if saved is None or saved[0] != cells["dealer"]:
+                row["details"] = "Select valid dealer"
+                return
+            # A saved dealer whose distance has since left the slab keeps its saved id and km
+            dealer = (saved[1], None, None, saved[2])
+        dealer_id, name, place, km = dealer
+        try:
+            bags = int(cells["bags"])
+        except ValueError:
+            row["details"] = "Invalid input"
+            return
+        mt = bags * 0.05
+        mtk = mt * km
+        amount = self.rate * (mtk if self.is_mtk else mt)
+        row.update({
+            "dealer_id": dealer_id, "dealer_name": name, "dealer_place": place,
+            "km": km, "bags": bags, "mt": mt, "mtk": mtk, "amount": amount,
+        })
+        row["details"] = details_text(row)
+
+    def _add_totals(self, values, sign=1):
+        # Rounded so adding and taking away the same rows leaves no float residue
+        for i, value in enumerate(values):
+            self.totals[i] = round(self.totals[i] + sign * value, 6)
+
+    def update_row(self, index):
+        """Recalculate one row and move the totals by its change alone."""
+        row = self.rows[index]
+        before = row_totals(row)
+        self.recalculate(row)
+        self._add_totals(before, -1)
+        self._add_totals(row_totals(row))
+        self._render_row(index)
+        self._changed()
+
+    def _changed(self):
+        """Call ``on_change`` once per idle cycle however many rows changed."""
+        if self._change_pending is None:
+            self._change_pending = self.after_idle(self._flush_change)
+
+    def _flush_change(self):
+        self._change_pending = None
+        self.on_change()
+
+    def destroy(self):
+        if self._change_pending is not None:
+            self.after_cancel(self._change_pending)
+            self._change_pending = None
+        super().destroy()
+
+    def add_row(self, cells=None):
+        row = make_row(cells)
+        self.recalculate(row)
+        self.rows.append(row)
+        self._add_totals(row_totals(row))
+        self._insert_item(len(self.rows) - 1)
+        self._fit_height()
+        self._changed()
+        return row
+
+    def fill_row(self, cells):
+        """Put ``cells`` in the trailing blank row, or in a new row when there is none."""
+        if self.rows and is_blank(self.rows[-1]):
+            index = len(self.rows) - 1
+            self.rows[index]["cells"].update(cells)
+            self.update_row(index)
+            return self.rows[index]
+        return self.add_row(cells)
+
+    def add_rows(self, cells_list):
+        """Add many rows (the first into a trailing blank row) with one render and one totals update."""
+        self.cancel_edit()
+        if cells_list and self.rows and is_blank(self.rows[-1]):
+            self._add_totals(row_totals(self.rows.pop()), -1)
+        for cells in cells_list:
+            row = make_row(cells)
+            self.recalculate(row)
+            self.rows.append(row)
+            self._add_totals(row_totals(row))
+        self._render()
+        self._changed()
+
+    def load_rows(self, rows):
+        """Replace every row with ready-made ``make_row`` rows (saved values kept as they are)."""
+        self.cancel_edit()
+        self.rows[:] = rows
+        self.totals = [0, 0.0, 0.0, 0.0]
+        for row in rows:
+            self._add_totals(row_totals(row))
+        self._render()
+        self._changed()
+
+    def remove_selected(self):
+        indexes = sorted((int(item) for item in self.tree.selection()), reverse=True)
+        if not indexes:
+            return "break"
+        self.cancel_edit()
+        for index in indexes:
+            self._add_totals(row_totals(self.rows.pop(index)), -1)
+        self._render()
+        if self.rows:
+            self._move_to(min(indexes[-1], len(self.rows) - 1), self.column)
+        self._changed()
+        return "break"
+
+    def set_cell(self, row_index, key, value):
+        row = self.rows[row_index]
+        if row["cells"][key] == value:
+            return False
+        row["cells"][key] = value
+        if key == "dealer" and value in self.dealer_map:
+            _, name, place, _ = self.dealer_map[value]
+            row["cells"]["despatched_to"] = f"{name}, {place}"
+        return True
+
+    def set_dealers(self, dealer_map, dealer_matcher):
+        self.dealer_map = dealer_map
+        self.dealer_matcher = dealer_matcher
+
+    # ---------- view ----------
+    def _values(self, row):
+        return [row["cells"][key] for key in EDITABLE] + [row["details"]]
+
+    def _insert_item(self, index):
+        self.tree.insert("", END, iid=str(index), values=self._values(self.rows[index]))
+
+    def _render_row(self, index):
+        self.tree.item(str(index), values=self._values(self.rows[index]))
+
+    def _render(self):
+        self.tree.delete(*self.tree.get_children())
+        for index in range(len(self.rows)):
+            self._insert_item(index)
+        self._fit_height()
+
+    def _fit_height(self):
+        self.tree.configure(height=max(1, min(len(self.rows), MAX_VISIBLE_ROWS)))
+
+    def current_row(self):
+        focus = self.tree.focus()
+        return int(focus) if focus else 0
+
+    def _show_status(self):
+        if not self.rows:
+            self.status.config(text="")
+            return
+        self.status.config(text=f"Row {self.current_row() + 1} of {len(self.rows)} · "
+                                f"{HEADINGS[EDITABLE[self.column]]} · Enter to edit, Ctrl+V to paste")
+
+    def _move_to(self, row_index, column):
+        if not self.rows:
+            return
+        row_index = max(0, min(row_index, len(self.rows) - 1))
+        self.column = max(0, min(column, len(EDITABLE) - 1))
+        item = str(row_index)
+        self.tree.selection_set(item)
+        self.tree.focus(item)
+        self.tree.see(item)
+        self._show_status()
+
+    def _move(self, rows, columns):
+        self._move_to(self.current_row() + rows, self.column + columns)
+        return "break"
+
+    def _cell_at(self, event):
+        item = self.tree.identify_row(event.y)
+        column = self.tree.identify_column(event.x)
+        if not item or not column:
+            return None
+        key = COLUMNS[int(column[1:]) - 1][0]
+        return int(item), key
+
+    def _on_click(self, event):
+        self.commit_edit()
+        cell = self._cell_at(event)
+        if cell and cell[1] in EDITABLE:
+            self.column = EDITABLE.index(cell[1])
+        self.tree.focus_set()
+
+    def _on_double_click(self, event):
+        cell = self._cell_at(event)
+        if cell and cell[1] in EDITABLE:
+            self.edit_cell(*cell)
+        return "break"
+
+    def _on_key(self, event):
+        # Typing over a cell starts editing it with that character
+        if event.char and event.char.isprintable() and not event.state & 0x0004:
+            self.edit_cell(self.current_row(), EDITABLE[self.column], initial=event.char)
+            return "break"
+
+    # ---------- editing ----------
+    def edit_cell(self, row_index, key, initial=None):
+        self.commit_edit()
+        if not self.rows:
+            return "break"
+        self._move_to(row_index, EDITABLE.index(key))
+        self.tree.update_idletasks()
+        bbox = self.tree.bbox(str(row_index), key)
+        if not bbox:
+            return "break"
+        value = self.rows[row_index]["cells"][key] if initial is None else initial
+        if key == "dealer":
+            editor = self.dealer_editor
+            editor["values"] = self.dealer_matcher.search(value, limit=100)
+        else:
+            editor = self.entry_editor
+        editor.delete(0, END)
+        editor.insert(0, value)
+        if initial is None:
+            editor.select_range(0, END)
+        x, y, width, height = bbox
+        editor.place(x=x, y=y, width=width, height=height)
+        editor.focus_set()
+        editor.icursor(END)
+        # The cells as they were, for Escape to undo what the live update changed
+        self._editing = (row_index, key, editor, dict(self.rows[row_index]["cells"]))
+        if initial is not None:
+            self._live_update()
+        return "break"
+
+    def commit_edit(self):
+        if not self._editing:
+            return
+        row_index, key, editor, _ = self._editing
+        self._editing = None
+        value = editor.get().strip()
+        editor.place_forget()
+        if key == "dealer" and value and value not in self.dealer_map:
+            # Best ranked match for what was typed, as the search row does on Enter
+            matches = self.dealer_matcher.search(value, limit=1)
+            value = matches[0] if matches else value
+        if row_index < len(self.rows) and self.set_cell(row_index, key, value):
+            self.update_row(row_index)
+
+    def cancel_edit(self, event=None):
+        if self._editing:
+            row_index, _, editor, cells = self._editing
+            self._editing = None
+            editor.place_forget()
+            if row_index < len(self.rows) and self.rows[row_index]["cells"] != cells:
+                self.rows[row_index]["cells"] = cells
+                self.update_row(row_index)
+            self.tree.focus_set()
+        return "break"
+
+    def _live_update(self):
+        """Recalculate the edited row from the editor's text: bags as typed, a dealer once it is exact."""
+        if not self._editing or self._editing[1] not in LIVE_FIELDS:
+            return
+        row_index, key, editor, _ = self._editing
+        value = editor.get().strip()
+        if key == "dealer" and value not in self.dealer_map:
+            return
+        if row_index < len(self.rows) and self.set_cell(row_index, key, value):
+            self.update_row(row_index)
+
+    def _commit_and_move(self, rows, columns):
+        if not self._editing:
+            return "break"
+        row_index = self._editing[0]
+        self.commit_edit()
+        self.tree.focus_set()
+        column = self.column + columns
+        if column >= len(EDITABLE):
+            row_index, column = row_index + 1, 0
+        elif column < 0:
+            row_index, column = row_index - 1, len(EDITABLE) - 1
+        row_index += rows
+        if row_index >= len(self.rows) and rows:
+            self.add_row()
+        self._move_to(max(row_index, 0), column)
+        return "break"
+
+    def _filter_dealers(self, event=None):
+        if self._editing and self._editing[1] == "dealer":
+            self.dealer_editor["values"] = self.dealer_matcher.search(self.dealer_var.get(), limit=100)
+
+    # ---------- clipboard ----------
+    def copy(self, event=None):
+        indexes = sorted(int(item) for item in self.tree.selection())
+        if indexes:
+            self.clipboard_clear()
+            self.clipboard_append("\n".join(
+                "\t".join(self.rows[i]["cells"][key] for key in EDITABLE) for i in indexes
+            ))
+        return "break"
+
+    def paste(self, event=None):
+        """Paste tab-separated cells from the focused cell on, adding rows as needed."""
+        try:
+            text = self.clipboard_get()
+        except TclError:
+            return "break"
+        lines = [line.split("\t") for line in text.splitlines()]
+        while lines and not any(cell.strip() for cell in lines[-1]):
+            lines.pop()
+        if not lines:
+            return "break"
+        self.cancel_edit()
+        start_row = self.current_row() if self.rows else 0
+        for offset, cells in enumerate(lines):
+            index = start_row + offset
+            if index >= len(self.rows):
+                self.rows.append(make_row())
+            row = self.rows[index]
+            self._add_totals(row_totals(row), -1)
+            for column, value in enumerate(cells[:len(EDITABLE) - self.column], self.column):
+                self.set_cell(index, EDITABLE[column], value.strip())
+            self.recalculate(row)
+            self._add_totals(row_totals(row))
+        self._render()
+        self._move_to(start_row, self.column)
+        self._changed()
+        return "break"
@@ -0,0 +1,120 @@
+"""Incremental dealer matching for the dealer picker comboboxes.
+
+A ``DealerMatcher`` is built once per dealer list. It keeps lowercase keys and
+trigram postings so each keystroke only touches candidates, and narrows the
+previous result when the query just grew. Results are ranked: code prefix,
+name prefix, substring, then fuzzy (shared trigrams).
+"""
+import re
+from collections import defaultdict
+from math import ceil
+
+CODE_PREFIX, NAME_PREFIX, SUBSTRING, FUZZY = range(4)
+
+# Share of the query's trigrams a key needs for a fuzzy match
+FUZZY_THRESHOLD = 0.6
+
+
+def normalize(text):
+    """Lowercase with punctuation folded to single spaces."""
+    return re.sub(r"[^0-9a-z]+", " ", text.lower()).strip()
+
+
+def trigrams(text):
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DealerMatcher:
+    def __init__(self, items):
+        """``items``: iterable of (display_key, code, name)."""
+        self.keys = []
+        self._lower = []
+        self._codes = []
+        self._names = []
+        self._postings = defaultdict(set)
+        for index, (key, code, name) in enumerate(items):
+            code = str(code or "").lower()
+            # The code is searchable even when the display key does not show it
+            lower = f"{key.lower()} {code}"
+            self.keys.append(key)
+            self._lower.append(lower)
+            self._codes.append(code)
+            self._names.append(str(name or "").lower())
+            for gram in trigrams(lower):
+                self._postings[gram].add(index)
+        self._last_query = None
+        self._last_hits = None
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _substring_hits(self, query):
+        # Typing one more character can only shrink the substring matches
+        if self._last_query and query.startswith(self._last_query):
+            pool = self._last_hits
+        elif len(query) >= 3 and normalize(query) == query:
+            grams = [self._postings.get(g, set()) for g in trigrams(query) if g.strip() == g]
+            pool = set.intersection(*grams) if grams else range(len(self.keys))
+        else:
+            pool = range(len(self.keys))
+        hits = {i for i in pool if query in self._lower[i]}
+        self._last_query, self._last_hits = query, hits
+        return hits
+
+    def _fuzzy_hits(self, query, exclude):
+        grams = trigrams(query)
+        needed = max(1, ceil(len(grams) * FUZZY_THRESHOLD))
+        counts = defaultdict(int)
+        for gram in grams:
+            for i in self._postings.get(gram, ()):
+                counts[i] += 1
+        return [(i, n) for i, n in counts.items() if n >= needed and i not in exclude]
+
+    def search(self, text, limit=50):
+        """Up to ``limit`` display keys best matching ``text``."""
+        query = text.strip().lower()
+        if not query:
+            self._last_query = self._last_hits = None
+            return self.keys[:limit] if limit else list(self.keys)
+
+        ranked = []
+        hits = self._substring_hits(query)
+        for i in hits:
+            if self._codes[i].startswith(query):
+                tier = CODE_PREFIX
+            elif self._names[i].startswith(query) or self._lower[i].startswith(query):
+                tier = NAME_PREFIX
+            else:
+                tier = SUBSTRING
+            ranked.append((tier, self._lower[i].find(query), len(self.keys[i]), i))
+
+        if len(ranked) < (limit or len(self.keys)) and len(query) >= 3:
+            for i, shared in self._fuzzy_hits(query, hits):
+                ranked.append((FUZZY, -shared, len(self.keys[i]), i))
+
+        ranked.sort()
+        if limit:
+            ranked = ranked[:limit]
+        return [self.keys[r[-1]] for r in ranked]
+
+
+class Debouncer:
+    """Call ``callback`` once, ``delay`` ms after the last of a burst of calls."""
+
+    def __init__(self, widget, delay, callback):
+        self.widget = widget
+        self.delay = delay
+        self.callback = callback
+        self._job = None
+
+    def __call__(self, *args):
+        if self._job is not None:
+            self.widget.after_cancel(self._job)
+        self._job = self.widget.after(self.delay, lambda: self._fire(args))
+
+    def _fire(self, args):
+        self._job = None
+        # The row may have been removed while the timer was pending
+        if self.widget.winfo_exists():
+            self.callback(*args)
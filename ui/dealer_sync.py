@@ -0,0 +1,48 @@
+"""Review dialog for a dealer master sync.
+
+Shows the dry-run diff of a workbook against the dealer table (new,
+changed and to-be-deactivated dealers; unchanged ones are only counted)
+and calls ``on_apply`` when the user accepts it.
+"""
+from tkinter import *
+from tkinter import ttk
+
+
+class DealerSyncDialog(Toplevel):
+    def __init__(self, master, diff, file_name, on_apply):
+        super().__init__(master)
+        self.title(f"Sync Dealers - {file_name}")
+        self.geometry("760x480")
+        self.on_apply = on_apply
+
+        Label(self, text=diff.summary(), font=("Arial", 11, "bold")).pack(anchor=W, padx=10, pady=(10, 5))
+
+        list_frame = Frame(self)
+        list_frame.pack(fill=BOTH, expand=True, padx=10)
+        self.tree = ttk.Treeview(list_frame, columns=("Change", "Code", "Name", "Details"), show="headings")
+        for col, width in (("Change", 90), ("Code", 100), ("Name", 220), ("Details", 330)):
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=width, anchor=W)
+        scrollbar = ttk.Scrollbar(list_frame, orient=VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+        scrollbar.pack(side=RIGHT, fill=Y)
+
+        for code, name in diff.new:
+            self.tree.insert("", END, values=("New", code, name, ""))
+        for code, name, details in diff.changed:
+            self.tree.insert("", END, values=("Changed", code, name, "; ".join(details)))
+        for code, name in diff.missing:
+            self.tree.insert("", END, values=("Deactivate", code, name, "not in workbook"))
+
+        button_frame = Frame(self)
+        button_frame.pack(pady=10)
+        Button(button_frame, text="Apply Changes", command=self.apply).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Cancel", command=self.destroy).pack(side=LEFT, padx=5)
+
+        self.transient(master)
+        self.grab_set()
+
+    def apply(self):
+        self.destroy()
+        self.on_apply()
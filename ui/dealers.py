@@ -1,8 +1,27 @@
 from tkinter import *
 from tkinter import messagebox, filedialog
-from tkinter.ttk import Treeview, Combobox
+from tkinter import ttk
+from tkinter.ttk import Combobox
 from datetime import datetime
-import pandas as pd
+import os
+from db.dealer_import import read_dealer_workbook, save_dealer_import
+from db.dealer_search import search_dealers
+from db.dealer_sync import sync_dealers, last_sync
+from ui.dealer_sync import DealerSyncDialog
+from ui.virtual_list import VirtualList
+from ui.executor import submit_file_job, submit_query
+
+DEALER_LIST_SQL = """
+    SELECT dealer.id, dealer.code, dealer.name, dealer.place, dealer.pincode, dealer.mobile,
+        dealer.distance, destination.name
+    FROM dealer
+    LEFT JOIN destination ON dealer.destination_id = destination.id
+    ORDER BY dealer.id
+"""
+
+# The full list can run to thousands of lines for a large workbook
+MAX_WARNINGS_SHOWN = 20
+
 
 class DealerManager:
     def __init__(self, master_frame, home_frame, conn):
@@ -53,6 +72,10 @@ class DealerManager:
         Button(self.form, text="Delete Dealer", command=self.delete_dealer).grid(row=7, column=2, pady=10)
         
         Button(self.form, text="Import Dealers from File", command=self.import_dealers_from_file).grid(row=8, column=1, pady=10)
+        Button(self.form, text="Sync Dealers from File", command=self.sync_dealers_from_file).grid(row=8, column=2, pady=10)
+        self.import_progress = ttk.Progressbar(self.form, mode="determinate", length=200)
+        self.import_progress.grid(row=9, column=0, columnspan=3, pady=(0, 10))
+        self.import_progress.grid_remove()
         
         # Search bar
         search_frame = Frame(self.master_frame)
@@ -68,9 +91,10 @@ class DealerManager:
         
         search_entry.bind("<Return>", lambda e: self.search_dealers())
 
-        self.dealer_list = Treeview(
+        # Only the visible rows are rendered; the rest are fetched as the list scrolls
+        self.dealer_list = VirtualList(
             self.master_frame,
-            columns=("ID", "Code", "Name", "Place", "Pincode", "Mobile", "Distance", "Destination"),
+            columns=("ID", "Code", "Name", "Place", "Pincode", "Mobile", "Distance", "Destination", "Match"),
             show="headings"
         )
 
@@ -91,20 +115,23 @@ class DealerManager:
     
     def load_destinations(self):
         """Load destinations from DB and update the combobox and internal map."""
-        try:
-            self.cursor.execute("SELECT id, name FROM destination ORDER BY name")
-            dest_rows = self.cursor.fetchall()
-            # Build mapping and the combobox values
-            self.destination_map = {f"{id} - {name}": id for id, name in dest_rows}
-            values = list(self.destination_map.keys())
-            self.destination_cb['values'] = values
-
-            # clear selection if current selection is no longer valid
-            cur = self.destination_cb.get()
-            if cur not in values:
-                self.destination_cb.set('')  # no selection
-        except Exception as e:
-            messagebox.showerror("DB Error", f"Failed to load destinations: {e}")
+        submit_query(
+            self.conn, lambda conn: conn.execute("SELECT id, name FROM destination ORDER BY name").fetchall(),
+            on_done=self.show_destinations,
+            on_error=lambda e: messagebox.showerror("DB Error", f"Failed to load destinations: {e}"),
+            key=("dealers", "destinations"), busy=self.master_frame
+        )
+
+    def show_destinations(self, dest_rows):
+        # Build mapping and the combobox values
+        self.destination_map = {f"{id} - {name}": id for id, name in dest_rows}
+        values = list(self.destination_map.keys())
+        self.destination_cb['values'] = values
+
+        # clear selection if current selection is no longer valid
+        cur = self.destination_cb.get()
+        if cur not in values:
+            self.destination_cb.set('')  # no selection
 
         
     def search_dealers(self):
@@ -113,21 +140,8 @@ class DealerManager:
             self.load_dealers()
             return
 
-        for row in self.dealer_list.get_children():
-            self.dealer_list.delete(row)
-
-        sql = """
-            SELECT dealer.id, dealer.code, dealer.name, dealer.place, dealer.pincode, dealer.mobile,
-                dealer.distance, destination.name
-            FROM dealer
-            LEFT JOIN destination ON dealer.destination_id = destination.id
-            WHERE dealer.code LIKE ? OR dealer.name LIKE ? OR dealer.place LIKE ? 
-                OR dealer.mobile LIKE ? OR destination.name LIKE ? """
-        like_query = f"%{query}%"
-        self.cursor.execute(sql, (like_query, like_query, like_query, like_query, like_query))
-
-        for row in self.cursor.fetchall():
-            self.dealer_list.insert("", END, values=row)
+        # Prefix match on every word, best ranked first; "Match" shows the hit in [brackets]
+        self.dealer_list.set_rows_from(self.conn, lambda conn: search_dealers(conn.cursor(), query))
 
 
     def get_entry(self, field):
@@ -138,23 +152,12 @@ class DealerManager:
             entry.delete(0, END)
 
     def load_dealers(self):
-        for row in self.dealer_list.get_children():
-            self.dealer_list.delete(row)
-
-        self.cursor.execute("""
-            SELECT dealer.id, dealer.code, dealer.name, dealer.place, dealer.pincode, dealer.mobile,
-                dealer.distance, destination.name
-            FROM dealer
-            LEFT JOIN destination ON dealer.destination_id = destination.id
-        """)
-        for row in self.cursor.fetchall():
-            self.dealer_list.insert("", END, values=row)
+        self.dealer_list.set_query(self.conn, DEALER_LIST_SQL)
 
     def on_select(self, event):
-        selected = self.dealer_list.focus()
-        if not selected:
+        values = self.dealer_list.selected_values()
+        if not values:
             return
-        values = self.dealer_list.item(selected, 'values')
         keys = ["code", "name", "place", "pincode", "mobile", "distance"]
         for key, value in zip(keys, values[1:]):
             self.entries[key].delete(0, END)
@@ -188,12 +191,12 @@ class DealerManager:
 
 
     def update_dealer(self):
-        selected = self.dealer_list.focus()
+        selected = self.dealer_list.selected_values()
         if not selected:
             messagebox.showerror("Selection Error", "Please select a dealer to update")
             return
 
-        dealer_id = self.dealer_list.item(selected, 'values')[0]
+        dealer_id = selected[0]
         destination_id = self.destination_map.get(self.destination_cb.get())
 
         try:
@@ -218,11 +221,11 @@ class DealerManager:
             messagebox.showerror("Database Error", str(e))
 
     def delete_dealer(self):
-        selected = self.dealer_list.focus()
+        selected = self.dealer_list.selected_values()
         if not selected:
             messagebox.showerror("Selection Error", "Please select a dealer to delete")
             return
-        dealer_id = self.dealer_list.item(selected, 'values')[0]
+        dealer_id = selected[0]
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this dealer?"):
             try:
                 self.cursor.execute("DELETE FROM dealer WHERE id=?", (dealer_id,))
@@ -235,6 +238,12 @@ class DealerManager:
 
 
     def import_dealers_from_file(self, file_path=None):
+        self.read_workbook(file_path, self.save_imported_sheets)
+
+    def sync_dealers_from_file(self, file_path=None):
+        self.read_workbook(file_path, self.review_dealer_sync)
+
+    def read_workbook(self, file_path, on_parsed):
         # If no file_path is provided, open file dialog
         if not file_path:
             file_path = filedialog.askopenfilename(
@@ -243,97 +252,90 @@ class DealerManager:
             )
             if not file_path:
                 return  # User cancelled the file selection
-        
+
+        def on_progress(chunk):
+            done, total, parsed = chunk
+            self.import_progress["maximum"] = max(total, 1)
+            self.import_progress["value"] = done
+            if parsed is not None:
+                self.import_progress.grid_remove()
+                on_parsed(parsed, file_path)
+
+        # Parsing and cleaning the workbook runs on the file worker, one sheet at a time,
+        # so the page loaders queued on the query executor are not held up behind it
+        self.import_progress["value"] = 0
+        self.import_progress.grid()
+        submit_file_job(
+            lambda: read_dealer_workbook(file_path),
+            on_chunk=on_progress,
+            on_error=self.on_import_error,
+            key=("dealers", "import"), busy=self.master_frame
+        )
+
+    def on_import_error(self, e):
+        self.import_progress.grid_remove()
+        messagebox.showerror("Import Error", f"Failed to import dealers: {str(e)}")
+
+    def save_imported_sheets(self, parsed, file_path=None):
+        """Write the parsed workbook (a ``DealerImport``) to the dealer table."""
         try:
-            # Read the Excel file
-            excel_file = pd.ExcelFile(file_path)
-            
-            # Get all sheet names
-            sheet_names = excel_file.sheet_names
-            
-            skipped_rows = []
-            
-            for sheet_name in sheet_names:
-                # Skip empty sheets (like Sheet1)
-                if sheet_name == "Sheet1":
-                    continue
-                    
-                # Check if destination exists by name or place (case-insensitive)
-                self.cursor.execute(
-                    "SELECT id FROM destination WHERE UPPER(name) = UPPER(?) OR UPPER(place) = UPPER(?)",
-                    (sheet_name, sheet_name)
-                )
-                dest_result = self.cursor.fetchone()
-                
-                if dest_result:
-                    destination_id = dest_result[0]
-                else:
-                    # Insert new destination if no match found
-                    self.cursor.execute(
-                        "INSERT INTO destination (name, place) VALUES (?, ?)",
-                        (sheet_name, sheet_name)
-                    )
-                    self.conn.commit()
-                    destination_id = self.cursor.lastrowid
-                
-                # Read the sheet data
-                df = pd.read_excel(file_path, sheet_name=sheet_name)
-                
-                # Ensure column names match the expected format
-                df.columns = ['Dealer code', 'NAME', 'Place', 'Pin Code', 'Mob No.', 'Distance']
-                
-                # Insert each row into the dealer table
-                for index, row in df.iterrows():
-                    code = str(row['Dealer code']).strip()
-                    # append 'FOL' to the dealer name
-                    name = f"{str(row['NAME']).strip()} FOL"
-                    place = str(row['Place']).strip()
-                    pincode = str(row['Pin Code']).strip()
-                    mobile = str(row['Mob No.']).strip() if not pd.isna(row['Mob No.']) else ""
-                    
-                    # Handle distance: set to None for 'NIL' or non-numeric values
-                    distance = None
-                    if not pd.isna(row['Distance']):
-                        if str(row['Distance']).strip().upper() == 'NIL':
-                            skipped_rows.append(f"Sheet: {sheet_name}, Dealer: {code}, Distance set to NULL (was 'NIL')")
-                        else:
-                            try:
-                                distance = float(row['Distance'])
-                            except (ValueError, TypeError):
-                                skipped_rows.append(f"Sheet: {sheet_name}, Dealer: {code}, Distance set to NULL (invalid: {row['Distance']})")
-                    
-                    # Skip rows with missing required fields
-                    if not code or not name:
-                        skipped_rows.append(f"Sheet: {sheet_name}, Row: {index+2}, Missing code or name")
-                        continue
-                    
-                    try:
-                        self.cursor.execute(
-                            """
-                            INSERT OR IGNORE INTO dealer 
-                            (code, name, place, pincode, mobile, distance, destination_id) 
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                            """,
-                            (code, name, place, pincode, mobile, distance, destination_id)
-                        )
-                    except Exception as e:
-                        skipped_rows.append(f"Sheet: {sheet_name}, Dealer: {code}, Error: {str(e)}")
-                        continue
-                
-                self.conn.commit()
-            
-            # Reload the dealers in the UI
-            self.load_dealers()
-            self.clear_fields()
-            
-            # Show success message with warning about skipped rows or NULL distances
-            message = f"Dealers imported successfully from {len(sheet_names)-1} destinations"
-            if skipped_rows:
-                message += f"\n\nWarnings:\n" + "\n".join(skipped_rows)
-            messagebox.showinfo("Success", message)
-            
+            added = save_dealer_import(self.cursor, parsed)
+            # One commit for the whole workbook, after the index rebuild
+            self.conn.commit()
         except Exception as e:
+            self.conn.rollback()
             messagebox.showerror("Import Error", f"Failed to import dealers: {str(e)}")
+            return
+
+        # Reload the dealers in the UI
+        self.load_dealers()
+        self.clear_fields()
+
+        # Show success message with warning about skipped rows or NULL distances
+        message = f"{added} dealers imported successfully from {len(parsed.sheets)} destinations"
+        warnings = parsed.warnings
+        if warnings:
+            message += "\n\nWarnings:\n" + "\n".join(warnings[:MAX_WARNINGS_SHOWN])
+            if len(warnings) > MAX_WARNINGS_SHOWN:
+                message += f"\n... and {len(warnings) - MAX_WARNINGS_SHOWN} more"
+        messagebox.showinfo("Success", message)
+
+    def review_dealer_sync(self, parsed, file_path):
+        """Dry-run the sync and let the user review the changes before applying them."""
+        file_name = os.path.basename(file_path)
+        last = last_sync(self.cursor)
+        if last and last[0] == parsed.content_hash:
+            if not messagebox.askyesno(
+                "No Changes",
+                f"This workbook matches the last dealer sync ({last[1]}).\n\nCompare it anyway?"
+            ):
+                return
+        try:
+            diff = sync_dealers(self.cursor, parsed)
+        except Exception as e:
+            messagebox.showerror("Sync Error", f"Failed to compare dealers: {str(e)}")
+            return
+        finally:
+            # The dry run may have added destinations for new sheets
+            self.conn.rollback()
+
+        if not (diff.new or diff.changed or diff.missing):
+            self.apply_dealer_sync(parsed, file_name)
+            return
+        DealerSyncDialog(self.master_frame, diff, file_name, lambda: self.apply_dealer_sync(parsed, file_name))
+
+    def apply_dealer_sync(self, parsed, file_name):
+        try:
+            diff = sync_dealers(self.cursor, parsed, apply=True, file_name=file_name)
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            messagebox.showerror("Sync Error", f"Failed to sync dealers: {str(e)}")
+            return
+        self.load_dealers()
+        self.load_destinations()
+        self.clear_fields()
+        messagebox.showinfo("Success", f"Dealers synced from {len(parsed.sheets)} destinations: {diff.summary()}")
 
 # To initialize the page:
 # DealerManager(frame, home_frame, conn)
@@ -2,15 +2,29 @@ from tkinter import *
 import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 import os
 import json
 from tkcalendar import DateEntry
-from reportlab.lib.units import mm
-from reportlab.platypus import KeepTogether
+from db.bill_totals import bill_ids_for_entries, refresh_bill_totals
+from db.entry_summary import refresh_entry_summaries
+from db.entry_form import dealer_key, load_destination_dealers, load_entry_form, slab_dealers
+from db.dispatches import parse_dispatch_text, resolve_dispatches
+from db.entry_writes import write_destination_entry
+from db.rate_card import get_rate_card
+from ui.dealer_grid import DealerGrid, is_blank, make_row
+from ui.dealer_matcher import DealerMatcher, Debouncer
+from ui.dispatch_paste import PasteDispatchesDialog
+from ui.executor import submit_query
+from ui.print_jobs import submit_print
+from reports.entry_report import load_entry_snapshot, entry_file_stem
+from reports.pdf_template import StageTimer
+from db.mda import (allocate_mda_numbers, claim_mda_number, mda_in_use,
+                    normalize_mda, peek_mda_number)
+
+
+def totals_text(bags, mt, mtk, amount):
+    return f"Total Bags: {bags} | MT: {mt:.2f} | MTK: {mtk:.2f} | ₹{amount:.2f}"
+
 
 class DestinationEntryPage:
     def __init__(self, frame, home_frame, conn):
@@ -20,8 +34,7 @@ class DestinationEntryPage:
         self.c = conn.cursor()
         self.editing_mode = False
         self.destination_entry_id = None
-        self.range_entry_ids = {}   # key = range_index, value = range_entry_id
-        self.dealer_entry_ids = {}  # key = (range_index, dealer_index), value = dealer_entry_id
+        # Saved ids live on the form itself: frame.range_entry_id and row['dealer_entry_id']
         self.save_button = Button(self.frame, text="💾 Save Entry", font=("Arial", 12), command=self.save_entries)
         self.print_button = Button(self.frame, text="🖨️ Print Entry", font=("Arial", 12), command=self.print_entry)
         
@@ -32,56 +45,47 @@ class DestinationEntryPage:
         self.used_ranges = set()
         self.range_frames = []
 
-        self.c.execute('''CREATE TABLE IF NOT EXISTS destination_entry (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            destination_id INTEGER,
-            letter_note TEXT,
-            bill_number TEXT,
-            date TEXT,
-            to_address TEXT,
-            main_bill_id INTEGER DEFAULT NULL,
-            FOREIGN KEY (destination_id) REFERENCES destination(id),
-            FOREIGN KEY (main_bill_id) REFERENCES main_bill(id)
-        )''')
-
-        self.c.execute('''CREATE TABLE IF NOT EXISTS range_entry (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            destination_entry_id INTEGER,
-            rate_range_id INTEGER,
-            rate REAL,  
-            total_bags INTEGER,
-            total_mt REAL,
-            total_mtk REAL,
-            total_amount REAL,
-            FOREIGN KEY (destination_entry_id) REFERENCES destination_entry(id),
-            FOREIGN KEY (rate_range_id) REFERENCES rate_range(id)
-        )''')
-
-        self.c.execute('''CREATE TABLE IF NOT EXISTS dealer_entry (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            range_entry_id INTEGER,
-            dealer_id INTEGER,
-            despatched_to TEXT,
-            km REAL,
-            no_bags INTEGER,
-            rate REAL,
-            mt REAL,
-            mtk REAL,
-            amount REAL,
-            mda_number TEXT,
-            date TEXT,
-            description TEXT DEFAULT 'FACTOM FOS',
-            remarks TEXT,
-            FOREIGN KEY (range_entry_id) REFERENCES range_entry(id),
-            FOREIGN KEY (dealer_id) REFERENCES dealer(id)
-        )''')
-
         self.build_ui()
         
     def get_next_mda_number(self):
-        self.c.execute("SELECT MAX(mda_number) FROM dealer_entry")  # table that stores dealer rows
-        result = self.c.fetchone()[0]
-        return (result + 1) if type(result) is int else 1
+        # Only a suggestion; the number is allocated when the dealer is added
+        return peek_mda_number(self.c)
+
+    def form_mda_numbers(self):
+        return {
+            normalize_mda(row['cells']['mda_number'])
+            for frame in self.range_frames
+            for row in frame.dealer_rows
+        } - {''}
+
+    def saved_dealer_entry_ids(self):
+        return [
+            row['dealer_entry_id']
+            for frame in self.range_frames
+            for row in frame.dealer_rows
+            if row.get('dealer_entry_id')
+        ]
+
+    def store_saved_ids(self, range_entry_ids, dealer_entry_ids):
+        """Keep the ids ``write_destination_entry`` returned on the frames and rows they belong to."""
+        for frame, range_entry_id, row_ids in zip(self.range_frames, range_entry_ids, dealer_entry_ids):
+            frame.range_entry_id = range_entry_id
+            for row, dealer_entry_id in zip(frame.dealer_rows, row_ids):
+                if dealer_entry_id:
+                    row['dealer_entry_id'] = dealer_entry_id
+                else:
+                    row.pop('dealer_entry_id', None)
+
+    def claim_saved_mda_numbers(self):
+        """Advance the MDA sequence past numbers typed straight into the rows."""
+        numbers = [
+            int(normalize_mda(row['mda_number']))
+            for frame in self.range_frames
+            for row in frame.dealer_rows
+            if str(normalize_mda(row.get('mda_number')) or '').isdigit()
+        ]
+        if numbers:
+            claim_mda_number(self.conn, max(numbers))
 
 
     def build_ui(self):
@@ -135,7 +139,8 @@ class DestinationEntryPage:
 
         self.dealer_search_var = StringVar()
         self.dealer_search_cb = ttk.Combobox(dealer_select_frame, textvariable=self.dealer_search_var, width=70)
-        self.dealer_search_cb.bind('<KeyRelease>', self.filter_dealers)
+        # Only the last keystroke of a burst refreshes the dropdown
+        self.dealer_search_cb.bind('<KeyRelease>', Debouncer(self.frame, 150, self.filter_dealers))
         self.dealer_search_cb.bind('<Button-1>', lambda e: self.dealer_search_cb.event_generate('<Down>'))
         self.dealer_search_cb.bind('<Return>', lambda e: self.dealer_search_cb.event_generate('<Down>'))
         self.dealer_search_cb.grid(row=0, column=1, padx=5)
@@ -179,8 +184,19 @@ class DestinationEntryPage:
             command=self.add_dealer_by_search
         ).grid(row=0, column=9, padx=5)
 
+        # 📋 Paste a dispatch list copied from a spreadsheet
+        Button(
+            dealer_select_frame,
+            text="📋 Paste Dispatches",
+            command=self.paste_dispatches
+        ).grid(row=0, column=10, padx=5)
+
         self.range_container = Frame(self.frame)
         self.range_container.pack(fill='both', expand=True)
+
+        self.entry_totals_label = Label(self.frame, text="Entry " + totals_text(0, 0.0, 0.0, 0.0),
+                                        font=("Arial", 11, "bold"), fg="green")
+        self.entry_totals_label.pack(pady=5)
         
         self.load_destinations()
         self.load_entry_cache()
@@ -210,12 +226,8 @@ class DestinationEntryPage:
 
         low = current_text.strip().lower()
 
-        # filter values by substring match
-        all_keys = list(self.dealer_map.keys())
-        if low == "":
-            filtered = all_keys
-        else:
-            filtered = [k for k in all_keys if low in k.lower()]
+        # ranked matches: code prefix, name prefix, substring, then fuzzy
+        filtered = self.dealer_matcher.search(low, limit=None if low == "" else 100)
 
         # update combobox values without changing the text the user is typing
         self.dealer_search_cb['values'] = filtered
@@ -247,8 +259,8 @@ class DestinationEntryPage:
             self.add_dealer_by_search()
             return
 
-        # Otherwise, check if there's a close match
-        matches = [k for k in self.dealer_map.keys() if current_text.lower() in k.lower()]
+        # Otherwise, take the best ranked match
+        matches = self.dealer_matcher.search(current_text, limit=1)
         if matches:
             self.dealer_search_cb.set(matches[0])
             self.add_dealer_by_search()
@@ -283,6 +295,30 @@ class DestinationEntryPage:
             self.to_address_text.delete("1.0", "end")
             self.to_address_text.insert("1.0", data.get("to_address", ""))
 
+    def update_entry_totals(self):
+        """Entry totals from the slabs' running totals, a handful of additions."""
+        totals = [0, 0.0, 0.0, 0.0]
+        for frame in self.range_frames:
+            if hasattr(frame, 'dealer_grid'):
+                totals = [a + b for a, b in zip(totals, frame.dealer_grid.totals)]
+        self.entry_totals_label.config(text="Entry " + totals_text(*totals))
+
+    def form_slabs(self):
+        """The form's slabs as (range_entry_id, rate_range_id, rate, dealer_rows) for the write layer.
+
+        A filled-in row that does not calculate raises ValueError: the write
+        layer would skip it, and delete it if it was saved before.
+        """
+        for frame in self.range_frames:
+            if hasattr(frame, 'dealer_grid'):
+                frame.dealer_grid.commit_edit()
+                for index, row in enumerate(frame.dealer_rows, 1):
+                    if not is_blank(row) and 'dealer_id' not in row:
+                        slab = get_rate_card(self.c).get(frame.rate_range_id)
+                        raise ValueError(f"Range {slab.from_km}-{slab.to_km} km, row {index}: {row['details']}")
+        return [(frame.range_entry_id, frame.rate_range_id, frame.rate, frame.dealer_rows)
+                for frame in self.range_frames]
+
     def save_entries(self):
         selected_dest = self.destination_cb.get()
         if not selected_dest:
@@ -295,64 +331,24 @@ class DestinationEntryPage:
         date = self.date_entry.get().strip()
         to_address = self.to_address_text.get("1.0", END).strip()
 
+        header = {
+            'destination_id': destination_id, 'letter_note': letter_note,
+            'bill_number': bill_number, 'date': date, 'to_address': to_address,
+        }
+
         try:
-            self.c.execute("""
-                INSERT INTO destination_entry (destination_id, letter_note, bill_number, date, to_address)
-                VALUES (?, ?, ?, ?, ?)
-            """, (destination_id, letter_note, bill_number, date, to_address))
-            destination_entry_id = self.c.lastrowid
-            
-            saved_range_ids = {}
-            saved_dealer_ids = {}
-
-            for range_index, frame in enumerate(self.range_frames):
-                rate_range_id = frame.rate_range_id
-                rate = frame.rate
-                dealer_rows = frame.dealer_rows
-
-                total_bags = sum(row.get('bags', 0) for row in dealer_rows)
-                total_mt = sum(row.get('mt', 0.0) for row in dealer_rows)
-                total_mtk = sum(row.get('mtk', 0.0) for row in dealer_rows)
-                total_amount = sum(row.get('amount', 0.0) for row in dealer_rows)
-
-                # Insert range_entry with rate
-                self.c.execute("""
-                    INSERT INTO range_entry (
-                        destination_entry_id, rate_range_id, rate, total_bags,
-                        total_mt, total_mtk, total_amount
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    destination_entry_id, rate_range_id, rate,
-                    total_bags, total_mt, total_mtk, total_amount
-                ))
-                range_entry_id = self.c.lastrowid
-                saved_range_ids[range_index] = range_entry_id
-
-                for dealer_index, row in enumerate(dealer_rows):
-                    if 'dealer_id' not in row or 'bags' not in row:
-                        continue
-
-                    self.c.execute("""
-                        INSERT INTO dealer_entry (
-                            range_entry_id, dealer_id, despatched_to, km, no_bags, rate,
-                            mt, mtk, amount, mda_number, date, description, remarks
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        range_entry_id, row['dealer_id'], row['despatched_to'], row['km'], row['bags'],
-                        frame.rate, row['mt'], row['mtk'], row['amount'], 
-                        row['mda_number'], row['date'], 
-                        row.get('description', 'FACTOM FOS'), row.get('remarks', '')
-                    ))
-                    dealer_entry_id = self.c.lastrowid
-                    saved_dealer_ids[(range_index, dealer_index)] = dealer_entry_id
+            destination_entry_id, range_entry_ids, dealer_entry_ids = write_destination_entry(
+                self.c, None, header, self.form_slabs()
+            )
 
+            refresh_entry_summaries(self.c, [destination_entry_id])
+            self.claim_saved_mda_numbers()
             self.conn.commit()
             messagebox.showinfo("Success", "Destination Entry saved successfully.")
 
             self.editing_mode = True
             self.destination_entry_id = destination_entry_id
-            self.range_entry_ids = saved_range_ids
-            self.dealer_entry_ids = saved_dealer_ids
+            self.store_saved_ids(range_entry_ids, dealer_entry_ids)
             self.update_buttons_to_edit_mode()
             self.save_entry_cache()
 
@@ -387,11 +383,11 @@ class DestinationEntryPage:
         frame.dealer_rows = []
         frame.update_totals = lambda: None
         frame.rate = 0
+        frame.range_entry_id = None
         self.range_frames.append(frame)
 
     def get_available_ranges(self):
-        self.c.execute("SELECT id, from_km, to_km, rate, is_mtk FROM rate_range")
-        ranges = self.c.fetchall()
+        ranges = get_rate_card(self.c).by_id.values()
         return [f"{id} | {from_km}-{to_km}km @ ₹{rate} ({'MTK' if is_mtk else 'MT'})" 
                 for id, from_km, to_km, rate, is_mtk in ranges if id not in self.used_ranges]
 
@@ -402,26 +398,22 @@ class DestinationEntryPage:
             self.used_ranges.discard(rate_range_id)
             frame.destroy()
             self.range_frames.remove(frame)
+            self.update_entry_totals()
 
-            # Ensure we are editing an existing destination entry
-            if self.editing_mode and self.destination_entry_id:
-                # Get the corresponding range_entry.id
-                self.c.execute('''SELECT id FROM range_entry 
-                                WHERE destination_entry_id = ? AND rate_range_id = ?''',
-                            (self.destination_entry_id, rate_range_id))
-                result = self.c.fetchone()
-                if result:
-                    range_entry_id = result[0]
-                    
-                    # Delete all dealer entries linked to this range entry
-                    self.c.execute("DELETE FROM dealer_entry WHERE range_entry_id = ?", (range_entry_id,))
-
-                    # Delete the range entry
-                    self.c.execute("DELETE FROM range_entry WHERE id = ?", (range_entry_id,))
-
-                    self.conn.commit()
-
-    def setup_range(self, frame, range_cb=None, rate_range_id=None):
+            # Ensure we are editing an existing destination entry and the slab was saved
+            range_entry_id = frame.range_entry_id
+            if self.editing_mode and self.destination_entry_id and range_entry_id:
+                # Delete all dealer entries linked to this range entry
+                self.c.execute("DELETE FROM dealer_entry WHERE range_entry_id = ?", (range_entry_id,))
+
+                # Delete the range entry
+                self.c.execute("DELETE FROM range_entry WHERE id = ?", (range_entry_id,))
+
+                refresh_entry_summaries(self.c, [self.destination_entry_id])
+                refresh_bill_totals(self.c, bill_ids_for_entries(self.c, [self.destination_entry_id]))
+                self.conn.commit()
+
+    def setup_range(self, frame, range_cb=None, rate_range_id=None, dealers=None):
         # CASE 1: Called from UI (range combobox selection)
         if range_cb is not None:
             val = range_cb.get()
@@ -437,8 +429,7 @@ class DestinationEntryPage:
         self.used_ranges.add(rate_range_id)
         
         # Fetch range details
-        self.c.execute("SELECT from_km, to_km, rate, is_mtk FROM rate_range WHERE id=?", (rate_range_id,))
-        from_km, to_km, rate, is_mtk = self.c.fetchone()
+        _, from_km, to_km, rate, is_mtk = get_rate_card(self.c).get(rate_range_id)
         
         # Remove combobox UI if exists
         if range_cb is not None:
@@ -453,164 +444,46 @@ class DestinationEntryPage:
         Button(frame, text="Remove This Range", command=lambda: self.remove_range(frame, rate_range_id)).grid(row=0, column=4, sticky='e')
 
         Label(frame, text="Dealers for this range", font=("Arial", 10, "bold")).grid(row=1, column=0, columnspan=6, pady=(10, 0))
-        dealer_frame = Frame(frame)
-
-        Label(dealer_frame, text="Dealer", font=("Arial", 9, "bold")).grid(row=0, column=0)
-        Label(dealer_frame, text="Despatched To", font=("Arial", 9, "bold")).grid(row=0, column=1)   # new column
-        Label(dealer_frame, text="MDA No.", font=("Arial", 9, "bold")).grid(row=0, column=2)
-        Label(dealer_frame, text="Date", font=("Arial", 9, "bold")).grid(row=0, column=3)
-        Label(dealer_frame, text="Bags", font=("Arial", 9, "bold")).grid(row=0, column=4)
-        Label(dealer_frame, text="Description", font=("Arial", 9, "bold")).grid(row=0, column=5)
-        Label(dealer_frame, text="Remarks", font=("Arial", 9, "bold")).grid(row=0, column=6)
-        Label(dealer_frame, text="Details", font=("Arial", 9, "bold")).grid(row=0, column=7)
-        Label(dealer_frame, text="Actions", font=("Arial", 9, "bold")).grid(row=0, column=8)
 
-        dealer_frame.grid(row=4, column=0, columnspan=6, sticky="w")
-
-        selected_dest = self.destination_cb.get()
-        destination_id = self.destination_map.get(selected_dest)
-
-        self.c.execute("""
-            SELECT id, name, place, distance FROM dealer
-            WHERE distance BETWEEN ? AND ? AND destination_id = ?
-        """, (from_km, to_km, destination_id))
-        dealers = self.c.fetchall()
-        dealer_map = {
-            f"{id} - {name} ({distance}km)": (id, name, place, distance)
-            for id, name, place, distance in dealers
-        }
-
-        dealer_rows = []
+        # ``dealers``: the destination's dealers, read once by a caller setting up many slabs
+        if dealers is None:
+            dealers = load_destination_dealers(self.c, self.destination_map.get(self.destination_cb.get()))
+        self.set_frame_dealers(frame, slab_dealers(dealers, from_km, to_km))
+        dealer_map = frame.dealer_map
 
-        totals_label = Label(frame, text="Total Bags: 0 | MT: 0.00 | MTK: 0.00 | ₹0.00", font=("Arial", 10, "bold"), fg="green")
+        totals_label = Label(frame, text=totals_text(0, 0.0, 0.0, 0.0), font=("Arial", 10, "bold"), fg="green")
         totals_label.grid(row=5, column=0, columnspan=6, pady=5)
 
         def update_totals():
-            total_bags = sum(row.get('bags', 0) for row in dealer_rows)
-            total_mt = sum(row.get('mt', 0.0) for row in dealer_rows)
-            total_mtk = sum(row.get('mtk', 0.0) for row in dealer_rows)
-            total_amt = sum(row.get('amount', 0.0) for row in dealer_rows)
-            totals_label.config(
-                text=f"Total Bags: {total_bags} | MT: {total_mt:.2f} | MTK: {total_mtk:.2f} | ₹{total_amt:.2f}"
-            )
+            # The grid keeps the running totals; this only shows them, once per idle cycle
+            totals_label.config(text=totals_text(*dealer_grid.totals))
+            self.update_entry_totals()
 
-        def add_dealer_row():
-            row_idx = len(dealer_rows) + 1
-            row = {}
-
-            dealer_var = StringVar()
-            dealer_cb = ttk.Combobox(dealer_frame, textvariable=dealer_var, values=list(dealer_map.keys()), state="customNormal", width=35)
-            dealer_cb.grid(row=row_idx, column=0, padx=2, pady=2)
-            row['dealer_cb'] = dealer_cb
-
-            despatched_entry = Entry(dealer_frame, width=30)
-            despatched_entry.grid(row=row_idx, column=1, padx=2)
-            row['despatched_entry'] = despatched_entry
-
-            def on_dealer_selected(event=None):
-                selected = dealer_cb.get()
-                if selected in dealer_map:
-                    _, name, place, _ = dealer_map[selected]
-                    despatched_entry.delete(0, END)
-                    despatched_entry.insert(0, f"{name}, {place}")
-
-            dealer_cb.bind("<<ComboboxSelected>>", on_dealer_selected)
-
-            def filter_dealers(event):
-                typed = dealer_var.get().lower()
-                filtered = [k for k in dealer_map.keys() if typed in k.lower()]
-                dealer_cb['values'] = filtered
-                if filtered:
-                    dealer_cb.event_generate('<Down>')
-
-            dealer_cb.bind('<KeyRelease>', filter_dealers)
-
-            mda_entry = Entry(dealer_frame, width=20)
-            mda_entry.grid(row=row_idx, column=2)
-            row['mda_entry'] = mda_entry
-
-            date_entry = Entry(dealer_frame, width=12)
-            date_entry.insert(0, datetime.now().strftime("%Y-%m-%d"))
-            date_entry.grid(row=row_idx, column=3)
-            row['date_entry'] = date_entry
-
-            bags_entry = Entry(dealer_frame, width=5)
-            bags_entry.grid(row=row_idx, column=4, padx=2)
-            row['bags_entry'] = bags_entry
-
-            desc_entry = Entry(dealer_frame, width=15)
-            desc_entry.insert(0, "FACTOM FOS")
-            desc_entry.grid(row=row_idx, column=5, padx=2)
-            row['desc_entry'] = desc_entry
-
-            remarks_entry = Entry(dealer_frame, width=15)
-            remarks_entry.grid(row=row_idx, column=6, padx=2)
-            row['remarks_entry'] = remarks_entry
-
-            result_lbl = Label(dealer_frame, text="", width=40, anchor='w')
-            result_lbl.grid(row=row_idx, column=7, padx=2)
-            row['result_lbl'] = result_lbl
-
-            def calculate_row():
-                selected = dealer_cb.get()
-                if not selected or selected not in dealer_map:
-                    result_lbl.config(text="Select valid dealer")
-                    return
-
-                dealer_id, name, place, km = dealer_map[selected]
-                try:
-                    bags = int(bags_entry.get())
-                    mt = bags * 0.05
-                    mtk = mt * km
-                    amount = rate * (mtk if is_mtk else mt)
-                    result_lbl.config(text=f"MT: {mt:.2f} | KM: {km} | MTK: {mtk:.2f} | ₹{amount:.2f}")
-                    row.update({
-                        'dealer_id': dealer_id,
-                        'dealer_name': name,
-                        'dealer_place': place,
-                        'despatched_to': despatched_entry.get(),
-                        'km': km,
-                        'bags': bags,
-                        'mt': mt,
-                        'mtk': mtk,
-                        'amount': amount,
-                        'mda_number': mda_entry.get(),
-                        'date': date_entry.get(),
-                        'description': desc_entry.get(),
-                        'remarks': remarks_entry.get()
-                    })
-                    update_totals()
-                except ValueError:
-                    result_lbl.config(text="Invalid input")
-
-            def remove_dealer_row():
-                for widget in [dealer_cb, despatched_entry, mda_entry, date_entry, bags_entry,
-                            desc_entry, remarks_entry, result_lbl, calc_btn, remove_btn]:
-                    widget.destroy()
-                dealer_rows.remove(row)
-                update_totals()
-
-            calc_btn = Button(dealer_frame, text="Calc", command=calculate_row)
-            calc_btn.grid(row=row_idx, column=8)
-            
-            row['calc_btn'] = calc_btn
-
-            remove_btn = Button(dealer_frame, text="❌", command=remove_dealer_row)
-            remove_btn.grid(row=row_idx, column=9)
-            
-            row['remove_btn'] = remove_btn
-
-            dealer_rows.append(row)
+        # One editable grid per slab; its rows are plain dicts, not widget stacks
+        dealer_grid = DealerGrid(frame, rate, is_mtk, dealer_map, frame.dealer_matcher, on_change=update_totals)
+        dealer_grid.grid(row=4, column=0, columnspan=6, sticky="we")
+        dealer_rows = dealer_grid.rows
 
-        Button(frame, text="+ Add Dealer", command=add_dealer_row).grid(row=6, column=0, columnspan=2, pady=5)
-        add_dealer_row()
+        Button(frame, text="+ Add Dealer", command=dealer_grid.add_row).grid(row=6, column=0, columnspan=2, pady=5)
+        dealer_grid.add_row()
 
         frame.rate_range_id = rate_range_id
         frame.dealer_rows = dealer_rows
+        frame.dealer_grid = dealer_grid
         frame.update_totals = update_totals
-        frame.add_dealer_row = add_dealer_row
+        frame.add_dealer_row = dealer_grid.add_row
         frame.rate = rate
-        frame.dealer_map = dealer_map
+
+    def set_frame_dealers(self, frame, dealers):
+        """The slab's dealer combobox keys and matcher from its (id, name, place, distance, code) rows."""
+        frame.dealer_map = {
+            f"{id} - {name} ({distance}km)": (id, name, place, distance)
+            for id, name, place, distance, _ in dealers
+        }
+        frame.dealer_matcher = DealerMatcher(
+            (f"{id} - {name} ({distance}km)", code, name)
+            for id, name, place, distance, code in dealers
+        )
 
     def update_buttons_to_edit_mode(self):
         self.save_button.destroy()
@@ -630,110 +503,24 @@ class DestinationEntryPage:
             messagebox.showwarning("Error", "Not in edit mode or missing destination entry.")
             return
 
+        header = {
+            'letter_note': letter_note, 'bill_number': bill_number,
+            'date': date, 'to_address': to_address,
+        }
+
         try:
-            # Update destination_entry
-            self.c.execute("""
-                UPDATE destination_entry
-                SET date=?, to_address=?, bill_number=?, letter_note=?
-                WHERE id=?
-            """, (
-                date, to_address, bill_number, letter_note, self.destination_entry_id
-            ))
-
-            current_dealer_ids = set()
-            new_dealer_entry_ids = {}
-            new_range_entry_ids = {}
-
-            for range_index, frame in enumerate(self.range_frames):
-                rate_range_id = frame.rate_range_id
-                rate = frame.rate
-                dealer_rows = frame.dealer_rows
-
-                # Check if range_entry already exists or is new
-                range_entry_id = self.range_entry_ids.get(range_index)
-                is_new_range = range_entry_id is None
-
-                # Calculate totals
-                total_bags = sum(row.get('bags', 0) for row in dealer_rows)
-                total_mt = sum(row.get('mt', 0.0) for row in dealer_rows)
-                total_mtk = sum(row.get('mtk', 0.0) for row in dealer_rows)
-                total_amount = sum(row.get('amount', 0.0) for row in dealer_rows)
-
-                if is_new_range:
-                    # Insert new range_entry with rate
-                    self.c.execute("""
-                        INSERT INTO range_entry (
-                            destination_entry_id, rate_range_id, rate,
-                            total_bags, total_mt, total_mtk, total_amount
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        self.destination_entry_id, rate_range_id, rate,
-                        total_bags, total_mt, total_mtk, total_amount
-                    ))
-                    range_entry_id = self.c.lastrowid
-                else:
-                    # Update existing range_entry with rate
-                    self.c.execute("""
-                        UPDATE range_entry
-                        SET rate=?, total_bags=?, total_mt=?, total_mtk=?, total_amount=?
-                        WHERE id=?
-                    """, (
-                        rate, total_bags, total_mt, total_mtk, total_amount, range_entry_id
-                    ))
-
-                new_range_entry_ids[range_index] = range_entry_id
-
-                existing_ids_for_range = set()
-
-                for dealer_index, row in enumerate(dealer_rows):
-                    dealer_entry_id = self.dealer_entry_ids.get((range_index, dealer_index))
-
-                    if dealer_entry_id:
-                        # Update existing dealer_entry
-                        self.c.execute("""
-                            UPDATE dealer_entry
-                            SET dealer_id=?, despatched_to=?, km=?, no_bags=?, rate=?,
-                                mt=?, mtk=?, amount=?, mda_number=?, date=?,
-                                description=?, remarks=?
-                            WHERE id=?
-                        """, (
-                            row['dealer_id'], row['despatched_to'], row['km'], row['bags'], frame.rate,
-                            row['mt'], row['mtk'], row['amount'],
-                            row['mda_number'], row['date'],
-                            row.get('description', 'FACTOM FOS'), row.get('remarks', ''),
-                            dealer_entry_id
-                        ))
-                    else:
-                        # Insert new dealer_entry
-                        self.c.execute("""
-                            INSERT INTO dealer_entry (
-                                range_entry_id, dealer_id, despatched_to, km, no_bags, rate,
-                                mt, mtk, amount, mda_number, date, description, remarks
-                            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            range_entry_id, row['dealer_id'], row['despatched_to'], row['km'], row['bags'],
-                            frame.rate, row['mt'], row['mtk'], row['amount'],
-                            row['mda_number'], row['date'],
-                            row.get('description', 'FACTOM FOS'), row.get('remarks', '')
-                        ))
-                        dealer_entry_id = self.c.lastrowid
-
-                    new_dealer_entry_ids[(range_index, dealer_index)] = dealer_entry_id
-                    current_dealer_ids.add(dealer_entry_id)
-                    existing_ids_for_range.add(dealer_entry_id)
-
-                # Delete old dealer entries no longer present in UI
-                self.c.execute("SELECT id FROM dealer_entry WHERE range_entry_id = ?", (range_entry_id,))
-                all_db_ids = {r[0] for r in self.c.fetchall()}
-                to_delete_ids = all_db_ids - existing_ids_for_range
-                for del_id in to_delete_ids:
-                    self.c.execute("DELETE FROM dealer_entry WHERE id = ?", (del_id,))
+            _, range_entry_ids, dealer_entry_ids = write_destination_entry(
+                self.c, self.destination_entry_id, header, self.form_slabs()
+            )
 
+            refresh_entry_summaries(self.c, [self.destination_entry_id])
+            self.claim_saved_mda_numbers()
+            # Keep stored totals of a bill that already includes this entry in step
+            refresh_bill_totals(self.c, bill_ids_for_entries(self.c, [self.destination_entry_id]))
             self.conn.commit()
 
             # Update stored IDs to match the new state
-            self.range_entry_ids = new_range_entry_ids
-            self.dealer_entry_ids = new_dealer_entry_ids
+            self.store_saved_ids(range_entry_ids, dealer_entry_ids)
 
             messagebox.showinfo("Success", "Changes saved successfully.")
         except Exception as e:
@@ -742,72 +529,57 @@ class DestinationEntryPage:
     
     def refresh(self):
         self.load_destinations()
-        for frame in self.range_frames:
-            if hasattr(frame, 'dealer_map'):
-                self.refresh_dealers_for_frame(frame)
+        slab_frames = [frame for frame in self.range_frames if hasattr(frame, 'dealer_map')]
+        if slab_frames:
+            dealers = load_destination_dealers(self.c, self.destination_map.get(self.destination_cb.get()))
+            for frame in slab_frames:
+                self.refresh_dealers_for_frame(frame, dealers)
                 
         # After loading destination and entry cache
         selected = self.destination_cb.get()
         if selected:
-            self.load_dealers_for_destination() 
-        self.filter_dealers()   # This will now work because dealer_map exists
+            # filter_dealers needs dealer_map, so it runs once the dealers arrive
+            self.load_dealers_for_destination(on_loaded=self.filter_dealers)
+        else:
+            self.filter_dealers()
          
     def clear(self, stat=True):
         if self.editing_mode and stat:
             self.load_existing_entry(self.destination_entry_id)
         else:            
             self.destination_entry_id = None
-            self.range_entry_ids.clear()
-            self.dealer_entry_ids.clear()
 
             for widget in self.frame.winfo_children():
                 widget.destroy()
 
             self.__init__(self.frame, self.home_frame, self.conn)
 
-    def refresh_dealers_for_frame(self, frame):
-        """Refresh dealer list for a specific range slab frame"""
-        rate_range_id = frame.rate_range_id
-
+    def refresh_dealers_for_frame(self, frame, dealers):
+        """Refresh dealer list for a specific range slab frame from the destination's ``dealers``"""
         # get range slab limits
-        self.c.execute("SELECT from_km, to_km FROM rate_range WHERE id=?", (rate_range_id,))
-        from_km, to_km = self.c.fetchone()
-
-        selected_dest = self.destination_cb.get()
-        destination_id = self.destination_map.get(selected_dest)
-
-        # fetch updated dealers from DB
-        self.c.execute("""
-            SELECT id, name, place, distance FROM dealer
-            WHERE distance BETWEEN ? AND ? AND destination_id = ?
-        """, (from_km, to_km, destination_id))
-        dealers = self.c.fetchall()
-
-        dealer_map = {
-            f"{id} - {name} ({distance}km)": (id, name, place, distance)
-            for id, name, place, distance in dealers
-        }
-        frame.dealer_map = dealer_map
-
-        # update all existing dealer comboboxes in this frame
-        for row in frame.dealer_rows:
-            if 'dealer_cb' in row:
-                row['dealer_cb']['values'] = list(dealer_map.keys())
+        slab = get_rate_card(self.c).get(frame.rate_range_id)
+        self.set_frame_dealers(frame, slab_dealers(dealers, slab.from_km, slab.to_km))
+        frame.dealer_grid.set_dealers(frame.dealer_map, frame.dealer_matcher)
     
-    def load_dealers_for_destination(self, event=None):
+    def load_dealers_for_destination(self, event=None, on_loaded=None):
         selected_dest = self.destination_cb.get()
         if not selected_dest:
             return
 
         destination_id = self.destination_map[selected_dest]
 
-        self.c.execute("SELECT id, name, place, distance FROM dealer WHERE destination_id=?", (destination_id,))
-        dealers = self.c.fetchall()
+        submit_query(
+            self.conn, lambda conn: load_destination_dealers(conn.cursor(), destination_id),
+            on_done=lambda dealers: self.show_dealers_for_destination(dealers, on_loaded),
+            key=("destination-entry", "dealers", id(self)), busy=self.frame
+        )
 
+    def show_dealers_for_destination(self, dealers, on_loaded=None):
         if not dealers:
             self.dealer_search_cb['values'] = []
         # Load dealers for this destination
             self.dealer_map = {}
+            self.dealer_matcher = DealerMatcher([])
             self.dealer_search_var.set("")
             messagebox.showinfo("No Dealers", "No dealers found for this destination.")
             return
@@ -815,8 +587,13 @@ class DestinationEntryPage:
         # Update dealer map and dropdown values
         self.dealer_map = {
             f"{id} - {name} ({place}) [{distance} km]": (id, name, place, distance)
-            for id, name, place, distance in dealers
+            for id, name, place, distance, _ in dealers
         }
+        # Built once per destination; every keystroke reuses its indexes
+        self.dealer_matcher = DealerMatcher(
+            (f"{id} - {name} ({place}) [{distance} km]", code, name)
+            for id, name, place, distance, code in dealers
+        )
         self.dealer_search_cb['values'] = list(self.dealer_map.keys())
 
         # Clear old text and set focus to dealer search box
@@ -829,9 +606,11 @@ class DestinationEntryPage:
         
         self.dealer_map_search = {
             f"{id} - {name} ({place}) [{distance} km]": (id, name, place, distance)
-            for id, name, place, distance in dealers
+            for id, name, place, distance, _ in dealers
         }
         self.dealer_search_cb["values"] = list(self.dealer_map_search.keys())
+        if on_loaded:
+            on_loaded()
 
     def add_dealer_by_search(self):
         selected = self.dealer_search_cb.get()
@@ -850,9 +629,7 @@ class DestinationEntryPage:
 
         dealer_id, name, place, distance = self.dealer_map_search[selected]
 
-        self.c.execute("SELECT id, from_km, to_km, rate, is_mtk FROM rate_range WHERE ? BETWEEN from_km AND to_km",
-                    (distance,))
-        range_row = self.c.fetchone()
+        range_row = get_rate_card(self.c).lookup(distance)
 
         if not range_row:
             messagebox.showerror("Error", f"No rate range found for {distance} km.")
@@ -860,401 +637,208 @@ class DestinationEntryPage:
 
         rate_range_id, from_km, to_km, rate, is_mtk = range_row
 
-        frame = None
-        for rf in self.range_frames:
-            if getattr(rf, 'rate_range_id', None) == rate_range_id:
-                frame = rf
-                break
-
-        if frame is None:
-            frame = LabelFrame(self.range_container, text=f"Range Slab", padx=10, pady=10)
-            frame.pack(fill='x', padx=10, pady=5)
-            self.used_ranges.add(rate_range_id)
-            self.setup_range(frame, rate_range_id=rate_range_id)
-            frame.rate_range_id = rate_range_id
-            frame.rate = rate
-            self.range_frames.append(frame)
+        mda = normalize_mda(mda)
+        if mda == str(self.next_mda):
+            # Take the number from the sequence; another window may have used the suggestion
+            mda = str(allocate_mda_numbers(self.conn)[0])
+        elif mda:
+            if mda in self.form_mda_numbers() or mda_in_use(self.c, mda, self.saved_dealer_entry_ids()):
+                messagebox.showerror("Error", f"MDA No. {mda} is already used.")
+                return
+            if mda.isdigit():
+                claim_mda_number(self.conn, int(mda))
+
+        frame = self.range_frame_for(rate_range_id, rate)
 
         # ✅ Now pass inputs to row
         self.add_dealer_to_range(frame, dealer_id, name, place, distance, rate, is_mtk, mda, date, bags)
 
         # ✅ Clear the search row after add
         self.clear_dealer_search()
-        self.next_mda = (int(mda) if mda.isnumeric() else self.next_mda) + 1
+        self.next_mda = self.get_next_mda_number()
         self.search_mda_entry.delete(0, END)
         self.search_mda_entry.insert(0, self.next_mda)
     
-    def add_dealer_to_range(self, frame, dealer_id, name, place, km, rate, is_mtk, mda, date, bags):
-
-        dealer_rows = frame.dealer_rows
-        dealer_map = frame.dealer_map
-
-        # Create a new row if not initialized
-        if not hasattr(frame, "initialized") or not frame.initialized:
-            frame.initialized = True
-        else:
-            frame.add_dealer_row()
-
-        row = dealer_rows[-1]
-        key = f"{dealer_id} - {name} ({km}km)"
-
-        # ✅ Fill dealer combo
-        if key in dealer_map:
-            row["dealer_cb"].set(key)
-
-        # ✅ Fill Despatched To
-        row["despatched_entry"].delete(0, END)
-        row["despatched_entry"].insert(0, f"{name}, {place}")
+    def range_frame_for(self, rate_range_id, rate):
+        """The form's frame for the rate range, added if the form has none yet."""
+        for rf in self.range_frames:
+            if getattr(rf, 'rate_range_id', None) == rate_range_id:
+                return rf
 
-        # ✅ MDA
-        row["mda_entry"].delete(0, END)
-        row["mda_entry"].insert(0, mda)
+        frame = LabelFrame(self.range_container, text="Range Slab", padx=10, pady=10)
+        frame.pack(fill='x', padx=10, pady=5)
+        self.used_ranges.add(rate_range_id)
+        self.setup_range(frame, rate_range_id=rate_range_id)
+        frame.rate_range_id = rate_range_id
+        frame.rate = rate
+        frame.range_entry_id = None
+        self.range_frames.append(frame)
+        return frame
 
-        # ✅ Date (Entry widget, so insert directly)
-        row["date_entry"].delete(0, END)
-        row["date_entry"].insert(0, date)
+    def paste_dispatches(self):
+        destination_id = self.destination_map.get(self.destination_cb.get())
+        if not destination_id:
+            messagebox.showerror("Error", "Select a destination first.")
+            return
 
-        # ✅ Bags update
-        row["bags_entry"].delete(0, END)
-        row["bags_entry"].insert(0, bags)
+        def check(text):
+            return resolve_dispatches(
+                self.c, destination_id, parse_dispatch_text(text),
+                self.saved_dealer_entry_ids(), self.form_mda_numbers()
+            )
 
-        # ✅ Update KM and Rate into row data (not labels)
-        row["km"] = km
-        row["rate"] = rate
-        row["is_mtk"] = is_mtk
+        PasteDispatchesDialog(self.frame, check, self.add_dispatches)
+
+    def add_dispatches(self, dispatches):
+        """Add resolved dispatches: one grid update per slab, one MDA sequence claim.
+
+        Rows pasted without an MDA No. take theirs from one reserved block.
+        """
+        # Typed numbers first, so the block for the rest starts past them
+        numbers = [int(d.mda) for d in dispatches if d.mda.isdigit()]
+        if numbers:
+            claim_mda_number(self.conn, max(numbers))
+        blank = [i for i, d in enumerate(dispatches) if not d.mda]
+        if blank:
+            dispatches = list(dispatches)
+            for i, number in zip(blank, allocate_mda_numbers(self.conn, len(blank))):
+                dispatches[i] = dispatches[i]._replace(mda=str(number))
+
+        by_slab = {}
+        for d in dispatches:
+            by_slab.setdefault(d.slab.id, []).append(d)
+
+        for slab_dispatches in by_slab.values():
+            slab = slab_dispatches[0].slab
+            frame = self.range_frame_for(slab.id, slab.rate)
+            cells_list = []
+            for d in slab_dispatches:
+                dealer_id, _, name, place, distance = d.dealer
+                key = dealer_key(dealer_id, name, distance)
+                cells_list.append({
+                    "dealer": key if key in frame.dealer_map else "",
+                    "despatched_to": f"{name}, {place}",
+                    "mda_number": d.mda,
+                    "date": d.date,
+                    "bags": str(d.bags),
+                })
+            frame.dealer_grid.add_rows(cells_list)
 
-        # ✅ IMPORTANT: CALL THE CALC FUNCTION of THIS row
-        # (it is dynamically defined in setup_range() as: calculate_row())
-        if "result_lbl" in row and row.get("bags_entry"):
-            # trigger row calculation
-            try:
-                # invoke the Calc button directly
-                row['result_lbl'].after(50, lambda r=row: r['calc_btn'].invoke())
-            except:
-                pass
+        self.next_mda = self.get_next_mda_number()
+        self.search_mda_entry.delete(0, END)
+        self.search_mda_entry.insert(0, self.next_mda)
 
-        # ✅ After updating row calc, refresh totals
-        frame.update_totals()
+    def add_dealer_to_range(self, frame, dealer_id, name, place, km, rate, is_mtk, mda, date, bags):
+        key = f"{dealer_id} - {name} ({km}km)"
+        # Fills the slab's blank row if it has one; the grid recalculates the row and the totals
+        frame.dealer_grid.fill_row({
+            "dealer": key if key in frame.dealer_map else "",
+            "despatched_to": f"{name}, {place}",
+            "mda_number": mda,
+            "date": date,
+            "bags": bags,
+        })
 
     def load_existing_entry(self, destination_entry_id):
-        self.clear(False)
-        self.editing_mode = True
-        self.destination_entry_id = destination_entry_id
-        self.range_entry_ids = {}
-        self.dealer_entry_ids = {}
-        self.used_ranges = set()
-
-        # Fetch and set header fields
-        self.c.execute("""
-            SELECT destination_id, letter_note, bill_number, date, to_address
-            FROM destination_entry WHERE id = ?
-        """, (destination_entry_id,))
-        row = self.c.fetchone()
-        if not row:
+        timer = StageTimer()
+        with timer.stage("reset"):
+            self.clear(False)
+            self.editing_mode = True
+            self.destination_entry_id = destination_entry_id
+            self.used_ranges = set()
+
+        # Header, slabs, dealer rows and dealer names in one query; the
+        # destination's dealers in one more, split per slab in memory
+        with timer.stage("query"):
+            loaded = load_entry_form(self.c, destination_entry_id)
+            if loaded:
+                dealers = load_destination_dealers(self.c, loaded[0].destination_id)
+        if not loaded:
             messagebox.showerror("Error", "Destination entry not found.")
             return
+        header, slabs = loaded
+
+        with timer.stage("header"):
+            dest_keys = {id_: name for name, id_ in self.destination_map.items()}
+            dest_name = dest_keys.get(header.destination_id)
+            if dest_name:
+                self.destination_cb.set(dest_name)
+
+            self.letter_note_text.delete("1.0", END)
+            self.letter_note_text.insert("1.0", header.letter_note)
+            self.bill_number_entry.delete(0, END)
+            self.bill_number_entry.insert(0, header.bill_number)
+            self.date_entry.delete(0, END)
+            self.date_entry.insert(0, header.date)
+            self.to_address_text.delete("1.0", END)
+            self.to_address_text.insert("1.0", header.to_address)
+
+        for slab in slabs:
+            with timer.stage("slabs"):
+                # Add range frame
+                self.add_range_frame()
+                range_frame = self.range_frames[-1]
+                range_cb = range_frame.range_cb
+
+                range_frame.range_entry_id = slab.range_entry_id
+                self.used_ranges.add(slab.rate_range_id)
+
+                # Set the combobox value and build the slab's dealer list
+                range_cb.set(f"{slab.rate_range_id} | {slab.from_km}-{slab.to_km} km")
+                self.setup_range(range_frame, range_cb, dealers=dealers)
+                range_frame.rate = slab.rate
+                dealer_keys = {v[0]: k for k, v in range_frame.dealer_map.items()}
+
+            with timer.stage("rows"):
+                if slab.dealer_rows:
+                    # One grid load (and totals update) per slab rather than per row
+                    range_frame.dealer_grid.load_rows(
+                        [self.saved_dealer_row(entry, dealer_keys) for entry in slab.dealer_rows]
+                    )
 
-        destination_id, letter_note, bill_number, date, to_address = row
-        dest_name = next((name for name, id_ in self.destination_map.items() if id_ == destination_id), None)
-        if dest_name:
-            self.destination_cb.set(dest_name)
-
-        self.letter_note_text.delete("1.0", END)
-        self.letter_note_text.insert("1.0", letter_note)
-        self.bill_number_entry.delete(0, END)
-        self.bill_number_entry.insert(0, bill_number)
-        self.date_entry.delete(0, END)
-        self.date_entry.insert(0, date)
-        self.to_address_text.delete("1.0", END)
-        self.to_address_text.insert("1.0", to_address)
-
-        # Fetch all range entries
-        self.c.execute("SELECT id, rate_range_id, rate FROM range_entry WHERE destination_entry_id = ?", (destination_entry_id,))
-        range_entries = self.c.fetchall()
-
-        for range_index, (range_entry_id, rate_range_id, rate) in enumerate(range_entries):
-            
-            # Add range frame
-            self.add_range_frame()
-            range_frame = self.range_frames[-1]
-            range_cb = range_frame.range_cb
-            
-            self.range_entry_ids[range_index] = range_entry_id
-            self.used_ranges.add(rate_range_id)
-
-            # Set the combobox value
-            self.c.execute("SELECT from_km, to_km FROM rate_range WHERE id = ?", (rate_range_id,))
-            from_km, to_km = self.c.fetchone()
-            range_display = f"{rate_range_id} | {from_km}-{to_km} km"
-            range_cb.set(range_display)
-
-            # Setup range
-            self.setup_range(range_frame, range_cb)
-
-            # Update rate in frame
-            range_frame.rate = rate
-
-            # Fetch all dealer entries
-            self.c.execute("""
-                SELECT id, dealer_id, despatched_to, km, no_bags, rate, mt, mtk, amount, mda_number, date, description, remarks
-                FROM dealer_entry WHERE range_entry_id = ?
-            """, (range_entry_id,))
-            dealer_entries = self.c.fetchall()
-
-            for dealer_index, (dealer_entry_id, dealer_id, despatched_to, km, no_bags, rate, mt, mtk, amount, mda_number, entry_date, description, remarks) in enumerate(dealer_entries):
-                if dealer_index > 0:
-                    range_frame.add_dealer_row()
-                row = range_frame.dealer_rows[-1]
-
-                dealer_str = next((k for k, v in range_frame.dealer_map.items() if v[0] == dealer_id), None)
-                if dealer_str:
-                    row['dealer_cb'].set(dealer_str)
-
-                row['despatched_entry'].delete(0, END)
-                row['despatched_entry'].insert(0, despatched_to or '')
-
-                row['mda_entry'].delete(0, END)
-                row['mda_entry'].insert(0, mda_number or '')
-                
-
-                row['date_entry'].delete(0, END)
-                row['date_entry'].insert(0, entry_date or '')
-
-                row['bags_entry'].delete(0, END)
-                row['bags_entry'].insert(0, str(no_bags or 0))
-
-                row['desc_entry'].delete(0, END)
-                row['desc_entry'].insert(0, description or 'FACTOM FOS')
-
-                row['remarks_entry'].delete(0, END)
-                row['remarks_entry'].insert(0, remarks or '')
-
-                row.update({
-                    'dealer_id': dealer_id,
-                    'despatched_to': despatched_to,
-                    'km': km,
-                    'bags': no_bags,
-                    'mt': mt,
-                    'mtk': mtk,
-                    'amount': amount,
-                    'mda_number': mda_number,
-                    'date': entry_date,
-                    'description': description,
-                    'remarks': remarks
-                })
-
-                row['result_lbl'].config(text=f"MT: {mt:.2f} | KM: {km} | MTK: {mtk:.2f} | ₹{amount:.2f}")
-                range_frame.update_totals()
-
-                self.dealer_entry_ids[(range_index, dealer_index)] = dealer_entry_id
         self.update_buttons_to_edit_mode()
+        self.last_load_stages = timer.stages
+
+    def saved_dealer_row(self, entry, dealer_keys):
+        """A grid row showing a saved dealer_entry with its saved figures."""
+        # A dealer whose distance has left the slab is not in the slab's list; show it anyway
+        dealer_str = dealer_keys.get(entry.dealer_id)
+        if dealer_str is None and entry.dealer_name is not None:
+            dealer_str = dealer_key(entry.dealer_id, entry.dealer_name, entry.dealer_distance)
+
+        cells = {
+            'dealer': dealer_str or '',
+            'despatched_to': entry.despatched_to or '',
+            'mda_number': entry.mda_number or '',
+            'date': entry.date or '',
+            'bags': str(entry.no_bags or 0),
+            'description': entry.description or 'FACTOM FOS',
+            'remarks': entry.remarks or '',
+        }
+        return make_row(cells, {
+            'dealer_entry_id': entry.dealer_entry_id,
+            'dealer_id': entry.dealer_id,
+            'despatched_to': entry.despatched_to,
+            'km': entry.km,
+            'bags': entry.no_bags,
+            'mt': entry.mt,
+            'mtk': entry.mtk,
+            'amount': entry.amount,
+            'mda_number': entry.mda_number,
+            'date': entry.date,
+            'description': entry.description,
+            'remarks': entry.remarks
+        })
 
     def print_entry(self):
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='Small', fontSize=8, leading=10))
-        styles.add(ParagraphStyle(name='NormalBold', fontSize=10, leading=10,  fontName='Helvetica-Bold'))
-        styles.add(ParagraphStyle(name='TitleBold', fontSize=13, leading=14, fontName='Helvetica-Bold', alignment=0))
-        styles.add(ParagraphStyle(name='CustomNormal', fontSize=10, leading=12))
-        styles.add(ParagraphStyle(name='CenterBold', fontSize=10, fontName='Helvetica-Bold', alignment=1))
-
         if not self.editing_mode or not self.destination_entry_id:
             messagebox.showwarning("Error", "Please save the entry before printing.")
             return
 
-        # Fetch destination entry details
-        self.c.execute("""
-            SELECT destination_id, letter_note, bill_number, date, to_address
-            FROM destination_entry WHERE id = ?
-        """, (self.destination_entry_id,))
-        row = self.c.fetchone()
-        if not row:
+        # Snapshot the entry here; rendering happens in the print worker
+        snapshot = load_entry_snapshot(self.c, self.destination_entry_id)
+        if snapshot is None:
             messagebox.showerror("Error", "Destination entry not found.")
             return
-
-        destination_id, letter_note, bill_number, date, to_address = row
-        self.c.execute("SELECT name FROM destination WHERE id = ?", (destination_id,))
-        destination_name = self.c.fetchone()[0]
-
-        # Fetch range entries and their dealers
-        self.c.execute("SELECT id, rate_range_id, rate FROM range_entry WHERE destination_entry_id = ?", (self.destination_entry_id,))
-        range_entries = self.c.fetchall()
-        
-        range_data = []
-        for range_entry_id, rate_range_id, rate in range_entries:
-            self.c.execute("SELECT from_km, to_km FROM rate_range WHERE id = ?", (rate_range_id,))
-            from_km, to_km = self.c.fetchone()
-            range_name = f"{destination_name.upper()} {from_km}-{to_km}"
-
-            self.c.execute("""
-                SELECT dealer_id, despatched_to, km, no_bags, mt, mtk, amount, mda_number, date, description, remarks
-                FROM dealer_entry WHERE range_entry_id = ?
-            """, (range_entry_id,))
-            dealer_entries = self.c.fetchall()
-            
-            def trim_text(text, max_len=30):  # adjust length to what fits your column
-                if not text:
-                    return ""
-                return text if len(text) <= max_len else text[:max_len] + "…"
-
-            table_data = [["SL NO", "Date", "MDA NO", "Description", "Despatched to", "Bag", "MT", "KM", "MTK", "Rate", "Amount", "Remarks"]]
-            for idx, (_, despatched_to, km, no_bags, mt, mtk, amount, mda_number, entry_date, description, remarks) in enumerate(dealer_entries, 1):
-                table_data.append([
-                    str(idx),
-                    entry_date,
-                    mda_number,
-                    trim_text(description, 32),
-                    trim_text(despatched_to, 32),# ✅ trim Description
-                    # Paragraph(description or "", styles['CustomNormal']),      # ✅ wrap Description
-                    # Paragraph(despatched_to or "", styles['CustomNormal']),   # ✅ wrap Despatched To
-                    str(no_bags),
-                    f"{mt:.3f}",
-                    str(km),
-                    f"{mtk:.2f}",
-                    f"{rate:.2f}",
-                    f"{amount:.2f}",
-                    Paragraph(remarks or "", styles['CustomNormal'])          # optional: wrap Remarks
-                ])
-            # Add total row
-            self.c.execute("""
-                SELECT total_bags, total_mt, total_mtk, total_amount
-                FROM range_entry WHERE id = ?
-            """, (range_entry_id,))
-            total_bags, total_mt, total_mtk, total_amount = self.c.fetchone()
-            table_data.append(["", "", "", "", "TOTAL", str(total_bags), f"{total_mt:.3f}", "", f"{total_mtk:.2f}", f"{rate:.2f}", f"{total_amount:.2f}", ""])
-
-            range_data.append((range_name, table_data))
-
-        # Generate PDF
-        pdf_file = "bill_report.pdf"
-        doc = SimpleDocTemplate(pdf_file, pagesize=landscape(A4), leftMargin=20, rightMargin=20, topMargin=100, bottomMargin=80)
-        elements = []
-
-        
-        # LEFT COLUMN - Company Info
-        left_column = [
-            Paragraph("GSTIN: 32ACNFS 8060K1ZP", styles['Small']),
-            Paragraph("M/s. SHAN ENTERPRISES", styles['TitleBold']),
-            Paragraph("Clearing & Transporting contractor", styles['CustomNormal']),
-            Paragraph("21-4185, C-Meenchanda gate Calicut - 673018", styles['CustomNormal']),
-            Paragraph("Mob: 9447004108", styles['CustomNormal']),
-        ]
-
-        # RIGHT COLUMN - To Address and Bill Info
-        to_address_lines = to_address.split('\n')
-        to_address_paragraphs = [Paragraph(line, styles['CustomNormal']) for line in to_address_lines]
-        right_column = to_address_paragraphs + [
-            Spacer(1, 6),
-            Paragraph(f"Date: {date}", styles['CustomNormal']),
-        ]
-
-        # elements.append(header_table)
-        elements.append(Spacer(1, 12))
-        elements.append(Paragraph(f"Bill No.: {bill_number},", styles['CustomNormal']))
-        elements.append(Spacer(1, 6))
-        elements.append(Paragraph('Sir,', styles['CustomNormal']))
-        elements.append(Paragraph(letter_note if letter_note else "Please find the details below:", styles['CustomNormal']))
-        elements.append(Spacer(1, 8))
-
-        # Tables for ranges
-        page_width, _ = landscape(A4)
-        usable_width = page_width - doc.leftMargin - doc.rightMargin
-
-        for range_name, table_data in range_data:
-            
-            # dynamic column widths across reduced width (e.g. 90% of usable width)
-            shrink_factor = 0.98   # reduce table width to 90% of page
-            target_width = usable_width * shrink_factor  
-
-            col_widths = [30, 45, 60, 60, 160, 35, 40, 40, 45, 40, 50, 40]
-            scale = target_width / sum(col_widths)
-            col_widths = [w * scale for w in col_widths]
-
-            table = Table(table_data, colWidths=col_widths, hAlign="CENTER")  # center table
-            table.setStyle(TableStyle([
-                ('FONT', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONT', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10.5),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-
-                ('GRID', (0, 0), (-1, -1), 0.8, colors.black),
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('WORDWRAP', (3, 1), (4, -2), True),
-
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
-                ('ALIGN', (3, 1), (4, -2), 'LEFT'),
-                ('ALIGN', (11, 1), (11, -2), 'LEFT'),
-
-                ('LEFTPADDING', (0, 0), (-1, -1), 3),
-                ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-                ('TOPPADDING', (0, 0), (-1, -1), 4),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-
-                ('FONTSIZE', (0, -1), (-1, -1), 9.5),
-                ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-            ]))
-
-            elements.append(KeepTogether([
-                Paragraph(range_name, styles['CenterBold']),
-                Spacer(1, 3),
-                table
-            ]))
-            elements.append(Spacer(1, 6))
-
-       
-        elements.append(Spacer(1, 20))
-        # elements.append(footer_table)
-        
-
-        def draw_header_footer(canvas, doc):
-            canvas.saveState()
-
-            # --- HEADER ---
-            # Draw the header table here
-            header_table = Table(
-                [[left_column, "", right_column]],
-                colWidths=[480, 40, 280]
-            )
-            header_table.setStyle(TableStyle([('VALIGN', (0, 0), (-1, -1), 'TOP')]))
-
-            # drawOn(x, y) manually at top of page
-            w, h = header_table.wrap(doc.width, doc.topMargin)
-            header_table.drawOn(canvas, doc.leftMargin, doc.height + doc.topMargin - h + 50)
-
-            # --- FOOTER ---
-            footer_data = [[
-                Paragraph("Passed by", styles['CustomNormal']),
-                "",
-                Paragraph("Officer in charge", styles['CustomNormal']),
-                "",
-                Paragraph("Signature of contractor", styles['CustomNormal'])
-            ]]
-            footer_table = Table(footer_data, colWidths=[120, 140, 140, 140, 140])
-            footer_table.setStyle(TableStyle([
-                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ]))
-
-            w, h = footer_table.wrap(doc.width, doc.bottomMargin)
-            footer_table.drawOn(canvas, doc.leftMargin, 15 * mm)  # bottom offset
-
-            canvas.restoreState()
-
-
-        doc.build(elements, onFirstPage=draw_header_footer, onLaterPages=draw_header_footer)
-
-
-        # Open PDF
-        try:
-            os.startfile(pdf_file)
-        except AttributeError:
-            try:
-                os.system(f"open {pdf_file}")
-            except:
-                os.system(f"xdg-open {pdf_file}")
-
-        messagebox.showinfo("Success", "PDF generated and opened for printing.")
+        submit_print(self.frame, "entry_report", snapshot, entry_file_stem(snapshot),
+                     title=f"Entry {snapshot['bill_number'] or self.destination_entry_id}")
@@ -1,5 +1,12 @@
 from tkinter import *
-from tkinter import ttk, messagebox
+import os
+from tkinter import ttk, messagebox, filedialog
+from db.bill_totals import bill_ids_for_entries, refresh_bill_totals
+from db.dispatch_import import plan_dispatch_import, read_dispatch_register, save_dispatch_import
+from db.entry_summary import delete_entry_summaries
+from db.mda import allocate_mda_numbers, claim_mda_number
+from ui.dispatch_import import DispatchImportDialog
+from ui.executor import stream_query, submit_file_job, submit_query
 
 class DestinationEntryViewer:
     def __init__(self, frame, home_frame, conn, edit_entry_page):
@@ -8,6 +15,8 @@ class DestinationEntryViewer:
         self.edit_entry_page = edit_entry_page
         self.conn = conn
         self.c = conn.cursor()
+        self.dest_map = {}
+        self.result_count = 0
         self.frame.bind("<<ShowFrame>>", lambda e: self.load_destinations())
 
 
@@ -71,6 +80,7 @@ class DestinationEntryViewer:
 
         Button(btn_frame, text="✏️ Edit Entry", command=self.edit_entry).pack(side=LEFT, padx=10)
         Button(btn_frame, text="🗑 Delete Entry", command=self.delete_entry).pack(side=LEFT, padx=10)
+        Button(btn_frame, text="📥 Import Dispatch Register", command=self.import_dispatch_register).pack(side=LEFT, padx=10)
 
         self.load_destinations()
         self.search_entries()  # Load initially
@@ -100,18 +110,73 @@ class DestinationEntryViewer:
             return
 
         try:
+            bill_ids = bill_ids_for_entries(self.c, [entry_id])
             self.c.execute("DELETE FROM dealer_entry WHERE range_entry_id IN (SELECT id FROM range_entry WHERE destination_entry_id = ?)", (entry_id,))
             self.c.execute("DELETE FROM range_entry WHERE destination_entry_id = ?", (entry_id,))
             self.c.execute("DELETE FROM destination_entry WHERE id = ?", (entry_id,))
+            delete_entry_summaries(self.c, [entry_id])
+            refresh_bill_totals(self.c, bill_ids)
             self.conn.commit()
             messagebox.showinfo("Deleted", "Entry deleted successfully.")
             self.search_entries()
         except Exception as e:
             messagebox.showerror("Error", f"Failed to delete: {e}")
 
+    def import_dispatch_register(self):
+        file_path = filedialog.askopenfilename(
+            title="Select Dispatch Register",
+            filetypes=[("Excel files", "*.xlsx *.xls")]
+        )
+        if not file_path:
+            return
+
+        def on_error(e):
+            messagebox.showerror("Import Error", f"Failed to read the register:\n{e}")
+
+        def on_plan(plan):
+            DispatchImportDialog(self.frame, plan, os.path.basename(file_path),
+                                 lambda: self.save_dispatch_register(plan))
+
+        def on_progress(chunk):
+            # The workbook is parsed on the file worker and matched on the reader;
+            # only the write is on this thread
+            register = chunk[2]
+            if register is not None:
+                submit_query(self.conn, lambda conn: plan_dispatch_import(conn.cursor(), register),
+                             on_done=on_plan, on_error=on_error, key=("entry-viewer", "import"), busy=self.frame)
+
+        submit_file_job(
+            lambda: read_dispatch_register(file_path), on_chunk=on_progress, on_error=on_error,
+            key=("entry-viewer", "import"), busy=self.frame
+        )
+
+    def save_dispatch_register(self, plan):
+        try:
+            # Typed numbers first, so the block for rows without one starts past them
+            numbers = [int(m) for m in plan.rows["mda"].dropna() if m.isdigit()]
+            if numbers:
+                claim_mda_number(self.conn, max(numbers))
+            blank = plan.rows["mda"].isna()
+            block = allocate_mda_numbers(self.conn, int(blank.sum())) if blank.any() else range(0)
+            plan.rows.loc[blank, "mda"] = [str(n) for n in block]
+            entry_ids = save_dispatch_import(self.c, plan)
+            # One commit for the whole register
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            messagebox.showerror("Import Error", f"Failed to import the register:\n{e}")
+            return
+        numbered = f"\nMDA Nos. {block[0]}-{block[-1]} given to {len(block)} rows without one." if block else ""
+        messagebox.showinfo("Imported", f"Added {len(plan.rows)} dispatches as {len(entry_ids)} entries.{numbered}")
+        self.search_entries()
+
     def load_destinations(self):
-        self.c.execute("SELECT id, name FROM destination")
-        dests = self.c.fetchall()
+        submit_query(
+            self.conn, lambda conn: conn.execute("SELECT id, name FROM destination").fetchall(),
+            on_done=self.show_destinations, key=("entry-viewer", "destinations"), busy=self.frame
+        )
+
+    def show_destinations(self, dests):
         self.dest_map = {name: id for id, name in dests}
         self.dest_cb["values"] = list(self.dest_map.keys())
     
@@ -121,36 +186,18 @@ class DestinationEntryViewer:
         dealer = self.dealer_entry.get().strip()
 
         query = """
-            SELECT 
-                de.id,
-                de.date,
-                d.name AS destination,
-                de.bill_number,
-                (
-                    SELECT GROUP_CONCAT(r, ', ')
-                    FROM (
-                        SELECT DISTINCT 
-                            TRIM(REPLACE(rr.from_km, '.0', '')) || '-' || TRIM(REPLACE(rr.to_km, '.0', '')) AS r
-                        FROM rate_range rr
-                        JOIN range_entry re2 ON re2.rate_range_id = rr.id
-                        WHERE re2.destination_entry_id = de.id
-                        ORDER BY rr.from_km
-                    )
-                ) AS ranges
-            FROM destination_entry de
-            JOIN destination d ON de.destination_id = d.id
-            LEFT JOIN range_entry re ON re.destination_entry_id = de.id
-            LEFT JOIN rate_range rr ON rr.id = re.rate_range_id
-            WHERE 1=1
+            SELECT s.destination_entry_id, s.date, s.destination_name, s.bill_number, s.ranges_label
+            FROM destination_entry_summary s
+            WHERE s.destination_name IS NOT NULL
             """
 
         params = []
 
         if dest_id:
-            query += " AND de.destination_id = ?"
+            query += " AND s.destination_id = ?"
             params.append(dest_id)
         if date:
-            query += " AND de.date = ?"
+            query += " AND s.date = ?"
             params.append(date)
         if dealer:
             query += """
@@ -158,18 +205,28 @@ class DestinationEntryViewer:
                     SELECT 1 FROM range_entry re
                     JOIN dealer_entry dr ON dr.range_entry_id = re.id
                     JOIN dealer dl ON dr.dealer_id = dl.id
-                    WHERE re.destination_entry_id = de.id AND dl.name LIKE ?
+                    WHERE re.destination_entry_id = s.destination_entry_id AND dl.name LIKE ?
                 )
             """
             params.append(f"%{dealer}%")
         
-        query += " GROUP BY de.id ORDER BY de.date DESC, de.id DESC"
-
-        self.c.execute(query, params)
-        rows = self.c.fetchall()
+        query += " ORDER BY s.date DESC, s.destination_entry_id DESC"
 
+        # Rows stream in as they are read; a newer search cancels this one
         self.tree.delete(*self.tree.get_children())
-        if not rows:
-            messagebox.showinfo("No results", "No matching entries found.")
+        self.result_count = 0
+        submit_query(
+            self.conn, stream_query(query, params),
+            on_chunk=self.add_result_rows,
+            on_done=self.finish_search,
+            key=("entry-viewer", "search"), busy=self.frame
+        )
+
+    def add_result_rows(self, rows):
         for row in rows:
             self.tree.insert("", END, values=row)
+        self.result_count += len(rows)
+
+    def finish_search(self, _):
+        if not self.result_count:
+            messagebox.showinfo("No results", "No matching entries found.")
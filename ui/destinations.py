@@ -1,7 +1,8 @@
 from tkinter import *
 from tkinter import messagebox, Toplevel
-from tkinter.ttk import Treeview
 import re
+from db.entry_summary import refresh_destination_summaries
+from ui.virtual_list import VirtualList
 
 class DestinationPage:
     def __init__(self, frame, home_frame, conn):
@@ -11,15 +12,6 @@ class DestinationPage:
         self.c = conn.cursor()
         self.frame.bind("<<ShowFrame>>", lambda e: self.load_destinations())
 
-        # Destination table
-        self.c.execute('''CREATE TABLE IF NOT EXISTS destination (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
-            place TEXT,
-            description TEXT,
-            is_garage BOOLEAN DEFAULT 0
-        )''')
-
         self.build_ui()
         self.load_destinations()
 
@@ -51,7 +43,8 @@ class DestinationPage:
         Button(form, text="Update", command=self.update_destination).grid(row=4, column=1, pady=10)
         Button(form, text="Delete", command=self.delete_destination).grid(row=4, column=2, pady=10)
 
-        self.dest_list = Treeview(self.frame, columns=("ID", "Name", "Place", "Description", "Is Garage"), show="headings")
+        self.dest_list = VirtualList(self.frame, columns=("ID", "Name", "Place", "Description", "Is Garage"), show="headings",
+                                     formatter=lambda r: (r[0], r[1], r[2], r[3], "Yes" if r[4] else "No"))
         for col in self.dest_list["columns"]:
             self.dest_list.heading(col, text=col)
             self.dest_list.column(col, width=120)
@@ -86,12 +79,12 @@ class DestinationPage:
 
     # ---------- UPDATE ----------
     def update_destination(self):
-        selected = self.dest_list.focus()
+        selected = self.dest_list.selected_values()
         if not selected:
             messagebox.showerror("Select Error", "Please select a destination to update")
             return
 
-        dest_id = self.dest_list.item(selected, 'values')[0]
+        dest_id = selected[0]
         try:
             name = self.name_entry.get().strip()
             place = self.place_entry.get().strip()
@@ -105,6 +98,7 @@ class DestinationPage:
             # Update destination
             self.c.execute("UPDATE destination SET name=?, place=?, description=?, is_garage=? WHERE id=?",
                         (name, place, desc, is_garage, dest_id))
+            refresh_destination_summaries(self.c, dest_id)
             self.conn.commit()
 
             # -----------------------------
@@ -158,13 +152,14 @@ class DestinationPage:
 
     # ---------- DELETE ----------
     def delete_destination(self):
-        selected = self.dest_list.focus()
+        selected = self.dest_list.selected_values()
         if not selected:
             messagebox.showerror("Select Error", "Please select a destination to delete")
             return
-        dest_id = self.dest_list.item(selected, 'values')[0]
+        dest_id = selected[0]
         if messagebox.askyesno("Delete", "Are you sure to delete this destination?"):
             self.c.execute("DELETE FROM destination WHERE id=?", (dest_id,))
+            refresh_destination_summaries(self.c, dest_id)
             self.conn.commit()
             self.load_destinations()
             self.clear_fields()
@@ -241,19 +236,13 @@ class DestinationPage:
 
     # ---------- LOAD ----------
     def load_destinations(self):
-        for row in self.dest_list.get_children():
-            self.dest_list.delete(row)
-        for row in self.c.execute("SELECT * FROM destination"):
-            row = list(row)
-            row[4] = "Yes" if row[4] else "No"
-            self.dest_list.insert("", END, values=row)
+        self.dest_list.set_query(self.conn, "SELECT id, name, place, description, is_garage FROM destination ORDER BY id")
 
     # ---------- SELECT ----------
     def on_select(self, event):
-        selected = self.dest_list.focus()
-        if not selected:
+        values = self.dest_list.selected_values()
+        if not values:
             return
-        values = self.dest_list.item(selected, 'values')
         self.name_entry.delete(0, END); self.name_entry.insert(0, values[1])
         self.place_entry.delete(0, END); self.place_entry.insert(0, values[2])
         self.desc_entry.delete(0, END); self.desc_entry.insert(0, values[3])
@@ -0,0 +1,75 @@
+"""Reconciliation dialog for a dispatch register import.
+
+Shows what the register will add (rows, entries, bags) against what it
+cannot: unknown dealer codes with their row and bag counts, and every
+other row set aside with its reason. The report can be saved as CSV to
+send back to the depot; ``on_apply`` is called when the user imports.
+"""
+from tkinter import *
+from tkinter import ttk, filedialog, messagebox
+
+
+class DispatchImportDialog(Toplevel):
+    def __init__(self, master, plan, file_name, on_apply):
+        super().__init__(master)
+        self.title(f"Import Dispatch Register - {file_name}")
+        self.geometry("820x600")
+        self.plan = plan
+        self.file_name = file_name
+        self.on_apply = on_apply
+
+        Label(self, text=plan.summary(), font=("Arial", 11, "bold"), wraplength=780, justify=LEFT).pack(
+            anchor=W, padx=10, pady=(10, 5))
+        for warning in plan.warnings:
+            Label(self, text=warning, fg="gray").pack(anchor=W, padx=10)
+
+        unmatched = plan.unmatched_codes()
+        Label(self, text=f"Unknown dealer codes ({len(unmatched)})").pack(anchor=W, padx=10, pady=(10, 0))
+        self.codes_tree = self._tree(("Code", "Rows", "Bags"), (200, 100, 100), height=6)
+        for code, row in unmatched.iterrows():
+            self.codes_tree.insert("", END, values=(code or "(blank)", int(row["rows"]), int(row["bags"])))
+
+        Label(self, text=f"Rows not imported ({len(plan.problems)})").pack(anchor=W, padx=10, pady=(10, 0))
+        self.problems_tree = self._tree(("Sheet", "Row", "Code", "Bags", "Problem"), (120, 60, 140, 80, 300))
+        for sheet, line, code, bags, problem in plan.problems.itertuples(index=False, name=None):
+            self.problems_tree.insert("", END, values=(sheet, line, code, bags, problem))
+
+        button_frame = Frame(self)
+        button_frame.pack(pady=10)
+        Button(button_frame, text=f"Import {len(plan.rows)} Rows", command=self.apply,
+               state=NORMAL if len(plan.rows) else DISABLED).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Save Report", command=self.save_report).pack(side=LEFT, padx=5)
+        Button(button_frame, text="Cancel", command=self.destroy).pack(side=LEFT, padx=5)
+
+        self.transient(master)
+        self.grab_set()
+
+    def _tree(self, columns, widths, height=10):
+        list_frame = Frame(self)
+        list_frame.pack(fill=BOTH, expand=True, padx=10)
+        tree = ttk.Treeview(list_frame, columns=columns, show="headings", height=height)
+        for col, width in zip(columns, widths):
+            tree.heading(col, text=col)
+            tree.column(col, width=width, anchor=W)
+        scrollbar = ttk.Scrollbar(list_frame, orient=VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=LEFT, fill=BOTH, expand=True)
+        scrollbar.pack(side=RIGHT, fill=Y)
+        return tree
+
+    def save_report(self):
+        file_path = filedialog.asksaveasfilename(
+            parent=self, title="Save Reconciliation Report", defaultextension=".csv",
+            initialfile=f"{self.file_name.rsplit('.', 1)[0]} - not imported.csv",
+            filetypes=[("CSV files", "*.csv")]
+        )
+        if not file_path:
+            return
+        try:
+            self.plan.problems.to_csv(file_path, index=False)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save the report:\n{e}", parent=self)
+
+    def apply(self):
+        self.destroy()
+        self.on_apply()
@@ -0,0 +1,115 @@
+"""Paste a dispatch list into the destination entry form.
+
+The clerk pastes rows copied from a spreadsheet (or CSV): dealer code or
+name, MDA No., date, bags. "Check" resolves the whole batch through
+``check(text)`` and previews every row with its slab or its problem; only
+when every row checks out are they handed to ``on_add`` together.
+"""
+from tkinter import *
+from tkinter import ttk, messagebox
+
+PREVIEW_COLUMNS = (("Line", 50), ("Dealer", 240), ("Slab", 90), ("MDA", 80),
+                   ("Date", 90), ("Bags", 60), ("Status", 260))
+
+
+class PasteDispatchesDialog(Toplevel):
+    def __init__(self, master, check, on_add):
+        super().__init__(master)
+        self.title("Paste Dispatches")
+        self.geometry("900x600")
+        self.check_rows = check
+        self.on_add = on_add
+        self.resolved = []
+
+        Label(self, text="Paste rows of: Dealer code or name, MDA No, Date (dd-mm-yyyy), Bags "
+                         "(a blank MDA No gets the next number)",
+              anchor=W).pack(fill=X, padx=10, pady=(10, 5))
+
+        self.text = Text(self, height=10, wrap=NONE)
+        self.text.pack(fill=X, padx=10)
+
+        text_buttons = Frame(self)
+        text_buttons.pack(fill=X, padx=10, pady=5)
+        Button(text_buttons, text="📋 Paste from Clipboard", command=self.paste_clipboard).pack(side=LEFT)
+        Button(text_buttons, text="✔ Check", command=self.check).pack(side=LEFT, padx=5)
+
+        self.summary_label = Label(self, anchor=W, font=("Arial", 11, "bold"))
+        self.summary_label.pack(fill=X, padx=10)
+
+        list_frame = Frame(self)
+        list_frame.pack(fill=BOTH, expand=True, padx=10, pady=5)
+        self.tree = ttk.Treeview(list_frame, columns=[c for c, _ in PREVIEW_COLUMNS], show="headings")
+        for col, width in PREVIEW_COLUMNS:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=width, anchor=W)
+        self.tree.tag_configure("error", foreground="red")
+        scrollbar = ttk.Scrollbar(list_frame, orient=VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+        scrollbar.pack(side=RIGHT, fill=Y)
+
+        button_frame = Frame(self)
+        button_frame.pack(pady=10)
+        self.add_button = Button(button_frame, text="Add Rows", state=DISABLED, command=self.add)
+        self.add_button.pack(side=LEFT, padx=5)
+        Button(button_frame, text="Cancel", command=self.destroy).pack(side=LEFT, padx=5)
+
+        # Any edit to the text invalidates the last check
+        self.text.bind("<<Modified>>", self.on_text_modified)
+
+        self.transient(master)
+        self.grab_set()
+        self.text.focus_set()
+
+    def paste_clipboard(self):
+        try:
+            text = self.clipboard_get()
+        except TclError:
+            messagebox.showerror("Error", "The clipboard has no text.", parent=self)
+            return
+        self.text.delete("1.0", END)
+        self.text.insert("1.0", text)
+        self.check()
+
+    def on_text_modified(self, event=None):
+        if self.text.edit_modified():
+            self.text.edit_modified(False)
+            self.resolved = []
+            self.add_button.config(state=DISABLED, text="Add Rows")
+
+    def check(self):
+        try:
+            resolved = self.check_rows(self.text.get("1.0", END))
+        except Exception as e:
+            messagebox.showerror("Error", f"Could not check the rows:\n{e}", parent=self)
+            return
+
+        self.tree.delete(*self.tree.get_children())
+        for r in resolved:
+            dealer = f"{r.dealer[1]} - {r.dealer[2]}" if r.dealer else r.text
+            slab = f"{r.slab.from_km}-{r.slab.to_km} km" if r.slab else ""
+            self.tree.insert("", END, values=(
+                r.line, dealer, slab, r.mda, r.date or "", r.bags or "", r.error or "OK"
+            ), tags=("error",) if r.error else ())
+
+        problems = sum(1 for r in resolved if r.error)
+        if not resolved:
+            self.summary_label.config(text="No rows found.", fg="black")
+        elif problems:
+            self.summary_label.config(text=f"{len(resolved)} rows, {problems} with problems. "
+                                           f"Fix them in the text and check again.", fg="red")
+        else:
+            self.summary_label.config(text=f"{len(resolved)} rows ready.", fg="green")
+
+        # Set after the preview so the text's own <<Modified>> does not clear it
+        self.resolved = resolved if resolved and not problems else []
+        self.text.edit_modified(False)
+        if self.resolved:
+            self.add_button.config(state=NORMAL, text=f"Add {len(self.resolved)} Rows")
+        else:
+            self.add_button.config(state=DISABLED, text="Add Rows")
+
+    def add(self):
+        resolved = self.resolved
+        self.destroy()
+        self.on_add(resolved)
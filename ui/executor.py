@@ -0,0 +1,267 @@
+"""Background query executor for the Tk pages.
+
+A single worker thread owns its own read-only connection (WAL lets it read
+while the Tk thread writes) and runs jobs one at a time. Results come back
+to the Tk thread through a queue that is polled with ``root.after``, so no
+page ever waits on SQL or file I/O inside an event handler.
+
+A job is a function ``fn(conn)`` run on the worker. If it returns a
+generator, every yielded value is handed to ``on_chunk`` as it arrives.
+Submitting a job under a ``key`` that already has one pending cancels the
+older job (and interrupts its SQL if it is running), so a page that reloads
+twice only ever shows the newest result.
+
+Workbooks are parsed on a second worker of the same kind with no
+connection, so a multi-second import never holds up the page loaders and
+list windows queued on the reader. Pages submit through ``submit_query``
+and ``submit_file_job``, which run the job right away on the Tk thread
+when the executors are not started (scripts, benchmarks).
+
+Start them once from main.py:
+    start_executor(root, DB_PATH)
+"""
+import inspect
+import queue
+import threading
+from tkinter import messagebox, ttk, TclError
+
+from db.connection import connect
+
+POLL_MS = 30
+
+
+class Job:
+    def __init__(self, fn, on_done, on_error, on_chunk, key, busy):
+        self.fn = fn
+        self.on_done = on_done
+        self.on_error = on_error
+        self.on_chunk = on_chunk
+        self.key = key
+        self.busy = busy
+        self.cancelled = False
+
+
+class BusyIndicator:
+    """Indeterminate progress bar in the top-right corner of a page."""
+
+    def __init__(self, widget):
+        self.count = 0
+        self.bar = ttk.Progressbar(widget, mode="indeterminate", length=120)
+
+    def start(self):
+        self.count += 1
+        if self.count == 1:
+            self.bar.place(relx=1.0, y=5, x=-10, anchor="ne")
+            self.bar.start(10)
+
+    def stop(self):
+        self.count = max(0, self.count - 1)
+        if self.count == 0:
+            self.bar.stop()
+            self.bar.place_forget()
+
+
+def stream_query(sql, params=(), size=500):
+    """Job function that yields the rows of ``sql`` in batches of ``size``."""
+    def run(conn):
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(size)
+            if not rows:
+                break
+            yield rows
+    return run
+
+
+def show_error(error):
+    messagebox.showerror("DB Error", str(error))
+
+
+class QueryExecutor:
+    def __init__(self, root, db_path, profile="read-only reporting", name="query-executor"):
+        self.root = root
+        self.db_path = db_path
+        self.profile = profile
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.latest = {}          # key -> newest job submitted under it
+        self.indicators = {}      # widget -> BusyIndicator
+        self.outstanding = 0
+        self.polling = False
+        self.reader = None
+        self.current = None
+        self.lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    # ---------- Tk thread ----------
+    def submit(self, fn, on_done=None, on_error=show_error, on_chunk=None, key=None, busy=None):
+        if key is not None and key in self.latest:
+            self.cancel(self.latest[key])
+        job = Job(fn, on_done, on_error, on_chunk, key, busy)
+        if key is not None:
+            self.latest[key] = job
+        if busy is not None:
+            self._indicator(busy).start()
+        self.outstanding += 1
+        self.jobs.put(job)
+        self._schedule_poll()
+        return job
+
+    def cancel(self, job):
+        job.cancelled = True
+        with self.lock:
+            if self.current is job and self.reader is not None:
+                self.reader.interrupt()
+
+    def cancel_key(self, key):
+        if key in self.latest:
+            self.cancel(self.latest[key])
+
+    def stop(self):
+        for job in list(self.latest.values()):
+            self.cancel(job)
+        self.jobs.put(None)
+
+    def _indicator(self, widget):
+        if widget not in self.indicators:
+            self.indicators[widget] = BusyIndicator(widget)
+        return self.indicators[widget]
+
+    def _schedule_poll(self):
+        if not self.polling:
+            self.polling = True
+            self.root.after(POLL_MS, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                job, kind, payload = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if kind != "chunk":
+                self._finish(job)
+            if job.cancelled:
+                continue
+            try:
+                if job.busy is not None and not job.busy.winfo_exists():
+                    continue
+                if kind == "chunk" and job.on_chunk:
+                    job.on_chunk(payload)
+                elif kind == "done" and job.on_done:
+                    job.on_done(payload)
+                elif kind == "error" and job.on_error:
+                    job.on_error(payload)
+            except TclError:
+                # The page was torn down while the job ran
+                continue
+
+        if self.outstanding:
+            self.root.after(POLL_MS, self._poll)
+        else:
+            self.polling = False
+
+    def _finish(self, job):
+        self.outstanding -= 1
+        if job.key is not None and self.latest.get(job.key) is job:
+            del self.latest[job.key]
+        if job.busy is not None and job.busy in self.indicators:
+            try:
+                self.indicators[job.busy].stop()
+            except TclError:
+                del self.indicators[job.busy]
+
+    # ---------- worker thread ----------
+    def _run(self):
+        # A worker without a database (the file worker) hands its jobs None
+        if self.db_path is not None:
+            self.reader = connect(self.db_path, profile=self.profile)
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            if job.cancelled:
+                self.results.put((job, "cancelled", None))
+                continue
+            with self.lock:
+                self.current = job
+            try:
+                result = job.fn(self.reader)
+                if inspect.isgenerator(result):
+                    for chunk in result:
+                        if job.cancelled:
+                            result.close()
+                            break
+                        self.results.put((job, "chunk", chunk))
+                    result = None
+                self.results.put((job, "cancelled" if job.cancelled else "done", result))
+            except Exception as e:
+                self.results.put((job, "cancelled" if job.cancelled else "error", e))
+            finally:
+                with self.lock:
+                    self.current = None
+        if self.reader is not None:
+            self.reader.close()
+
+
+_executor = None
+_file_executor = None
+
+
+def start_executor(root, db_path):
+    global _executor, _file_executor
+    if _executor is None:
+        _executor = QueryExecutor(root, db_path)
+        _file_executor = QueryExecutor(root, None, name="file-executor")
+    return _executor
+
+
+def get_executor():
+    return _executor
+
+
+def stop_executor():
+    global _executor, _file_executor
+    for executor in (_executor, _file_executor):
+        if executor is not None:
+            executor.stop()
+    _executor = _file_executor = None
+
+
+def _run_now(fn, conn, on_done, on_error, on_chunk):
+    """Run a job on this thread, handing back its results as the executor would."""
+    try:
+        result = fn(conn)
+        if inspect.isgenerator(result):
+            for chunk in result:
+                if on_chunk:
+                    on_chunk(chunk)
+            result = None
+    except Exception as e:
+        if on_error:
+            on_error(e)
+        return
+    if on_done:
+        on_done(result)
+
+
+def submit_query(conn, fn, on_done=None, on_error=show_error, on_chunk=None, key=None, busy=None):
+    """Run ``fn(reader)`` on the query executor, or ``fn(conn)`` now when it is not started."""
+    if _executor is None:
+        _run_now(fn, conn, on_done, on_error, on_chunk)
+        return None
+    return _executor.submit(fn, on_done=on_done, on_error=on_error, on_chunk=on_chunk, key=key, busy=busy)
+
+
+def submit_file_job(fn, on_done=None, on_error=show_error, on_chunk=None, key=None, busy=None):
+    """Run ``fn()`` (file parsing, no SQL) on the file worker, or now when it is not started."""
+    if _file_executor is None:
+        _run_now(lambda conn: fn(), None, on_done, on_error, on_chunk)
+        return None
+    return _file_executor.submit(lambda conn: fn(), on_done=on_done, on_error=on_error,
+                                 on_chunk=on_chunk, key=key, busy=busy)
+
+
+def cancel_query(key):
+    if _executor is not None:
+        _executor.cancel_key(key)
@@ -1,16 +1,17 @@
 import os, json
-import platform
 from tkinter import *
 from tkinter import ttk, messagebox
 from datetime import datetime
 from collections import defaultdict
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, TableStyle, Spacer
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
 from num2words import num2words
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER, TA_RIGHT
 from tkcalendar import DateEntry
+from db.bill_totals import refresh_bill_totals
+from db.entry_summary import refresh_entry_summaries
+from db.entry_writes import write_main_bill
+from ui.executor import stream_query, submit_query
+from ui.print_jobs import submit_print
+from reports.main_bill import load_main_bill_snapshot, main_bill_file_stem
+from reports.bill_pack import load_bill_pack, bill_pack_file_stem
 
 
 class MainBillPage:
@@ -21,32 +22,6 @@ class MainBillPage:
         self.c = conn.cursor()
         self.frame.bind("<<ShowFrame>>", lambda e: self.refresh())
         
-        # --- TABLE UPDATE ---
-        self.c.execute('''
-            CREATE TABLE IF NOT EXISTS main_bill (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                bill_number TEXT UNIQUE,
-                letter_note TEXT,
-                to_address TEXT,
-                date_of_clearing TEXT,
-                fact_gst_number TEXT,
-                product TEXT DEFAULT 'FACTOMFOS',
-                hsn_sac_code TEXT,
-                year TEXT,
-                is_garage BOOLEAN DEFAULT 0
-            )
-        ''')
-
-        self.c.execute('''
-            CREATE TABLE IF NOT EXISTS main_bill_entries (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                main_bill_id INTEGER,
-                destination_entry_id INTEGER,
-                FOREIGN KEY (main_bill_id) REFERENCES main_bill(id),
-                FOREIGN KEY (destination_entry_id) REFERENCES destination_entry(id)
-            )
-        ''')
-
         Label(self.frame, text="Generate Main Bill", font=("Arial", 16, "bold")).pack(pady=10)
         Button(self.frame, text="← Back to Dashboard", command=lambda: self.home_frame.tkraise()).pack(anchor='nw', padx=10)
 
@@ -138,33 +113,16 @@ class MainBillPage:
         is_garage = self.is_garage_var.get()
 
         query = """
-            SELECT 
-                de.id,
-                de.date,
-                d.name AS destination,
-                de.bill_number,
-                (
-                    SELECT GROUP_CONCAT(r, ', ')
-                    FROM (
-                        SELECT DISTINCT 
-                            TRIM(REPLACE(rr.from_km, '.0', '')) || '-' || TRIM(REPLACE(rr.to_km, '.0', '')) AS r
-                        FROM rate_range rr
-                        JOIN range_entry re2 ON re2.rate_range_id = rr.id
-                        WHERE re2.destination_entry_id = de.id
-                        ORDER BY rr.from_km
-                    )
-                ) AS ranges
-            FROM destination_entry de
-            JOIN destination d ON de.destination_id = d.id
-            WHERE (de.main_bill_id IS NULL OR de.main_bill_id = "")
-            AND d.is_garage = ?
-            GROUP BY de.id
-            ORDER BY de.date DESC, de.id DESC
+            SELECT destination_entry_id, date, destination_name, bill_number, ranges_label
+            FROM destination_entry_summary
+            WHERE is_billed = 0 AND is_garage = ? AND destination_name IS NOT NULL
+            ORDER BY date DESC, destination_entry_id DESC
         """
 
-        self.c.execute(query, (is_garage,))
-        rows = self.c.fetchall()
+        submit_query(self.conn, stream_query(query, (is_garage,)), on_chunk=self.add_destination_entries,
+                     key=("main-bill", "entries"), busy=self.frame)
 
+    def add_destination_entries(self, rows):
         for row in rows:
             self.dest_tree.insert("", END, values=row)
 
@@ -373,31 +331,73 @@ class MainBillPreviewPage:
         Label(row4, text=f"YEAR: {self.main_bill_data['year']}", font=("Arial", 10, "bold")).grid(row=0, column=1, sticky="e")
 
         # Table section
+        self.table_frame = Frame(self.frame)
+        self.table_frame.pack(fill="x")
         self.build_grouped_table()
 
         # Buttons
         Button(self.frame, text="💾 Save Main Bill", command=self.save_main_bill).pack(pady=(10, 5))
         Button(self.frame, text="🖨️ Export PDF", command=self.export_pdf).pack(pady=(0, 10))
+        Button(self.frame, text="📑 Export Bill Pack", command=self.export_bill_pack).pack(pady=(0, 10))
         Button(self.frame, text="← Back", command=lambda: self.home_frame.tkraise()).pack(pady=(0, 10))
 
     def build_grouped_table(self):
-        # Detect if garage bill
+        # The joins run on the background reader; the table fills in when they return
+        submit_query(self.conn, self.fetch_grouped_rows, on_done=self.render_grouped_table,
+                     key=("bill-preview", id(self)), busy=self.frame)
+
+    def fetch_grouped_rows(self, conn):
+        """Runs on the executor thread: (is_garage_bill, rows) for the preview table."""
+        c = conn.cursor()
         placeholders = ",".join("?" for _ in self.destination_entry_ids)
-        self.c.execute(f'''
+        c.execute(f'''
             SELECT COUNT(*) FROM destination_entry de
             JOIN destination d ON de.destination_id = d.id
             WHERE de.id IN ({placeholders}) AND d.is_garage = 1
         ''', self.destination_entry_ids)
-        is_garage_bill = self.c.fetchone()[0] > 0
+        is_garage_bill = c.fetchone()[0] > 0
+
+        if is_garage_bill:
+            query = f'''
+                SELECT 
+                    ds.name AS destination_name,
+                    dr.no_bags, dr.mt, dr.km, dr.mtk, dr.amount
+                FROM dealer_entry dr
+                JOIN range_entry re ON dr.range_entry_id = re.id
+                JOIN destination_entry de ON re.destination_entry_id = de.id
+                JOIN destination ds ON de.destination_id = ds.id
+                WHERE de.id IN ({placeholders})
+                ORDER BY ds.name
+            '''
+        else:
+            query = f'''
+                SELECT rr.from_km, rr.to_km, rr.rate, rr.is_mtk,
+                    d.name AS dealer_name,
+                    (ds.name || CASE WHEN ds.place IS NOT NULL AND ds.place != '' THEN ' (' || ds.place || ')' ELSE '' END) AS destination_name,
+                    dr.no_bags, dr.mt, dr.km, dr.mtk, dr.amount
+                FROM dealer_entry dr
+                JOIN range_entry re ON dr.range_entry_id = re.id
+                JOIN destination_entry de ON re.destination_entry_id = de.id
+                JOIN dealer d ON dr.dealer_id = d.id
+                JOIN destination ds ON de.destination_id = ds.id
+                JOIN rate_range rr ON re.rate_range_id = rr.id
+                WHERE de.id IN ({placeholders})
+                ORDER BY rr.from_km, ds.name, d.name
+            '''
+        c.execute(query, self.destination_entry_ids)
+        return is_garage_bill, c.fetchall()
+
+    def render_grouped_table(self, result):
+        is_garage_bill, rows = result
 
         # Change title accordingly
         title = "TRANSPORTATION (DEPOT)" if is_garage_bill else "TRANSPORTATION"
-        Label(self.frame, text=title, font=("Arial", 12, "bold")).pack(pady=(10, 0))
+        Label(self.table_frame, text=title, font=("Arial", 12, "bold")).pack(pady=(10, 0))
 
         if is_garage_bill:
             # --- GARAGE BILL MODE ---
             columns = ("destination", "qty_mt", "km", "mtk", "amount")
-            self.tree = ttk.Treeview(self.frame, columns=columns, show="headings")
+            self.tree = ttk.Treeview(self.table_frame, columns=columns, show="headings")
 
             self.tree.heading("destination", text="Destination")
             self.tree.column("destination", width=200)
@@ -416,24 +416,7 @@ class MainBillPreviewPage:
 
             self.tree.pack(padx=10, pady=5, fill="x")
 
-            # --- Fetch all entries ---
-            placeholders = ",".join("?" for _ in self.destination_entry_ids)
-            query = f'''
-                SELECT 
-                    ds.name AS destination_name,
-                    dr.no_bags, dr.mt, dr.km, dr.mtk, dr.amount
-                FROM dealer_entry dr
-                JOIN range_entry re ON dr.range_entry_id = re.id
-                JOIN destination_entry de ON re.destination_entry_id = de.id
-                JOIN destination ds ON de.destination_id = ds.id
-                WHERE de.id IN ({placeholders})
-                ORDER BY ds.name
-            '''
-            self.c.execute(query, self.destination_entry_ids)
-            rows = self.c.fetchall()
-
             # --- Group by destination name ---
-            from collections import defaultdict
             grouped = defaultdict(lambda: {"qty": 0, "mt": 0, "km": 0, "mtk": 0, "amount": 0})
             for row in rows:
                 destination = row[0]
@@ -479,10 +462,10 @@ class MainBillPreviewPage:
 
         else:
             # --- NORMAL BILL MODE ---
-            Label(self.frame, text="TRANSPORTATION", font=("Arial", 12, "bold")).pack(pady=(10, 0))
+            Label(self.table_frame, text="TRANSPORTATION", font=("Arial", 12, "bold")).pack(pady=(10, 0))
 
             columns = ("destination", "qty_mt", "mtk", "amount")
-            self.tree = ttk.Treeview(self.frame, columns=columns, show="tree headings")
+            self.tree = ttk.Treeview(self.table_frame, columns=columns, show="tree headings")
 
             self.tree.heading("#0", text="Slab")
             self.tree.column("#0", width=200)
@@ -501,24 +484,6 @@ class MainBillPreviewPage:
 
             self.tree.pack(padx=10, pady=5, fill="x")
 
-            placeholders = ",".join("?" for _ in self.destination_entry_ids)
-            query = f'''
-                SELECT rr.from_km, rr.to_km, rr.rate, rr.is_mtk,
-                    d.name AS dealer_name,
-                    (ds.name || CASE WHEN ds.place IS NOT NULL AND ds.place != '' THEN ' (' || ds.place || ')' ELSE '' END) AS destination_name,
-                    dr.no_bags, dr.mt, dr.km, dr.mtk, dr.amount
-                FROM dealer_entry dr
-                JOIN range_entry re ON dr.range_entry_id = re.id
-                JOIN destination_entry de ON re.destination_entry_id = de.id
-                JOIN dealer d ON dr.dealer_id = d.id
-                JOIN destination ds ON de.destination_id = ds.id
-                JOIN rate_range rr ON re.rate_range_id = rr.id
-                WHERE de.id IN ({placeholders})
-                ORDER BY rr.from_km, ds.name, d.name
-            '''
-            self.c.execute(query, self.destination_entry_ids)
-            rows = self.c.fetchall()
-
             grouped = defaultdict(list)
             for row in rows:
                 key = (row[0], row[1], row[2], row[3])  # from_km, to_km, rate, is_mtk
@@ -585,7 +550,7 @@ class MainBillPreviewPage:
             amount_words = num2words(amount, to='currency', lang='en_IN').replace("euro", "rupees").replace("cents", "paise").capitalize()
 
             Label(
-                self.frame,
+                self.table_frame,
                 text=f"We are claiming for Rs. {amount:,.2f} ({amount_words})",
                 font=("Arial", 10, "bold"),
                 pady=10
@@ -606,397 +571,34 @@ class MainBillPreviewPage:
                 )
                 if not confirm:
                     return  # Cancel the save if user selects "No"
-
-                # Update existing main bill
-                self.c.execute('''
-                    UPDATE main_bill SET
-                        letter_note = ?, to_address = ?, date_of_clearing = ?,
-                        fact_gst_number = ?, product = ?, hsn_sac_code = ?, year = ?
-                    WHERE id = ?
-                ''', (
-                    self.main_bill_data["letter_note"],
-                    self.main_bill_data["to_address"],
-                    self.main_bill_data["date_of_clearing"],
-                    self.main_bill_data["fact_gst_number"],
-                    self.main_bill_data["product"],
-                    self.main_bill_data["hsn_sac_code"],
-                    self.main_bill_data["year"],
-                    main_bill_id
-                ))
             else:
-                # Insert new main bill
-                self.c.execute('''
-                    INSERT INTO main_bill (
-                        bill_number, letter_note, to_address, date_of_clearing,
-                        fact_gst_number, product, hsn_sac_code, year
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    self.main_bill_data["bill_number"],
-                    self.main_bill_data["letter_note"],
-                    self.main_bill_data["to_address"],
-                    self.main_bill_data["date_of_clearing"],
-                    self.main_bill_data["fact_gst_number"],
-                    self.main_bill_data["product"],
-                    self.main_bill_data["hsn_sac_code"],
-                    self.main_bill_data["year"]
-                ))
-                self.conn.commit()
-                main_bill_id = self.c.lastrowid
-
-            # Clear existing linked entries (in case of update)
-            self.c.execute("DELETE FROM main_bill_entries WHERE main_bill_id = ?", (main_bill_id,))
-            self.c.execute("UPDATE destination_entry SET main_bill_id = NULL WHERE main_bill_id = ?", (main_bill_id,))
-
-            # Insert updated entries
-            for de_id in self.destination_entry_ids:
-                self.c.execute("INSERT INTO main_bill_entries (main_bill_id, destination_entry_id) VALUES (?, ?)", (main_bill_id, de_id))
-                self.c.execute("UPDATE destination_entry SET main_bill_id=? WHERE id=?", (main_bill_id, de_id))
+                main_bill_id = None
 
+            main_bill_id, previous_entry_ids = write_main_bill(
+                self.c, main_bill_id, self.main_bill_data, self.destination_entry_ids
+            )
+            refresh_entry_summaries(self.c, previous_entry_ids + list(self.destination_entry_ids))
+            refresh_bill_totals(self.c, [main_bill_id])
             self.conn.commit()
             messagebox.showinfo("Saved", f"Main Bill #{self.main_bill_data['bill_number']} saved successfully.")
             self.home_frame.tkraise()
 
         except Exception as e:
+            self.conn.rollback()
             messagebox.showerror("Error", f"Failed to save main bill:\n{e}")
 
     def export_pdf(self):
-
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='CenterBold', alignment=TA_CENTER, fontSize=11, leading=14, spaceAfter=6, spaceBefore=4, fontName='Helvetica-Bold'))
-        styles.add(ParagraphStyle(name='NormalBold', fontSize=10, leading=12, spaceAfter=3))
-        styles.add(ParagraphStyle(name='RightNormal', alignment=TA_RIGHT, fontSize=10, leading=12))
-        styles.add(ParagraphStyle(name='Small', fontSize=9, fontName='Helvetica'))
-
-
-        bill_no = self.main_bill_data.get("bill_number", "Unknown")
-        bill_filename = f"main_bill_{bill_no}.pdf"
-        is_garage_bill = False
-
-        # detect if garage
-        self.c.execute("""
-            SELECT COUNT(*) FROM destination 
-            WHERE id IN (
-                SELECT destination_id FROM destination_entry WHERE id IN (%s)
-            ) AND is_garage = 1
-        """ % (",".join(map(str, self.destination_entry_ids))))
-        if self.c.fetchone()[0] > 0:
-            is_garage_bill = True
-            bill_filename = f"garage_bill_{bill_no}.pdf"
-
-        pdf_path = os.path.join(os.getcwd(), bill_filename)
-        doc = SimpleDocTemplate(pdf_path, pagesize=A4, topMargin=40, bottomMargin=30, leftMargin=30, rightMargin=30)
-        
-        elements = []
-
-        # Header paragraph
-        header_para = Paragraph(
-            "<font size=14><b>M/S. SHAN ENTERPRISES</b></font><br/>"
-            "Clearing & Transporting Contractor<br/>"
-            "21/4185 C, Meenchandathally, Gate<br/>"
-            "P.O. Arts College Calicut – 673018<br/>"
-            "Mob: 9447004108",
-            styles['Normal']
+        # Snapshot the bill here; rendering happens in the print worker
+        snapshot = load_main_bill_snapshot(self.c, self.main_bill_data, self.destination_entry_ids)
+        submit_print(self.frame, "main_bill", snapshot, main_bill_file_stem(snapshot),
+                     title=f"Bill {self.main_bill_data.get('bill_number', '')}")
+
+    def export_bill_pack(self):
+        # Main bill plus every entry's report, read in the background
+        main_bill_data, entry_ids = dict(self.main_bill_data), list(self.destination_entry_ids)
+        submit_query(
+            self.conn, lambda conn: load_bill_pack(conn.cursor(), main_bill_data, entry_ids),
+            on_done=lambda pack: submit_print(self.frame, "bill_pack", pack, bill_pack_file_stem(pack),
+                                              title=f"Bill Pack {main_bill_data.get('bill_number', '')}"),
+            busy=self.frame
         )
-
-        # GST aligned to right
-        gst_para = Paragraph("<b>GST32ACNFSB060K1ZP</b>", styles['Normal'])
-
-        # Table to align left+center content with GST right
-        header_table = Table(
-            [[header_para, gst_para]],
-            colWidths=[360, 160]  # adjust widths as per A4 width minus margins
-        )
-        header_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('ALIGN', (0, 0), (0, 0), 'LEFT'),
-            ('ALIGN', (1, 0), (1, 0), 'RIGHT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-        ]))
-
-        elements.append(header_table)
-        elements.append(Spacer(1, 12))
-        # Compact box for Date of Clearing
-        date_paragraph = Paragraph(
-            f"<b>Date of Clearing:</b><br/>{self.main_bill_data['date_of_clearing']}", styles['Normal']
-        )
-
-        # Narrower column, minimal padding
-        date_box_table = Table([[date_paragraph]], colWidths=[100], hAlign='LEFT')
-        date_box_table.setStyle(TableStyle([
-            ('BOX', (0, 0), (-1, -1), 0.5, colors.black),
-            ('LEFTPADDING', (0, 0), (-1, -1), 4),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-            ('TOPPADDING', (0, 0), (-1, -1), 2),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
-        ]))
-
-        # Info rows as a structured table
-        # Now replace the cell in info_rows with this table
-        info_rows = [
-            [f"BILL NO: {self.main_bill_data['bill_number']}", f"Date: {self.main_bill_data['created_date']}"],
-            ["TO", ""],
-            [self.main_bill_data['to_address'], ""],
-            [f"Sir,\n Ref:- {self.main_bill_data['letter_note']}", date_box_table],  # ← this line
-            [f"PRODUCT: {self.main_bill_data['product']}", "WESTHILL RH"],
-            [f"FACT GST {self.main_bill_data['fact_gst_number']}", ""],
-            [f"HSN/SAC CODE: {self.main_bill_data['hsn_sac_code']}", f"YEAR: {self.main_bill_data['year']}"],
-        ]
-        col_widths = [280, 250]
-        elements.append(Table(info_rows, colWidths=col_widths, hAlign='LEFT', style=[
-            ('LEFTPADDING', (0, 0), (-1, -1), 30),   # increase as needed
-            ('RIGHTPADDING', (0, 0), (-1, -1), 30),
-            ('SPAN', (0, 5), (1, 5)),  # Centered GST row
-            ('ALIGN', (0, 5), (1, 5), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-            ('SPAN', (0, 5), (1, 5)), # Span GST across both columns
-            ('ALIGN', (0, 5), (0, 5), 'CENTER'),
-        ]))
-        
-        elements.append(Spacer(1, 10))
-
-        section_title = "TRANSPORTATION (DEPOT)" if is_garage_bill else "TRANSPORTATION"
-        elements.append(Paragraph(section_title, styles["CenterBold"]))
-        elements.append(Spacer(1, 5))
-
-        total_amount = 0
-        grand_amount = 0
-        data = []
-
-        if is_garage_bill:
-            # Garage mode: one aggregated row per destination
-            headers = ["SL/NO", "Destination", "Qty/MT", "KM", "MTK", "Amount"]
-            data = [headers]
-
-            placeholders = ",".join("?" for _ in self.destination_entry_ids)
-            query = f'''
-                SELECT 
-                    ds.name AS destination_name,
-                    dr.no_bags, dr.mt, dr.km, dr.mtk, dr.amount
-                FROM dealer_entry dr
-                JOIN range_entry re ON dr.range_entry_id = re.id
-                JOIN destination_entry de ON re.destination_entry_id = de.id
-                JOIN destination ds ON de.destination_id = ds.id
-                WHERE de.id IN ({placeholders})
-                ORDER BY ds.name
-            '''
-            self.c.execute(query, self.destination_entry_ids)
-            rows = self.c.fetchall()
-
-            # Group & aggregate by destination (single aggregated row per destination)
-            grouped = defaultdict(lambda: {"qty": 0, "mt": 0.0, "km": 0.0, "mtk": 0.0, "amount": 0.0, "count_km": 0})
-            for row in rows:
-                dest_name, qty, mt, km, mtk, amount = row
-                grouped[dest_name]["qty"] += (qty or 0)
-                grouped[dest_name]["mt"] += (mt or 0.0)
-                # km might be same for all entries of a garage; store last non-zero / compute average if needed
-                if km is not None:
-                    grouped[dest_name]["km"] = km
-                grouped[dest_name]["mtk"] += (mtk or 0.0)
-                grouped[dest_name]["amount"] += (amount or 0.0)
-
-            # Build rows: one per destination
-            sl = 1
-            grand_tot_mt = grand_tot_km = grand_tot_mtk = grand_tot_amount = 0.0
-
-            for dest, vals in grouped.items():
-                dest_mt = vals["mt"]
-                dest_km = vals.get("km", 0.0) or 0.0
-                dest_mtk = vals["mtk"]
-                dest_amount = vals["amount"]
-
-                data.append([
-                    str(sl),
-                    dest,
-                    f"{dest_mt:.2f}",
-                    f"{dest_km:.2f}",
-                    f"{dest_mtk:.2f}",
-                    f"{dest_amount:.2f}"
-                ])
-                sl += 1
-
-                grand_tot_mt += dest_mt
-                # For grand KM we usually don't sum km; if you want sum of KM use below, otherwise keep as 0 or avg.
-                grand_tot_km += dest_km
-                grand_tot_mtk += dest_mtk
-                grand_tot_amount += dest_amount
-
-            # Final GRAND TOTAL row
-            data.append([
-                "", "GRAND TOTAL",
-                f"{grand_tot_mt:.2f}",
-                f"{grand_tot_km:.2f}",
-                f"{grand_tot_mtk:.2f}",
-                f"{grand_tot_amount:.2f}"
-            ])
-
-            tbl = Table(data, colWidths=[40, 150, 70, 60, 70, 80])
-            tbl.setStyle(TableStyle([
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-                ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.whitesmoke),
-                ('FONTNAME', (1, -1), (-1, -1), 'Helvetica-Bold'),
-            ]))
-
-            elements.append(tbl)
-            grand_amount = grand_tot_amount
-
-        else:
-            # Table headers
-            table_data = [[
-                'Sl. No.', 'Destinations', 'Qty', 'Total Qty', 'KM', 'MT x KM', 'Total MT x KM', 'Rate', 'Amount Rs.', 'Total Amount'
-            ]]
-            
-            # Query and group dealer entries
-            placeholders = ",".join("?" for _ in self.destination_entry_ids)
-            self.c.execute(f'''
-                SELECT rr.from_km, rr.to_km, rr.rate, rr.is_mtk,
-                    d.name AS dealer_name,
-                    dsd.place AS destination_place,
-                    dr.no_bags, dr.mt, dr.km, dr.mt * dr.km AS qty_km, dr.mtk, dr.amount
-                FROM dealer_entry dr
-                JOIN range_entry re ON dr.range_entry_id = re.id
-                JOIN destination_entry de ON re.destination_entry_id = de.id
-                JOIN dealer d ON dr.dealer_id = d.id
-                JOIN destination dsd ON d.destination_id = dsd.id
-                JOIN rate_range rr ON re.rate_range_id = rr.id
-                WHERE de.id IN ({placeholders})
-                ORDER BY rr.from_km, dsd.place, d.name
-            ''', self.destination_entry_ids)
-            rows = self.c.fetchall()
-            
-            # Group by slab
-            grouped = defaultdict(list)
-            for row in rows:
-                key = (row[0], row[1], row[2], row[3])  # from_km, to_km, rate, is_mtk
-                grouped[key].append(row)
-
-            table_styles = []
-            sl_no = 1
-            row_index = 1
-            grand_qty = grand_mt = grand_mtk = grand_amount = 0
-
-            for (from_km, to_km, rate, is_mtk), entries in grouped.items():
-                start_row = row_index
-                slab_qty = slab_mt = slab_mtk = slab_amount = 0
-                slab_label = f"SLAB {int(from_km)}-{int(to_km)}"
-
-                # ---- NEW: group entries by destination within each slab ----
-                dest_grouped = defaultdict(lambda: {"qty": 0, "mt": 0, "mtk": 0, "amount": 0, "km": 0})
-                for entry in entries:
-                    dest_name = entry[5]
-                    qty = entry[6]
-                    mt = entry[7]
-                    km = entry[8]
-                    mtk = entry[10]
-                    amount = entry[11]
-
-                    dest_grouped[dest_name]["qty"] += qty
-                    dest_grouped[dest_name]["mt"] += mt
-                    dest_grouped[dest_name]["km"] = km  # usually same for same dest
-                    dest_grouped[dest_name]["mtk"] += mtk
-                    dest_grouped[dest_name]["amount"] += amount
-
-                # ---- Insert aggregated destination rows ----
-                for dest_name, vals in dest_grouped.items():
-                    table_data.append([
-                        sl_no, dest_name,
-                        f"{vals['qty']:.2f}", "", slab_label,
-                        f"{vals['mt'] * vals['km']:.2f}", "", f"{rate:.2f}", f"{vals['amount']:.2f}", ""
-                    ])
-
-                    slab_qty += vals["qty"]
-                    slab_mt += vals["mt"]
-                    slab_mtk += vals["mtk"]
-                    slab_amount += vals["amount"]
-                    row_index += 1
-
-                # Merge total columns for slab
-                table_data[start_row][3] = f"{slab_mt:.2f}"
-                table_data[start_row][6] = f"{slab_mtk:.2f}"
-                table_data[start_row][9] = f"{slab_amount:.2f}"
-
-                # Add span styles
-                table_styles.extend([
-                    ('SPAN', (0, start_row), (0, row_index - 1)),  # SL no
-                    ('SPAN', (3, start_row), (3, row_index - 1)),  # Total Qty
-                    ('SPAN', (4, start_row), (4, row_index - 1)),  # KM
-                    ('SPAN', (6, start_row), (6, row_index - 1)),  # Total MT x KM
-                    ('SPAN', (7, start_row), (7, row_index - 1)),  # Rate
-                    ('SPAN', (9, start_row), (9, row_index - 1)),  # Total Amount
-                ])
-
-                sl_no += 1
-                grand_qty += slab_qty
-                grand_mt += slab_mt
-                grand_mtk += slab_mtk
-                grand_amount += slab_amount
-
-            # Grand total row
-            table_data.append([
-                "", "GRAND TOTAL", "", f"{grand_mt:.2f}", "", "", f"{grand_mtk:.2f}", "", "", f"{grand_amount:.2f}"
-            ])
-            
-            # Build ReportLab table
-            tbl = Table(table_data, colWidths=[35, 90, 40, 55, 55, 55, 70, 40, 70, 75])
-            tbl.setStyle(TableStyle(table_styles + [
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 0.25, colors.black),
-                ('BOX', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            elements.append(tbl)
-            elements.append(Spacer(1, 12))
-
-        # Rupees in words
-        grand_amount_str = f"{grand_amount:,.2f}".replace(",", "")
-        elements.append(Spacer(1, 12))
-        amount_words = num2words((float(grand_amount_str)), lang='en_IN').replace("euro", "rupees").title() + " Only"
-        elements.append(Paragraph(
-            f"We are claiming for Rs. {grand_amount:,.2f} ({amount_words}) for Clearing & Transportation Bill of Fertilizer.",
-            styles['Small']
-        ))
-        elements.append(Spacer(1, 12))
-        elements.append(Paragraph("Kindly arrange payment to M/S. Shan Enterprises, through IFSC NO.", styles['Small']))
-        elements.append(Paragraph("CNRB0014404 - A/C. No.44041400000041 Canara Bank, Panniyankara Branch, Calicut.", styles['Small']))
-        elements.append(Spacer(1, 12))
-        elements.append(Paragraph("Acknowledge copies of Delivery advice attached with this bill", styles['Small']))
-        elements.append(Paragraph("I request you to approve the bill and payment may be made at an early date.", styles['Small']))
-        elements.append(Spacer(1, 20))
-        
-        elements.append(Paragraph("Thanking you", styles['Small']))
-        elements.append(Spacer(1, 6))
-        # add styles for alignment word right side
-        styles.add(ParagraphStyle(name='RightAlign', alignment=TA_RIGHT, fontName='Helvetica'))
-        elements.append(Paragraph("Yours faithfully", styles['RightAlign']))
-        
-
-        # Build and open PDF
-        doc.build(elements)
-        try:
-            if platform.system() == "Windows":
-                os.startfile(bill_filename)
-            elif platform.system() == "Darwin":
-                os.system(f"open '{bill_filename}'")
-            else:
-                os.system(f"xdg-open '{bill_filename}'")
-        except Exception as e:
-            print("Could not open PDF automatically:", e)
-
-        messagebox.showinfo("Exported", f"PDF saved and opened: {bill_filename}")
-        
-        messagebox.showinfo("Success", f"PDF saved as {bill_filename}")
-
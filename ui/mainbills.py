@@ -1,8 +1,22 @@
 from tkinter import *
-from tkinter import ttk, messagebox
+from tkinter import messagebox
 from ui.mainbillentry import MainBillPreviewPage
+from db.entry_summary import refresh_entry_summaries
+from db.bill_list import fetch_bill_page, page_keys, PAGE_SIZE
+from ui.virtual_list import VirtualList
+from ui.executor import submit_query
+from ui.batch_export import BatchExportDialog
+from reports.main_bill import load_saved_main_bill
+from reports.bill_pack import load_bill_pack, bill_pack_file_stem
+from ui.print_jobs import submit_print
+from datetime import datetime
 import pandas as pd
 
+
+def format_bill_row(row):
+    _, bill_number, date, ranges, amount, _ = row
+    return (bill_number, date, ranges or "-", round(amount, 2))
+
 class ViewMainBillsPage:
     def __init__(self, frame, home_frame, conn):
         self.frame = frame
@@ -14,10 +28,13 @@ class ViewMainBillsPage:
         Button(self.frame, text="← Back to Dashboard", command=lambda: self.home_frame.tkraise()).pack(anchor='nw', padx=10)
 
         # Updated columns: Removed "to_address", added "ranges"
-        self.tree = ttk.Treeview(
+        self.tree = VirtualList(
             self.frame,
             columns=("bill_number", "date", "ranges", "amount"),
-            show="headings"
+            show="headings",
+            height=PAGE_SIZE,
+            formatter=format_bill_row,
+            selectmode="extended"
         )
         self.tree.heading("bill_number", text="Bill Number")
         self.tree.heading("date", text="Date")
@@ -36,14 +53,41 @@ class ViewMainBillsPage:
         search_frame = Frame(self.frame)
         search_frame.pack(pady=5)
 
-        Label(search_frame, text="Search by Bill Number:").pack(side=LEFT)
+        Label(search_frame, text="Bill Number starts with:").pack(side=LEFT)
         self.search_var = StringVar()
-        search_entry = Entry(search_frame, textvariable=self.search_var, width=30)
+        search_entry = Entry(search_frame, textvariable=self.search_var, width=20)
         search_entry.pack(side=LEFT, padx=5)
 
+        Label(search_frame, text="From (dd-mm-yyyy):").pack(side=LEFT)
+        self.date_from_var = StringVar()
+        Entry(search_frame, textvariable=self.date_from_var, width=12).pack(side=LEFT, padx=5)
+        Label(search_frame, text="To:").pack(side=LEFT)
+        self.date_to_var = StringVar()
+        Entry(search_frame, textvariable=self.date_to_var, width=12).pack(side=LEFT, padx=5)
+
         Button(search_frame, text="🔍 Search", command=self.filter_bills).pack(side=LEFT)
         Button(search_frame, text="🧹 Clear", command=self.clear_filter).pack(side=LEFT, padx=(5, 0))
-        Button(self.frame, text="🗑️ Delete Selected Bill", command=self.delete_selected_bill).pack(pady=(5, 10))
+        search_entry.bind("<Return>", lambda e: self.filter_bills())
+
+        # Paging
+        page_frame = Frame(self.frame)
+        page_frame.pack(pady=5)
+        self.newer_btn = Button(page_frame, text="◀ Newer", command=self.newer_page, state=DISABLED)
+        self.newer_btn.pack(side=LEFT)
+        self.page_label = Label(page_frame, text="")
+        self.page_label.pack(side=LEFT, padx=10)
+        self.older_btn = Button(page_frame, text="Older ▶", command=self.older_page, state=DISABLED)
+        self.older_btn.pack(side=LEFT)
+
+        action_frame = Frame(self.frame)
+        action_frame.pack(pady=(5, 10))
+        Button(action_frame, text="📑 Bill Pack", command=self.export_bill_pack).pack(side=LEFT, padx=5)
+        Button(action_frame, text="📦 Batch Export", command=self.open_batch_export).pack(side=LEFT, padx=5)
+        Button(action_frame, text="🗑️ Delete Selected Bill", command=self.delete_selected_bill).pack(side=LEFT, padx=5)
+
+        self.filters = {}
+        self.page = None
+        self.page_number = 1
 
         self.load_bills()
 
@@ -51,88 +95,72 @@ class ViewMainBillsPage:
     # 🔍 FILTERING
     # --------------------------
     def filter_bills(self):
-        query = self.search_var.get().strip().lower()
-        for item in self.tree.get_children():
-            bill_no = str(self.tree.item(item)['values'][0]).lower()
-            if query not in bill_no:
-                self.tree.detach(item)
-            else:
-                self.tree.reattach(item, '', 'end')
+        filters = {"prefix": self.search_var.get().strip() or None}
+        for key, var in (("date_from", self.date_from_var), ("date_to", self.date_to_var)):
+            value = var.get().strip()
+            if value:
+                try:
+                    datetime.strptime(value, "%d-%m-%Y")
+                except ValueError:
+                    messagebox.showerror("Invalid Date", f"Enter dates as dd-mm-yyyy (got '{value}').")
+                    return
+            filters[key] = value or None
+        self.filters = filters
+        self.load_bills()
 
     def clear_filter(self):
         self.search_var.set("")
-        for item in self.tree.get_children():
-            self.tree.reattach(item, '', 'end')
+        self.date_from_var.set("")
+        self.date_to_var.set("")
+        self.filters = {}
+        self.load_bills()
 
     # --------------------------
-    # 📥 LOAD BILLS (with RANGES)
+    # 📥 LOAD BILLS (one page at a time, newest first)
     # --------------------------
     def load_bills(self):
-        self.tree.delete(*self.tree.get_children())
-
-        self.c.execute("""
-            SELECT 
-                mb.id,
-                mb.bill_number,
-                mb.date_of_clearing,
-                (
-                    SELECT GROUP_CONCAT(r, ', ')
-                    FROM (
-                        SELECT DISTINCT 
-                            TRIM(REPLACE(rr.from_km, '.0', '')) || '-' || TRIM(REPLACE(rr.to_km, '.0', '')) AS r
-                        FROM rate_range rr
-                        JOIN range_entry re2 ON re2.rate_range_id = rr.id
-                        JOIN destination_entry de2 ON de2.id = re2.destination_entry_id
-                        JOIN main_bill_entries mbe2 ON mbe2.destination_entry_id = de2.id
-                        WHERE mbe2.main_bill_id = mb.id
-                        ORDER BY rr.from_km
-                    )
-                ) AS ranges,
-                IFNULL(SUM(dr.amount), 0) AS total_amount
-            FROM main_bill mb
-            LEFT JOIN main_bill_entries mbe ON mbe.main_bill_id = mb.id
-            LEFT JOIN destination_entry de ON de.id = mbe.destination_entry_id
-            LEFT JOIN range_entry re ON re.destination_entry_id = de.id
-            LEFT JOIN dealer_entry dr ON dr.range_entry_id = re.id
-            GROUP BY mb.id
-            ORDER BY mb.date_of_clearing DESC
-        """)
-
-        for row in self.c.fetchall():
-            _, bill_number, date, ranges, amount = row
-            self.tree.insert("", END, values=(bill_number, date, ranges or "-", round(amount, 2)))
+        self.request_page(1)
+
+    def older_page(self):
+        if self.page and self.page.has_older:
+            self.request_page(self.page_number + 1, after=page_keys(self.page.rows)[1])
+
+    def newer_page(self):
+        if self.page and self.page.has_newer:
+            self.request_page(self.page_number - 1, before=page_keys(self.page.rows)[0])
+
+    def request_page(self, page_number, **cursor):
+        options = dict(self.filters, **cursor)
+        submit_query(
+            self.conn, lambda conn: fetch_bill_page(conn.cursor(), **options),
+            on_done=lambda page: self.show_page(page, page_number),
+            key="main-bills", busy=self.frame
+        )
+
+    def show_page(self, page, page_number):
+        self.page = page
+        self.page_number = page_number
+        self.tree.set_rows(page.rows)
+        self.newer_btn.config(state=NORMAL if page.has_newer else DISABLED)
+        self.older_btn.config(state=NORMAL if page.has_older else DISABLED)
+        self.page_label.config(text=f"Page {self.page_number}" if page.rows else "No bills found")
 
     # --------------------------
     # 📄 OPEN SELECTED BILL
     # --------------------------
     def open_selected_bill(self, event=None):
-        selected = self.tree.selection()
+        selected = self.tree.selected_values()
         if not selected:
             return
 
-        bill_number = self.tree.item(selected[0])['values'][0]
-        self.c.execute('SELECT * FROM main_bill WHERE bill_number = ?', (bill_number,))
+        bill_number = selected[0]
+        self.c.execute("SELECT id FROM main_bill WHERE bill_number = ?", (bill_number,))
         row = self.c.fetchone()
-        if not row:
+        saved = load_saved_main_bill(self.c, row[0]) if row else None
+        if not saved:
             messagebox.showerror("Error", "Bill not found.")
             return
-
-        main_bill_id = row[0]
-        main_bill_data = {
-            "bill_number": row[1],
-            "letter_note": row[2],
-            "to_address": row[3],
-            "date_of_clearing": row[4],
-            "fact_gst_number": row[5],
-            "product": row[6],
-            "hsn_sac_code": row[7],
-            "year": row[8],
-            "created_date": row[4] or ""
-        }
-
-        # Get linked destination entries
-        self.c.execute('SELECT destination_entry_id FROM main_bill_entries WHERE main_bill_id = ?', (main_bill_id,))
-        destination_entry_ids = [r[0] for r in self.c.fetchall()]
+        main_bill_data, destination_entry_ids = saved
 
         preview_frame = Frame(self.frame.master)
         preview_frame.grid(row=0, column=0, sticky='nsew')
@@ -140,16 +168,49 @@ class ViewMainBillsPage:
         preview_page = MainBillPreviewPage(preview_frame, self.frame, self.conn, main_bill_data, destination_entry_ids)
         preview_frame.tkraise()
 
+    # --------------------------
+    # 📑 BILL PACK
+    # --------------------------
+    def export_bill_pack(self):
+        selected = self.tree.selected_values()
+        if not selected:
+            messagebox.showwarning("No selection", "Please select a bill.")
+            return
+        bill_number = selected[0]
+
+        def load(conn):
+            c = conn.cursor()
+            c.execute("SELECT id FROM main_bill WHERE bill_number = ?", (bill_number,))
+            row = c.fetchone()
+            saved = load_saved_main_bill(c, row[0]) if row else None
+            if not saved:
+                raise LookupError(f"Bill {bill_number} not found.")
+            return load_bill_pack(c, *saved)
+
+        submit_query(
+            self.conn, load,
+            on_done=lambda pack: submit_print(self.frame, "bill_pack", pack, bill_pack_file_stem(pack),
+                                              title=f"Bill Pack {bill_number}"),
+            busy=self.frame
+        )
+
+    # --------------------------
+    # 📦 BATCH EXPORT
+    # --------------------------
+    def open_batch_export(self):
+        bill_numbers = [values[0] for values in self.tree.selected_rows()]
+        BatchExportDialog(self.frame.winfo_toplevel(), self.conn, bill_numbers, self.filters)
+
     # --------------------------
     # 🗑️ DELETE BILL
     # --------------------------
     def delete_selected_bill(self):
-        selected = self.tree.selection()
+        selected = self.tree.selected_values()
         if not selected:
             messagebox.showwarning("No selection", "Please select a bill to delete.")
             return
 
-        bill_number = self.tree.item(selected[0])['values'][0]
+        bill_number = selected[0]
         confirm = messagebox.askyesno("Confirm Deletion", f"Are you sure you want to delete Bill #{bill_number}?")
         if not confirm:
             return
@@ -165,9 +226,12 @@ class ViewMainBillsPage:
             main_bill_id = row[0]
 
             # Unlink and delete
+            self.c.execute("SELECT id FROM destination_entry WHERE main_bill_id = ?", (main_bill_id,))
+            linked_entry_ids = [r[0] for r in self.c.fetchall()]
             self.c.execute("UPDATE destination_entry SET main_bill_id = NULL WHERE main_bill_id = ?", (main_bill_id,))
             self.c.execute("DELETE FROM main_bill_entries WHERE main_bill_id = ?", (main_bill_id,))
             self.c.execute("DELETE FROM main_bill WHERE id = ?", (main_bill_id,))
+            refresh_entry_summaries(self.c, linked_entry_ids)
             self.conn.commit()
 
             messagebox.showinfo("Deleted", f"Bill #{bill_number} deleted successfully.")
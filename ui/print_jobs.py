@@ -0,0 +1,125 @@
+"""Tk side of the print queue: submit, poll, open finished PDFs, job list."""
+import os
+import platform
+import subprocess
+from tkinter import *
+from tkinter import ttk, messagebox
+
+from reports.print_queue import PrintQueue, DONE, FAILED
+
+POLL_MS = 200
+
+_queue = None
+_polling = False
+_window = None
+
+
+def get_print_queue():
+    global _queue
+    if _queue is None:
+        _queue = PrintQueue()
+    return _queue
+
+
+def shutdown_print_queue():
+    global _queue
+    if _queue is not None:
+        _queue.shutdown()
+        _queue = None
+
+
+def open_file(path):
+    """Open a file with the desktop's default viewer without waiting for it."""
+    try:
+        if platform.system() == "Windows":
+            os.startfile(path)
+        elif platform.system() == "Darwin":
+            subprocess.Popen(["open", path])
+        else:
+            subprocess.Popen(["xdg-open", path])
+    except Exception as e:
+        print("Could not open PDF automatically:", e)
+
+
+def submit_print(widget, kind, snapshot, stem, title=None):
+    """Queue a PDF render and return at once; the file opens when it is ready."""
+    job = get_print_queue().submit(kind, snapshot, stem, title)
+    _schedule_poll(widget.winfo_toplevel())
+    _refresh_window()
+    return job
+
+
+def _schedule_poll(root):
+    global _polling
+    if not _polling:
+        _polling = True
+        root.after(POLL_MS, lambda: _poll(root))
+
+
+def _poll(root):
+    global _polling
+    queue = get_print_queue()
+    for job in queue.poll():
+        if job.status == DONE:
+            open_file(job.path)
+        elif job.status == FAILED:
+            messagebox.showerror("Print Failed", f"{job.title}:\n{job.error}")
+    _refresh_window()
+    if queue.pending():
+        root.after(POLL_MS, lambda: _poll(root))
+    else:
+        _polling = False
+
+
+def _refresh_window():
+    if _window is not None and _window.winfo_exists():
+        _window.refresh()
+
+
+class PrintJobsWindow(Toplevel):
+    COLUMNS = ("id", "document", "status", "wait", "render", "stages", "file")
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Print Jobs")
+        self.geometry("1000x300")
+
+        self.tree = ttk.Treeview(self, columns=self.COLUMNS, show="headings")
+        for col, text, width in (("id", "#", 40), ("document", "Document", 200), ("status", "Status", 80),
+                                 ("wait", "Queued (ms)", 90), ("render", "Render (ms)", 90),
+                                 ("stages", "Story / Layout / Write (ms)", 180), ("file", "File", 300)):
+            self.tree.heading(col, text=text)
+            self.tree.column(col, width=width, anchor=W if col in ("document", "file") else CENTER)
+        self.tree.pack(fill=BOTH, expand=True, padx=10, pady=10)
+        self.tree.bind("<Double-1>", lambda e: self.open_selected())
+
+        Button(self, text="Open PDF", command=self.open_selected).pack(pady=(0, 10))
+        self.refresh()
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        for job in reversed(get_print_queue().jobs):
+            self.tree.insert("", END, iid=str(job.id), values=(
+                job.id, job.title, "cached" if job.cached else job.status,
+                "" if job.wait_ms is None else f"{job.wait_ms:.0f}",
+                "" if job.render_ms is None else f"{job.render_ms:.0f}",
+                " / ".join(f"{job.stages[stage]:.0f}" for stage in ("story", "layout", "write")) if job.stages else "",
+                os.path.basename(job.path)
+            ))
+
+    def open_selected(self):
+        selected = self.tree.focus()
+        if not selected:
+            return
+        job = next(j for j in get_print_queue().jobs if str(j.id) == selected)
+        if job.status == DONE:
+            open_file(job.path)
+
+
+def show_print_jobs(master):
+    global _window
+    if _window is None or not _window.winfo_exists():
+        _window = PrintJobsWindow(master)
+    else:
+        _window.lift()
+    return _window
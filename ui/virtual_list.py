@@ -0,0 +1,290 @@
+"""Virtual list: a Treeview that only keeps a screenful of rows alive.
+
+The list pulls rows from a SQL window or from an in-memory list, and
+recycles a fixed set of Treeview items as the user scrolls. A SQL source
+is ordered by its first column (the row id). Opening it reads one window
+and a ``COUNT(*)``; each later window seeks from the nearest key already
+known, the last cached row or one of every ``SAMPLE_EVERY`` keys sampled
+in the background, so no ``OFFSET`` is longer than that. Selection is
+tracked by the row's first value (its id), so it survives scrolling and
+re-renders.
+"""
+from itertools import islice
+from tkinter import *
+from tkinter import ttk
+from ui.executor import cancel_query, submit_query
+
+DEFAULT_ROW_HEIGHT = 20
+HEADER_HEIGHT = 25
+SHIFT_MASK, CONTROL_MASK = 0x0001, 0x0004
+SAMPLE_EVERY = 256
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+class VirtualList(Frame):
+    def __init__(self, master, columns, show="headings", height=20, formatter=None,
+                 selectmode="browse", **tree_options):
+        super().__init__(master)
+        self.tree = ttk.Treeview(self, columns=columns, show=show, height=height,
+                                 selectmode=selectmode, **tree_options)
+        self.selectmode = selectmode
+        self.scrollbar = Scrollbar(self, orient=VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+
+        self.formatter = formatter or tuple
+        self.visible = height
+        self.top = 0
+        self.total = 0
+
+        self._conn = None
+        self._sql = None
+        self._params = ()
+        self._key = None            # name of the query's first column
+        self._samples = []          # that column at rows 0, SAMPLE_EVERY, 2 * SAMPLE_EVERY, ...
+        self._rows = None           # in-memory source
+        self._cache_start = 0
+        self._cache = []
+        self._slots = []            # recycled Treeview item ids
+        self._selected = {}         # key -> values, kept while scrolled out of view
+        self._selected_values = None
+        self._programmatic = None
+        self._extending = False     # Shift/Ctrl held on the last click
+        self._select_callbacks = []
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<Button-1>", self._on_click)
+        self.tree.bind("<MouseWheel>", lambda e: self._scroll_units(-1 * (e.delta // 120) * 3))
+        self.tree.bind("<Button-4>", lambda e: self._scroll_units(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_units(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._scroll_units(-self.visible))
+        self.tree.bind("<Next>", lambda e: self._scroll_units(self.visible))
+
+    # ---------- Treeview facade ----------
+    def heading(self, *args, **kwargs):
+        return self.tree.heading(*args, **kwargs)
+
+    def column(self, *args, **kwargs):
+        return self.tree.column(*args, **kwargs)
+
+    def __getitem__(self, key):
+        if key == "columns":
+            return self.tree["columns"]
+        return super().__getitem__(key)
+
+    def bind(self, sequence=None, func=None, add=None):
+        if sequence == "<<TreeviewSelect>>":
+            self._select_callbacks.append(func)
+            return
+        return self.tree.bind(sequence, func, add)
+
+    def selected_values(self):
+        """Values of the selected row, even when it is scrolled out of view."""
+        return self._selected_values
+
+    def selected_rows(self):
+        """Values of every selected row (``selectmode="extended"``)."""
+        return list(self._selected.values())
+
+    def clear_selection(self):
+        self._selected, self._selected_values = {}, None
+        self._select_slots([])
+
+    # ---------- data sources ----------
+    def set_query(self, conn, sql, params=()):
+        """Show the rows of ``sql``; only the visible window is ever fetched.
+
+        ``sql`` must be ordered by its first column, a unique key (the row
+        id). The first window and the row count are read on the background
+        executor when one is started, then the key samples later windows
+        seek from.
+        """
+        params = tuple(params)
+        window = self.visible * 4
+
+        def run(reader):
+            key = reader.execute(f"SELECT * FROM ({sql}) LIMIT 0", params).description[0][0]
+            rows = reader.execute(f"SELECT * FROM ({sql}) LIMIT ?", params + (window,)).fetchall()
+            total = reader.execute(f"SELECT COUNT(*) FROM ({sql})", params).fetchone()[0]
+            yield "window", (key, total, rows)
+            if total > window:
+                cur = reader.execute(f"SELECT {_quote(key)} FROM ({sql})", params)
+                yield "samples", [r[0] for r in islice(cur, 0, None, SAMPLE_EVERY)]
+
+        def on_chunk(chunk):
+            kind, payload = chunk
+            if kind == "window":
+                # The list keeps showing the old source until the new one has rows
+                self._conn, self._sql, self._params, self._rows = conn, sql, params, None
+                self._key, self.total, rows = payload
+                self._samples = []
+                self._reset(rows)
+            else:
+                self._samples = payload
+
+        submit_query(conn, run, on_chunk=on_chunk, key=self._job_key(), busy=self)
+
+    def _anchor(self, start):
+        """The known (position, key) closest at or before ``start``; (0, None) is the first row."""
+        anchors = [(0, None)]
+        if self._samples:
+            index = min(start // SAMPLE_EVERY, len(self._samples) - 1)
+            anchors.append((index * SAMPLE_EVERY, self._samples[index]))
+        if self._cache and self._cache_start <= start:
+            position = min(start, self._cache_start + len(self._cache) - 1)
+            anchors.append((position, self._cache[position - self._cache_start][0]))
+        return max(anchors, key=lambda anchor: anchor[0])
+
+    def _fetch(self, start, count):
+        """Rows ``start`` to ``start + count`` of the query, seeking from the nearest known key."""
+        position, key = self._anchor(start)
+        where, params = "", self._params
+        if key is not None:
+            where, params = f" WHERE {_quote(self._key)} >= ?", params + (key,)
+        return self._conn.execute(
+            f"SELECT * FROM ({self._sql}){where} ORDER BY {_quote(self._key)} LIMIT ? OFFSET ?",
+            params + (count, start - position)
+        ).fetchall()
+
+    def set_rows_from(self, conn, fn):
+        """Show the rows ``fn(conn)`` returns, read on the background executor."""
+        submit_query(conn, fn, on_done=self.set_rows, key=self._job_key(), busy=self)
+
+    def set_rows(self, rows):
+        """Show an already materialised list of rows."""
+        cancel_query(self._job_key())
+        self._conn = self._sql = self._key = None
+        self._samples = []
+        self._rows = list(rows)
+        self.total = len(self._rows)
+        self._reset()
+
+    def _job_key(self):
+        return ("virtual-list", id(self))
+
+    def _reset(self, first_rows=()):
+        # A new source invalidates the selection, like clearing a plain Treeview
+        self._selected, self._selected_values = {}, None
+        self._cache_start, self._cache = 0, list(first_rows)
+        self.top = 0
+        self._render()
+
+    def _window(self, start, count):
+        if self._rows is not None:
+            return self._rows[start:start + count]
+        end = min(start + count, self.total)
+        if not (self._cache_start <= start and end <= self._cache_start + len(self._cache)):
+            # Fetch a few screens around the viewport so small scrolls hit the cache
+            cache_start = max(0, start - self.visible)
+            self._cache = self._fetch(cache_start, self.visible * 4)
+            self._cache_start = cache_start
+        offset = start - self._cache_start
+        return self._cache[offset:offset + count]
+
+    # ---------- rendering ----------
+    def _render(self):
+        rows = self._window(self.top, self.visible) if self.total else []
+
+        # Grow or shrink the pool of items only when the viewport size changes
+        while len(self._slots) < len(rows):
+            self._slots.append(self.tree.insert("", END))
+        while len(self._slots) > len(rows):
+            self.tree.delete(self._slots.pop())
+
+        selected_slots = []
+        for slot, row in zip(self._slots, rows):
+            values = self.formatter(row)
+            self.tree.item(slot, values=values)
+            if str(values[0]) in self._selected:
+                selected_slots.append(slot)
+        self._select_slots(selected_slots)
+
+        if self.total:
+            self.scrollbar.set(self.top / self.total, min(1.0, (self.top + self.visible) / self.total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll_to(self, top):
+        top = max(0, min(int(top), max(0, self.total - self.visible)))
+        if top != self.top or not self._slots:
+            self.top = top
+            self._render()
+
+    def _scroll_units(self, units):
+        self.scroll_to(self.top + units)
+        return "break"
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self.total)
+        elif action == "scroll":
+            step = self.visible if unit == "pages" else 1
+            self.scroll_to(self.top + int(amount) * step)
+
+    def _on_resize(self, event):
+        row_height = ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT
+        visible = max(1, (event.height - HEADER_HEIGHT) // int(row_height))
+        if visible != self.visible:
+            self.visible = visible
+            self._cache_start, self._cache = 0, []
+            self.top = max(0, min(self.top, self.total - visible))
+            self._render()
+
+    # ---------- selection ----------
+    def _select_slots(self, slots):
+        if set(self.tree.selection()) != set(slots):
+            self._programmatic = set(slots)
+            self.tree.selection_set(slots)
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        programmatic, self._programmatic = self._programmatic, None
+        if programmatic is not None and set(selection) == programmatic:
+            # Re-selection of the tracked rows after a scroll, not a user click
+            return
+        if not (self.selectmode == "extended" and self._extending):
+            if not selection:
+                return
+            self._selected = {}
+        for slot in self._slots:
+            values = self.tree.item(slot, "values")
+            if not values:
+                continue
+            if slot in selection:
+                self._selected[str(values[0])] = values
+            else:
+                self._selected.pop(str(values[0]), None)
+        focus = self.tree.focus()
+        if focus in selection:
+            self._selected_values = self.tree.item(focus, "values")
+        elif selection:
+            self._selected_values = self.tree.item(selection[0], "values")
+        else:
+            self._selected_values = next(reversed(self._selected.values()), None)
+        for callback in self._select_callbacks:
+            callback(event)
+
+    def _on_click(self, event):
+        self._extending = bool(event.state & (SHIFT_MASK | CONTROL_MASK))
+
+    def _move_selection(self, step):
+        self._extending = False
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self._slots:
+            return
+        index = self._slots.index(selection[0]) + step
+        if 0 <= index < len(self._slots):
+            self.tree.selection_set(self._slots[index])
+            self.tree.focus(self._slots[index])
+        else:
+            self.scroll_to(self.top + step)
+            edge = self._slots[0 if step < 0 else -1]
+            self.tree.selection_set(edge)
+            self.tree.focus(edge)
+        return "break"
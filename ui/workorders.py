@@ -1,6 +1,9 @@
 from tkinter import *
 from tkinter import messagebox
-from tkinter.ttk import Treeview
+from db import rate_card
+from db.bill_totals import bill_ids_for_rate_range, refresh_bill_totals
+from db.entry_summary import entry_ids_for_rate_range, refresh_entry_summaries
+from ui.virtual_list import VirtualList
 
 class WorkOrderRatePage:
     def __init__(self, frame, home_frame, conn):
@@ -9,14 +12,6 @@ class WorkOrderRatePage:
         self.conn = conn
         self.c = conn.cursor()
         self.frame.bind("<<ShowFrame>>", lambda e: self.load_rates())
-        
-        self.c.execute('''CREATE TABLE IF NOT EXISTS rate_range (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            from_km REAL,
-            to_km REAL,
-            rate REAL,
-            is_mtk BOOLEAN DEFAULT 1
-        )''')
 
         self.build_ui()
         self.load_rates()
@@ -50,7 +45,8 @@ class WorkOrderRatePage:
         Button(form, text="Update Rate", command=self.update_rate).grid(row=4, column=1, pady=10)
         Button(form, text="Delete Rate", command=self.delete_rate).grid(row=4, column=2, pady=10)
 
-        self.rate_list = Treeview(self.frame, columns=("ID", "From", "To", "Rate", "IS MTK"), show="headings")
+        self.rate_list = VirtualList(self.frame, columns=("ID", "From", "To", "Rate", "IS MTK"), show="headings",
+                                     formatter=lambda r: (r[0], r[1], r[2], r[3], "Yes" if r[4] else "No"))
         for col in self.rate_list["columns"]:
             self.rate_list.heading(col, text=col)
             self.rate_list.column(col, width=100)
@@ -67,45 +63,64 @@ class WorkOrderRatePage:
             self.c.execute("INSERT INTO rate_range (from_km, to_km, rate, is_mtk) VALUES (?, ?, ?, ?)",
                            (from_km, to_km, rate, is_mtk))
             self.conn.commit()
+            rate_card.invalidate()
             self.load_rates()
             self.clear_fields()
             messagebox.showinfo("Success", "Rate added successfully")
+            self.warn_rate_card_problems()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
     def update_rate(self):
-        selected = self.rate_list.focus()
+        selected = self.rate_list.selected_values()
         if not selected:
             messagebox.showerror("Selection Error", "Please select a rate to update")
             return
-        rate_id = self.rate_list.item(selected, 'values')[0]
+        rate_id = selected[0]
         is_mtk = 1 if self.is_mtk_var.get() else 0
         try:
             self.c.execute("UPDATE rate_range SET from_km=?, to_km=?, rate=?, is_mtk=? WHERE id=?",
                           (float(self.from_entry.get()), float(self.to_entry.get()), float(self.rate_entry.get()), is_mtk, rate_id))
+            self.refresh_stored_labels(rate_id)
             self.conn.commit()
+            rate_card.invalidate()
             self.load_rates()
             self.clear_fields()
             messagebox.showinfo("Success", "Rate updated successfully")
+            self.warn_rate_card_problems()
         except Exception as e:
+            self.conn.rollback()
             messagebox.showerror("Error", str(e))
 
     def delete_rate(self):
-        selected = self.rate_list.focus()
+        selected = self.rate_list.selected_values()
         if not selected:
             messagebox.showerror("Selection Error", "Please select a rate to delete")
             return
-        rate_id = self.rate_list.item(selected, 'values')[0]
+        rate_id = selected[0]
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this rate?"):
             try:
                 self.c.execute("DELETE FROM rate_range WHERE id=?", (rate_id,))
+                self.refresh_stored_labels(rate_id)
                 self.conn.commit()
+                rate_card.invalidate()
                 self.load_rates()
                 self.clear_fields()
                 messagebox.showinfo("Success", "Rate deleted successfully")
             except Exception as e:
+                self.conn.rollback()
                 messagebox.showerror("Error", str(e))
 
+    def refresh_stored_labels(self, rate_id):
+        """Bills and entry summaries store their slab labels; redo them for the ones using this slab."""
+        refresh_bill_totals(self.c, bill_ids_for_rate_range(self.c, rate_id))
+        refresh_entry_summaries(self.c, entry_ids_for_rate_range(self.c, rate_id))
+
+    def warn_rate_card_problems(self):
+        problems = rate_card.get_rate_card(self.c).describe_problems()
+        if problems:
+            messagebox.showwarning("Rate Slabs", "Check the rate slabs:\n\n" + "\n".join(problems))
+
     def clear_fields(self):
         self.from_entry.delete(0, END)
         self.to_entry.delete(0, END)
@@ -113,18 +128,12 @@ class WorkOrderRatePage:
         self.is_mtk_var.set(True)
 
     def load_rates(self):
-        for row in self.rate_list.get_children():
-            self.rate_list.delete(row)
-        self.c.execute("SELECT * FROM rate_range")
-        for row in self.c.fetchall():
-            id, from_km, to_km, rate, is_mtk = row
-            self.rate_list.insert("", END, values=(id, from_km, to_km, rate, "Yes" if is_mtk else "No"))
+        self.rate_list.set_query(self.conn, "SELECT id, from_km, to_km, rate, is_mtk FROM rate_range ORDER BY id")
 
     def on_select(self, event):
-        selected = self.rate_list.focus()
-        if not selected:
+        values = self.rate_list.selected_values()
+        if not values:
             return
-        values = self.rate_list.item(selected, 'values')
         self.from_entry.delete(0, END); self.from_entry.insert(0, values[1])
         self.to_entry.delete(0, END); self.to_entry.insert(0, values[2])
         self.rate_entry.delete(0, END); self.rate_entry.insert(0, values[3])